@@ -9,6 +9,8 @@ from __future__ import annotations
 import os
 import openai
 
+from text_angel import TONES, ShieldConfig
+
 
 # ---------------------------------------------------------------------
 #  🔑 API Configuration
@@ -22,24 +24,16 @@ if not api_key:
 client = openai.OpenAI(api_key=api_key)
 
 
-# ---------------------------------------------------------------------
-#  🎵 Tone Instructions
-# ---------------------------------------------------------------------
-TONE_PROMPTS = {
-    "GRACE": "Rewrite the following message with kindness, care, and gentleness.",
-    "TRUTH": "Rewrite the following message to be honest, clear, and respectful.",
-    "CALM": "Rewrite the following message in a peaceful and soft tone, with no harshness.",
-}
-
-
 # ---------------------------------------------------------------------
 #  🛡️ Shield Input Text
 # ---------------------------------------------------------------------
+BLOCKED_MATCHER = ShieldConfig(
+    categories={"blocked": ["hate", "stupid", "kill", "dumb", "ugly", "idiot", "worthless"]}
+).compile()
+
 def shield_input_text(message: str) -> str:
     """Block or warn about harmful words before rewriting."""
-    blocked_terms = ["hate", "stupid", "kill", "dumb", "ugly", "idiot", "worthless"]
-
-    if any(term in message.lower() for term in blocked_terms):
+    if BLOCKED_MATCHER.contains_any(message):
         return (
             "⚠️ Message contained harmful or aggressive words. "
             "Please rephrase kindly before rewriting."
@@ -53,20 +47,16 @@ def shield_input_text(message: str) -> str:
 # ---------------------------------------------------------------------
 def handle_rewrite_input(message: str, tone: str = "GRACE") -> str:
     """Rewrite a message using the specified tone."""
-    if tone not in TONE_PROMPTS:
-        raise ValueError("Invalid tone. Choose from GRACE, TRUTH, or CALM.")
+    tones = TONES.names(hosted=True)
+    if tone not in tones:
+        raise ValueError(f"Invalid tone. Choose from {', '.join(tones)}.")
 
     if not message.strip():
         raise ValueError("Message cannot be empty.")
 
-    prompt = f"{TONE_PROMPTS[tone]} Message: {message.strip()}"
-
     response = client.chat.completions.create(
         model="gpt-4",
-        messages=[
-            {"role": "system", "content": "You are a kind and emotionally intelligent assistant."},
-            {"role": "user", "content": prompt},
-        ],
+        messages=TONES.get(tone).messages(message.strip()),
         temperature=0.7,
         max_tokens=150,
     )
@@ -95,7 +85,7 @@ def main() -> None:
     """Run Text Angel interactively in the terminal."""
     print("\n🪽 Welcome to TEXT ANGEL – Angel Edit Engine 🕊️")
     message = input("Type your message: ").strip()
-    tone = input("Choose a tone (GRACE, TRUTH, CALM): ").strip().upper()
+    tone = input(f"Choose a tone ({', '.join(TONES.names(hosted=True))}): ").strip().upper()
 
     try:
         rewritten = angel_edit(message, tone)
@@ -2,9 +2,7 @@ import re
 import json
 import openai
 
-# Load tone prompts
-with open("tone_prompts.json", "r") as f:
-    tone_prompts = json.load(f)
+from text_angel import TONES
 
 # Load shield words
 with open("shield_filter_words.json", "r") as f:
@@ -15,16 +13,12 @@ def handle_rewrite_input(tone, original):
     Rewrites a message using the selected tone and applies shielding.
     Returns the rewritten message and count of shielded words.
     """
-    if tone not in tone_prompts:
+    if tone not in TONES.names(hosted=True):
         return original, 0
 
-    system_prompt = tone_prompts[tone]
     completion = openai.ChatCompletion.create(
         model="gpt-4",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": original}
-        ]
+        messages=TONES.get(tone).messages(original)
     )
     rewritten = completion['choices'][0]['message']['content']
     shielded, count = shield_input_text(rewritten)
@@ -46,3 +46,8 @@ def add_badge(badge):
 def get_tone_default():
     profile = load_user_profile()
     return profile.get("tone_default", "GRACE")
+
+# Shield sensitivity (0–10) used to pick the user's precompiled shield tier
+def get_sensitivity():
+    profile = load_user_profile()
+    return profile.get("sensitivity", default_profile["sensitivity"])
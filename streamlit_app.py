@@ -1,7 +1,8 @@
 """Streamlit front-end for the Text Angel protective writing assistant."""
 
 import streamlit as st
-from text_angel.angel_edit_engine import handle_rewrite_input, shield_input_text
+from text_angel import TONES
+from text_angel.angel_edit_engine import shield_input_text, stream_rewrite_input
 
 APP_TITLE = "🪽 Text Angel | Protective Messaging"
 
@@ -18,10 +19,11 @@ def main():
 
     # --- Sidebar Controls ---
     st.sidebar.header("Angel Settings")
+    tone_names = TONES.names(hosted=True)
     tone = st.sidebar.radio(
         "Choose your rewrite tone:",
-        ["GRACE", "TRUTH", "CALM"],
-        help="GRACE = gentle & kind, TRUTH = clear & honest, CALM = soft & peaceful",
+        tone_names,
+        help=", ".join(f"{name} = {TONES.get(name).label.lower()}" for name in tone_names),
     )
 
     st.sidebar.markdown("---")
@@ -49,15 +51,14 @@ def main():
             st.error(safe_text)
             return
 
-        # Step 2 – rewrite with selected tone
-        with st.spinner("Rewriting with your selected tone..."):
-            try:
-                rewritten = handle_rewrite_input(safe_text, tone)
-                st.success("✨ Message rewritten successfully!")
-                st.markdown(f"**Tone applied:** {tone}")
-                st.text_area("Rewritten Message:", rewritten, height=200)
-            except Exception as e:
-                st.error(f"Error during rewrite: {e}")
+        # Step 2 – rewrite with selected tone, showing it as it is written
+        st.markdown(f"**Tone applied:** {tone}")
+        try:
+            with st.container(border=True):
+                st.write_stream(stream_rewrite_input(safe_text, tone))
+            st.success("✨ Message rewritten successfully!")
+        except Exception as e:
+            st.error(f"Error during rewrite: {e}")
 
     st.markdown("---")
     st.caption("🪽 Built with love for kind communication – Text Angel")
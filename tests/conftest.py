@@ -6,3 +6,39 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+def chat_completion(model: str, content: str) -> dict:
+    """JSON body of a chat completion whose reply is ``content``."""
+
+    return {
+        "id": "fake",
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }
+        ],
+    }
+
+
+def mock_openai_client(handler, max_retries: int = 0):
+    """``AsyncOpenAI`` client whose requests are answered by ``handler``.
+
+    ``handler`` takes an ``httpx.Request`` and returns an ``httpx.Response``,
+    as for ``httpx.MockTransport``. Callers skip their tests first when
+    httpx or openai is missing.
+    """
+
+    import httpx
+    import openai
+
+    return openai.AsyncOpenAI(
+        api_key="test-key",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        max_retries=max_retries,
+    )
@@ -0,0 +1,361 @@
+"""Tests for the FastAPI service, run against a fake upstream model."""
+
+import asyncio
+import importlib
+import json
+import sqlite3
+import time
+from typing import Optional
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+pytest.importorskip("openai")
+
+from conftest import chat_completion, mock_openai_client  # noqa: E402
+from text_angel import TONES, rewrite_text  # noqa: E402
+from text_angel.resilience import CircuitBreaker, ResilientRewriter  # noqa: E402
+from text_angel.rewrite_cache import RewriteCache  # noqa: E402
+from text_angel.rewriter import HostedRewriter  # noqa: E402
+from text_angel.router import LatencyRouter  # noqa: E402
+from text_angel.singleflight import SingleFlight  # noqa: E402
+
+
+class FakeUpstream:
+    """Chat completions endpoint that answers after ``delay`` seconds."""
+
+    def __init__(
+        self, delay: float = 0.0, token_delay: float = 0.0, delays: Optional[dict] = None
+    ) -> None:
+        self.delay = delay
+        self.token_delay = token_delay
+        self.delays = delays or {}
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, request: "httpx.Request") -> "httpx.Response":
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        body = json.loads(request.content)
+        message = body["messages"][-1]["content"].rsplit("Message: ", 1)[-1]
+        try:
+            await asyncio.sleep(self.delays.get(message, self.delay))
+        finally:
+            self.active -= 1
+        if message == "reject me":
+            return httpx.Response(400, json={"error": {"message": "rejected", "type": "invalid"}})
+        if body.get("stream"):
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=self.stream(body["model"], f" kind: {message} ".split(" ")),
+            )
+        return httpx.Response(200, json=chat_completion(body["model"], f" kind: {message} "))
+
+    async def stream(self, model: str, words: list):
+        for index, word in enumerate(words):
+            if index:
+                await asyncio.sleep(self.token_delay)
+            chunk = {
+                "id": "fake",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+
+
+def read_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def fake_rewriter(upstream: FakeUpstream, **kwargs: object) -> HostedRewriter:
+    return HostedRewriter(client=mock_openai_client(upstream), **kwargs)  # type: ignore[arg-type]
+
+
+@pytest.fixture()
+def api(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    module = importlib.import_module("text_angel_api")
+    monkeypatch.setattr(module, "rewrite_cache", RewriteCache())
+    monkeypatch.setattr(module, "rewrite_flights", SingleFlight())
+    return module
+
+
+def client_for(api) -> "httpx.AsyncClient":
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://test")
+
+
+def test_rewrite_uses_the_async_client(api, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(api, "rewriter", fake_rewriter(FakeUpstream()))
+
+    async def run() -> "httpx.Response":
+        async with client_for(api) as client:
+            return await client.post("/rewrite", json={"tone": "calm", "message": "go away"})
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    assert response.json() == {"rewritten": "kind: go away", "tone": "CALM", "engine": "hosted"}
+
+
+def test_rewrite_serves_repeats_from_cache(api, monkeypatch: pytest.MonkeyPatch) -> None:
+    upstream = FakeUpstream()
+    monkeypatch.setattr(api, "rewriter", fake_rewriter(upstream))
+
+    async def run() -> list:
+        async with client_for(api) as client:
+            bodies = [
+                {"tone": "calm", "message": "shut up"},
+                {"tone": "CALM", "message": "  shut   up "},
+                {"tone": "calm", "message": "shut up", "fresh": True},
+            ]
+            results = [await client.post("/rewrite", json=body) for body in bodies]
+            return results + [await client.get("/rewrite/cache")]
+
+    *results, stats = asyncio.run(run())
+    assert [result.json()["rewritten"] for result in results] == ["kind: shut up"] * 3
+    # The second request is a cache hit; ``fresh`` goes upstream again.
+    assert upstream.calls == 2
+    assert stats.json()["hits"] == 1 and stats.json()["memory_entries"] == 1
+
+
+def test_identical_concurrent_rewrites_share_one_call(
+    api, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    upstream = FakeUpstream(delay=0.1)
+    monkeypatch.setattr(api, "rewriter", fake_rewriter(upstream))
+
+    async def run() -> list:
+        async with client_for(api) as client:
+            body = {"tone": "GRACE", "message": "you never listen"}
+            return await asyncio.gather(*(client.post("/rewrite", json=body) for _ in range(20)))
+
+    results = asyncio.run(run())
+    assert {result.json()["rewritten"] for result in results} == {"kind: you never listen"}
+    assert upstream.calls == 1
+    assert api.rewrite_flights.coalesced == 19
+
+
+def test_rewrite_stream_relays_tokens_then_metadata(
+    api, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    upstream = FakeUpstream()
+    monkeypatch.setattr(api, "rewriter", fake_rewriter(upstream))
+
+    async def run() -> list:
+        async with client_for(api) as client:
+            body = {"tone": "calm", "message": "you are stupid"}
+            first = await client.post("/rewrite/stream", json=body)
+            assert first.headers["content-type"].startswith("text/event-stream")
+            second = await client.post("/rewrite/stream", json=body)
+            return [read_events(first.text), read_events(second.text)]
+
+    streamed, cached = asyncio.run(run())
+    tokens = [data["text"] for name, data in streamed if name == "token"]
+    assert len(tokens) > 1 and "".join(tokens).strip() == "kind: you are stupid"
+    name, done = streamed[-1]
+    assert name == "done" and done["rewritten"] == "kind: you are stupid"
+    assert done["tone"] == "CALM" and done["shield"]["blocked_words"] == ["stupid"]
+    # The finished stream is cached and replayed as a single token.
+    assert upstream.calls == 1
+    assert cached == [("token", {"text": "kind: you are stupid"}), ("done", done)]
+
+
+def test_rewrite_batch_reports_each_item(api, monkeypatch: pytest.MonkeyPatch) -> None:
+    upstream = FakeUpstream(delay=0.02)
+    monkeypatch.setattr(api, "rewriter", fake_rewriter(upstream))
+    monkeypatch.setattr(api, "REWRITE_BATCH_CONCURRENCY", 2)
+    messages = ["you never listen", "reject me", "stop it", "you never listen", "leave"]
+
+    async def run() -> "httpx.Response":
+        async with client_for(api) as client:
+            items = [{"tone": "grace", "message": message} for message in messages]
+            return await client.post("/rewrite/batch", json={"items": items})
+
+    results = asyncio.run(run()).json()["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert [result["status"] for result in results] == [200, 500, 200, 200, 200]
+    assert results[1]["rewritten"] is None and "rejected" in results[1]["error"]
+    assert results[3]["rewritten"] == results[0]["rewritten"] == "kind: you never listen"
+    # The repeated message is served by the cache or the call already in flight.
+    assert upstream.calls == 4 and upstream.peak <= 2
+
+
+def test_rewrite_batch_contains_unexpected_item_errors(
+    api, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(api, "rewriter", fake_rewriter(FakeUpstream()))
+    rewrite_message = api.rewrite_message
+
+    async def flaky(req):
+        if req.message == "locked":
+            raise sqlite3.OperationalError("database is locked")
+        return await rewrite_message(req)
+
+    monkeypatch.setattr(api, "rewrite_message", flaky)
+
+    async def run() -> tuple:
+        async with client_for(api) as client:
+            items = [{"tone": "calm", "message": message} for message in ("a", "locked", "b")]
+            batch = await client.post("/rewrite/batch", json={"items": items})
+            streamed = await client.post("/rewrite/batch?stream=true", json={"items": items})
+            return batch, [json.loads(line) for line in streamed.text.splitlines()]
+
+    batch, lines = asyncio.run(run())
+    assert batch.status_code == 200
+    results = batch.json()["results"]
+    assert [result["status"] for result in results] == [200, 500, 200]
+    assert "database is locked" in results[1]["error"]
+    assert sorted(line["status"] for line in lines) == [200, 200, 500]
+
+
+def test_rewrite_batch_streams_ndjson_in_completion_order(
+    api, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    upstream = FakeUpstream(delays={"slow": 0.2, "medium": 0.1, "fast": 0.0})
+    monkeypatch.setattr(api, "rewriter", fake_rewriter(upstream))
+
+    async def run() -> list:
+        async with client_for(api) as client:
+            items = [{"tone": "calm", "message": message} for message in ("slow", "medium", "fast")]
+            response = await client.post("/rewrite/batch?stream=true", json={"items": items})
+            assert response.headers["content-type"] == "application/x-ndjson"
+            too_many = await client.post(
+                "/rewrite/batch", json={"items": items * (api.REWRITE_BATCH_MAX // 3 + 1)}
+            )
+            assert too_many.status_code == 422
+            return [json.loads(line) for line in response.text.splitlines()]
+
+    assert [line["index"] for line in asyncio.run(run())] == [2, 1, 0]
+
+
+def test_open_breaker_degrades_to_local_rewrite(api, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def down(request: "httpx.Request") -> "httpx.Response":
+        return httpx.Response(503, json={"error": {"message": "overloaded"}})
+
+    rewriter = ResilientRewriter(
+        client=mock_openai_client(down),  # type: ignore[arg-type]
+        max_attempts=1,
+        breaker=CircuitBreaker(failure_threshold=1),
+    )
+    monkeypatch.setattr(api, "rewriter", rewriter)
+
+    async def run() -> list:
+        async with client_for(api) as client:
+            body = {"tone": "GRACE", "message": "shut up"}
+            return [await client.post("/rewrite", json=body) for _ in range(2)]
+
+    failed, degraded = asyncio.run(run())
+    assert failed.status_code == 500
+    local = rewrite_text("shut up", TONES.get("GRACE").profile).rewritten_text
+    assert degraded.json() == {"rewritten": local, "tone": "GRACE", "engine": "local"}
+    assert api.rewrite_cache.stats().memory_entries == 0
+
+
+def test_slow_upstream_routes_to_local_engine_within_deadline(
+    api, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    upstream = FakeUpstream()
+    rewriter = fake_rewriter(upstream)
+    for _ in range(20):
+        rewriter.latency.record(2.0)  # a brownout
+    monkeypatch.setattr(api, "rewriter", rewriter)
+    monkeypatch.setattr(api, "router", LatencyRouter(rewriter))
+
+    async def run() -> list:
+        async with client_for(api) as client:
+            body = {"tone": "GRACE", "message": "shut up"}
+            return [
+                await client.post("/rewrite", json={**body, "deadline_ms": 500}),
+                await client.post("/rewrite", json=body),
+                await client.post(
+                    "/rewrite/stream", json={"tone": "GRACE", "message": "go", "deadline_ms": 500}
+                ),
+            ]
+
+    local, hosted, streamed = asyncio.run(run())
+    expected = rewrite_text("shut up", TONES.get("GRACE").profile).rewritten_text
+    assert local.json() == {"rewritten": expected, "tone": "GRACE", "engine": "local"}
+    # Without a deadline the request still waits for the hosted model.
+    assert hosted.json()["engine"] == "hosted" and upstream.calls == 1
+    assert read_events(streamed.text)[-1][1]["engine"] == "local"
+    assert api.router.stats().local == 2
+
+
+def test_deadline_bounds_the_wait_for_the_hosted_model(
+    api, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(api, "rewriter", fake_rewriter(FakeUpstream(delay=0.3)))
+
+    async def run() -> tuple:
+        async with client_for(api) as client:
+            body = {"tone": "GRACE", "message": "shut up", "deadline_ms": 50}
+            started = time.perf_counter()
+            response = await client.post("/rewrite", json=body)
+            elapsed = time.perf_counter() - started
+            # The abandoned call still finishes and fills the cache.
+            await asyncio.sleep(0.4)
+            return response, elapsed, await client.post("/rewrite", json=body)
+
+    response, elapsed, later = asyncio.run(run())
+    assert response.json()["engine"] == "local" and elapsed < 0.25
+    assert later.json() == {"rewritten": "kind: shut up", "tone": "GRACE", "engine": "hosted"}
+
+
+def test_shield_stays_fast_while_rewrites_saturate_upstream(
+    api, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    upstream = FakeUpstream(delay=0.2)
+    monkeypatch.setattr(api, "rewriter", fake_rewriter(upstream, max_concurrency=4))
+
+    async def run() -> list:
+        async with client_for(api) as client:
+            rewrites = [
+                asyncio.create_task(
+                    client.post("/rewrite", json={"tone": "GRACE", "message": f"msg {index}"})
+                )
+                for index in range(20)
+            ]
+            await asyncio.sleep(0.05)
+            latencies = []
+            for _ in range(30):
+                started = time.perf_counter()
+                response = await client.post("/shield", json={"message": "you are stupid"})
+                latencies.append(time.perf_counter() - started)
+                assert response.json()["count"] == 1
+            results = await asyncio.gather(*rewrites)
+            assert all(result.status_code == 200 for result in results)
+            return latencies
+
+    latencies = asyncio.run(run())
+    # Twenty rewrites at four at a time keep the upstream busy for ~1s.
+    assert upstream.peak == 4
+    assert max(latencies) < 0.1
+
+
+def test_slow_upstream_times_out_with_504(api, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(api, "rewriter", fake_rewriter(FakeUpstream(delay=1.0), timeout=0.05))
+
+    async def run() -> list:
+        async with client_for(api) as client:
+            body = {"tone": "GRACE", "message": "hi"}
+            return [
+                await client.post("/rewrite", json=body),
+                await client.post("/rewrite/stream", json=body),
+            ]
+
+    plain, streamed = asyncio.run(run())
+    assert plain.status_code == 504
+    assert read_events(streamed.text)[-1] == (
+        "error",
+        {"status": 504, "detail": "Rewrite timed out: The hosted model did not answer in time."},
+    )
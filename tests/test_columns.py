@@ -0,0 +1,40 @@
+"""Tests for shielding whole pandas and Arrow columns."""
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pd = pytest.importorskip("pandas")
+
+from text_angel import ShieldConfig, shield_text  # noqa: E402
+from text_angel.columns import shield_column  # noqa: E402
+
+CONFIG = ShieldConfig(categories={"kindness": ["mean", "shut up"], "anger": ["hate"]})
+TEXTS = ["I HATE you, shut up", "whatever", None, "so mean, mean", "", "hate-mail"]
+
+
+def test_shield_column_matches_shield_text_row_by_row() -> None:
+    result = shield_column(pa.array(TEXTS), CONFIG, sanitize=True)
+
+    for row, text in enumerate(TEXTS):
+        expected = shield_text(text, CONFIG) if text is not None else None
+        assert result.counts[row].as_py() == (expected.total_matches if expected else 0)
+        assert result.sanitized[row].as_py() == (expected.sanitized_text if expected else None)
+    assert result.category_counts["kindness"].to_pylist() == [1, 0, 0, 2, 0, 0]
+    assert result.category_totals == {"kindness": 3, "anger": 2}
+
+
+def test_shield_column_keeps_the_pandas_index() -> None:
+    series = pd.Series(TEXTS, index=list("abcdef"), name="message")
+    result = shield_column(series, CONFIG, sanitize=True)
+
+    assert result.counts.to_dict() == {"a": 2, "b": 0, "c": 0, "d": 2, "e": 0, "f": 1}
+    assert result.counts.name == "message"
+    assert result.sanitized["a"] == "I 🛡️ you, 🛡️"
+    assert result.sanitized["c"] is None
+    assert shield_column(series, CONFIG).sanitized is None
+
+
+def test_shield_column_handles_obfuscation_aware_configs() -> None:
+    config = ShieldConfig(categories={"anger": ["hate"]}, normalize=True)
+    result = shield_column(pa.chunked_array([["h4te it"], ["fine", None]]), config)
+    assert result.counts.to_pylist() == [1, 0, 0]
@@ -0,0 +1,66 @@
+"""Tests for the memory-mapped compiled shield format."""
+
+import pickle
+from pathlib import Path
+
+import pytest
+
+from text_angel import ShieldConfig, ShieldingError, shield_text
+from text_angel.compiled import load_compiled_shield, write_compiled_shield
+
+
+@pytest.fixture()
+def artifact(tmp_path: Path) -> Path:
+    config = ShieldConfig(
+        categories={"kindness": ["mean", "dumb"], "calm": ["shut up"], "anger": ["hate"]},
+        version="abc123",
+    )
+    path = tmp_path / "shield.tashield"
+    write_compiled_shield(config, path)
+    return path
+
+
+def test_compiled_shield_matches_in_memory_matcher(artifact: Path) -> None:
+    matcher = load_compiled_shield(artifact)
+    text = "Shut up, you mean and dumb thing, I hate it"
+    expected = shield_text(
+        text,
+        ShieldConfig(
+            categories={"kindness": ["mean", "dumb"], "calm": ["shut up"], "anger": ["hate"]},
+            version="abc123",
+        ),
+    )
+    assert matcher.shield(text) == expected
+    assert matcher.config.version == "abc123"
+    assert matcher.config.categories["kindness"] == ["mean", "dumb"]
+    assert matcher.contains_any("so mean")
+    assert matcher.first_match("all good") is None
+
+
+def test_compiled_shield_survives_pickling(artifact: Path) -> None:
+    matcher = pickle.loads(pickle.dumps(load_compiled_shield(artifact)))
+    assert matcher.shield("I hate it").total_matches == 1
+
+
+def test_compiled_shield_rejects_other_files(tmp_path: Path) -> None:
+    path = tmp_path / "shield.json"
+    path.write_text('{"anger": ["hate"]}', encoding="utf-8")
+    with pytest.raises(ShieldingError):
+        load_compiled_shield(path)
+
+
+def test_compiled_shield_keeps_severities(tmp_path: Path) -> None:
+    config = ShieldConfig(
+        categories={"mild": ["dumb", "jerk"], "severe": ["hate"]},
+        severities={"mild": 3},
+        word_severities={("mild", "jerk"): 6},
+    )
+    path = tmp_path / "shield.tashield"
+    write_compiled_shield(config, path)
+    loaded = load_compiled_shield(path).config
+    assert loaded.severities == {"mild": 3}
+    assert loaded.word_severities == {("mild", "jerk"): 6}
+    text = "dumb jerk, I hate it"
+    for sensitivity in range(11):
+        expected = config.tiers().shield(text, sensitivity).total_matches
+        assert loaded.tiers().shield(text, sensitivity).total_matches == expected
@@ -0,0 +1,17 @@
+"""Tests for typo-tolerant lookup."""
+
+from text_angel.fuzzy import DeletionIndex, edit_distance
+
+
+def test_edit_distance_counts_adjacent_swaps_once() -> None:
+    assert edit_distance("idoit", "idiot", 2) == 1
+    assert edit_distance("stupidd", "stupid", 2) == 1
+    assert edit_distance("kindness", "idiot", 2) == 3
+
+
+def test_deletion_index_respects_distance_and_length() -> None:
+    index = DeletionIndex([("stupid", 0, 1), ("worthless", 1, 2), ("hate", 2, 1)])
+    assert index.lookup("stuupid") == 0
+    assert index.lookup("wrthles") == 1
+    assert index.lookup("stpd") is None
+    assert index.lookup("have") is None
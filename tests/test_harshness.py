@@ -0,0 +1,53 @@
+"""Tests for the local harshness scorer."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from text_angel.harshness import (  # noqa: E402
+    load_harshness_model,
+    load_labeled_messages,
+    main,
+    train_harshness_model,
+)
+
+KIND = ["thanks so much", "see you later", "have a nice day", "great job today", "love this"]
+HARSH = ["I hate you", "you are stupid", "shut up idiot", "you're worthless", "I HATE this"]
+
+
+def test_trained_model_separates_kind_and_harsh_messages() -> None:
+    model = train_harshness_model(KIND + HARSH, [0] * len(KIND) + [1] * len(HARSH), bits=12)
+
+    scores = model.score_batch(KIND + HARSH)
+    assert scores.shape == (len(KIND) + len(HARSH),)
+    assert scores[: len(KIND)].max() < model.threshold < scores[len(KIND) :].min()
+    assert model.is_harsh("you are so stupid")
+    assert not model.is_harsh("thanks, see you later")
+    assert model.score("I hate you") == pytest.approx(scores[len(KIND)])
+
+
+def test_model_round_trips_through_the_cli(tmp_path: Path) -> None:
+    labeled = tmp_path / "labeled.jsonl"
+    labeled.write_text(
+        "\n".join(
+            json.dumps({"text": text, "label": int(text in HARSH)}) for text in KIND + HARSH
+        ),
+        encoding="utf-8",
+    )
+    output = tmp_path / "harshness.npz"
+    main([str(labeled), str(output), "--threshold", "0.7"])
+
+    model = load_harshness_model(output)
+    assert model.threshold == 0.7
+    assert model.bits == 18
+    assert model.is_harsh("shut up idiot")
+
+
+def test_labeled_file_errors_name_the_line(tmp_path: Path) -> None:
+    labeled = tmp_path / "labeled.jsonl"
+    labeled.write_text('{"text": "hi", "label": 0}\n{"text": "oops"}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="labeled.jsonl:2"):
+        load_labeled_messages(labeled)
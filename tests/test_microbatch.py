@@ -0,0 +1,89 @@
+"""Tests for micro-batching short hosted rewrites."""
+
+import asyncio
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("openai")
+
+from conftest import chat_completion, mock_openai_client  # noqa: E402
+from text_angel import TONES  # noqa: E402
+from text_angel.microbatch import MicroBatcher  # noqa: E402
+from text_angel.rewriter import HostedRewriter, UpstreamError  # noqa: E402
+
+
+class BatchUpstream:
+    """Fake chat endpoint that answers numbered batches with JSON."""
+
+    def __init__(self, malformed: bool = False, status: int = 200) -> None:
+        self.malformed = malformed
+        self.status = status
+        self.requests = []
+
+    async def __call__(self, request: "httpx.Request") -> "httpx.Response":
+        body = json.loads(request.content)
+        self.requests.append(body)
+        if self.status != 200:
+            return httpx.Response(self.status, json={"error": {"message": "down"}})
+        prompt = body["messages"][-1]["content"]
+        if "Messages:\n" in prompt:
+            items = [
+                json.loads(line.split(". ", 1)[1])
+                for line in prompt.split("Messages:\n", 1)[1].splitlines()
+            ]
+            rewrites = [f"kind: {item}" for item in items]
+            content = json.dumps({"rewrites": rewrites[:-1] if self.malformed else rewrites})
+        else:
+            content = "kind: " + prompt.rsplit("Message: ", 1)[-1]
+        return httpx.Response(200, json=chat_completion(body["model"], content))
+
+
+def batcher_for(upstream: BatchUpstream, **kwargs: object) -> MicroBatcher:
+    rewriter = HostedRewriter(client=mock_openai_client(upstream))  # type: ignore[arg-type]
+    return MicroBatcher(rewriter, **kwargs)  # type: ignore[arg-type]
+
+
+def rewrite_all(batcher: MicroBatcher, messages: list) -> list:
+    grace = TONES.get("GRACE")
+
+    async def run() -> list:
+        return await asyncio.gather(
+            *(batcher.rewrite(grace, message) for message in messages), return_exceptions=True
+        )
+
+    return asyncio.run(run())
+
+
+def test_concurrent_short_messages_share_one_call() -> None:
+    upstream = BatchUpstream()
+    batcher = batcher_for(upstream, max_items=3, max_wait=0.01, max_words=5)
+    long_message = "this message is far too long to batch"
+    messages = ["shut up", "you are mean", "go away", "stop it", long_message]
+
+    assert rewrite_all(batcher, messages) == [f"kind: {message}" for message in messages]
+    # Three fill a batch, one waits out the timer alone, the long one skips batching.
+    assert len(upstream.requests) == 3
+    batched = [request for request in upstream.requests if "response_format" in request]
+    assert len(batched) == 1 and batched[0]["response_format"] == {"type": "json_object"}
+    stats = batcher.stats()
+    assert (stats.batches, stats.batched_messages, stats.single_calls) == (1, 3, 2)
+
+
+def test_malformed_batch_reply_falls_back_to_single_calls() -> None:
+    upstream = BatchUpstream(malformed=True)
+    batcher = batcher_for(upstream, max_items=8, max_wait=0.01)
+
+    assert rewrite_all(batcher, ["shut up", "go away"]) == ["kind: shut up", "kind: go away"]
+    assert len(upstream.requests) == 3
+    assert batcher.stats().fallbacks == 1
+
+
+def test_batch_errors_reach_every_caller() -> None:
+    upstream = BatchUpstream(status=400)
+    batcher = batcher_for(upstream, max_items=8, max_wait=0.01)
+
+    errors = rewrite_all(batcher, ["shut up", "go away"])
+    assert all(isinstance(error, UpstreamError) for error in errors)
+    assert len(upstream.requests) == 1
@@ -0,0 +1,26 @@
+"""Tests for obfuscation folding."""
+
+from text_angel.normalize import normalize_text
+
+
+def test_normalize_folds_common_obfuscations() -> None:
+    assert normalize_text("H4TE").text == "hate"
+    assert normalize_text("iiiidiot").text == "iidiot"
+    assert normalize_text("iiiidiot", stretch=1).text == "idiot"
+    assert normalize_text("s.t.u.p.i.d").text == "stupid"
+    assert normalize_text("ѕтuрid").text == "stupid"
+    assert normalize_text("st*pid").text == "st*pid"
+
+
+def test_normalize_leaves_ordinary_text_readable() -> None:
+    assert normalize_text("hate-filled, 2020!").text == "hate-filled, 2020!"
+    assert normalize_text("the heel, as I pass").text == "the heel, as i pass"
+    assert not normalize_text("hell").stretched
+    assert normalize_text("*hugs*").text == " hugs "
+
+
+def test_normalize_offsets_point_at_original_characters() -> None:
+    folded = normalize_text("xx iiidiot")
+    assert folded.text == "xx iidiot"
+    assert folded.starts[3] == 3
+    assert folded.ends[4] == 6
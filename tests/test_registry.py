@@ -0,0 +1,71 @@
+"""Tests for the multi-tenant shield registry."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from text_angel import ShieldConfig, ShieldRegistry, ShieldingError
+
+BASE = ShieldConfig(categories={"kindness": ["mean"], "anger": ["hate"]}, version="base1")
+
+
+def test_registry_layers_tenant_words_over_base() -> None:
+    registry = ShieldRegistry(BASE)
+    registry.set_tenant("school-a", {"kindness": ["loser"], "bullying": ["nerd"]})
+
+    result = registry.shield("mean loser nerd", "school-a")
+    assert result.sanitized_text == "🛡️ 🛡️ 🛡️"
+    assert result.matches_by_category == {"kindness": 2, "anger": 0, "bullying": 1}
+    assert result.config_version.startswith("base1+")
+
+    # Other tenants, and unknown ones, only see the base words.
+    assert registry.shield("mean loser nerd", "school-b").sanitized_text == "🛡️ loser nerd"
+    assert registry.matcher(None) is registry.matcher("school-b") is registry.base.compile()
+
+
+def test_registry_interns_shared_words() -> None:
+    registry = ShieldRegistry(BASE)
+    registry.set_tenant("a", {"bullying": ["".join(["ne", "rd"])]})
+    registry.set_tenant("b", {"bullying": ["".join(["n", "erd"])]})
+    first = registry.config_for("a").categories["bullying"][0]
+    second = registry.config_for("b").categories["bullying"][0]
+    assert first is second
+
+
+def test_registry_evicts_least_recently_used_tenants() -> None:
+    registry = ShieldRegistry(BASE, memory_budget=1)
+    for tenant in ("a", "b", "c"):
+        registry.set_tenant(tenant, {"bullying": [f"word{tenant}"]})
+
+    registry.matcher("a")
+    assert registry.matcher("a") is registry.matcher("a")
+    registry.matcher("b")
+    registry.matcher("c")
+
+    stats = registry.stats()
+    assert stats.hits == 2
+    assert stats.misses == 3
+    assert stats.evictions == 2
+    assert stats.cached_tenants == 1
+    assert stats.cached_bytes > 0
+    # Evicted tenants are simply recompiled.
+    assert registry.shield("worda", "a").total_matches == 1
+    assert registry.stats().misses == 4
+
+
+def test_registry_replacing_a_tenant_invalidates_its_matcher(tmp_path: Path) -> None:
+    registry = ShieldRegistry(BASE)
+    registry.set_tenant("a", {"bullying": ["nerd"]})
+    assert registry.shield("nerd", "a").total_matches == 1
+
+    path = tmp_path / "tenant.json"
+    path.write_text(json.dumps({"bullying": {"words": ["geek"], "severity": 3}}), encoding="utf-8")
+    registry.load_tenant("a", path)
+    assert registry.shield("nerd geek", "a").sanitized_text == "nerd 🛡️"
+    assert registry.config_for("a").severity("bullying", "geek") == 3
+
+    registry.remove_tenant("a")
+    assert registry.shield("geek", "a").total_matches == 0
+    with pytest.raises(ShieldingError):
+        registry.set_tenant(None, {"bullying": ["nerd"]})
@@ -0,0 +1,95 @@
+"""Tests for retries, circuit breaking and hedging of hosted rewrites."""
+
+import asyncio
+import json
+from typing import List
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("openai")
+pytest.importorskip("tenacity")
+
+from conftest import chat_completion, mock_openai_client  # noqa: E402
+from text_angel import TONES  # noqa: E402
+from text_angel.resilience import CircuitBreaker, CircuitOpen, ResilientRewriter  # noqa: E402
+from text_angel.rewriter import UpstreamError  # noqa: E402
+
+
+class ScriptedUpstream:
+    """Fake chat endpoint answering each call with the next ``(status, delay)``."""
+
+    def __init__(self, script: List[tuple]) -> None:
+        self.script = list(script)
+        self.calls = 0
+
+    async def __call__(self, request: "httpx.Request") -> "httpx.Response":
+        status, delay = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if status != 200:
+            return httpx.Response(status, json={"error": {"message": f"status {status}"}})
+        body = json.loads(request.content)
+        return httpx.Response(200, json=chat_completion(body["model"], f"kind #{self.calls}"))
+
+
+def resilient(upstream: ScriptedUpstream, **kwargs: object) -> ResilientRewriter:
+    client = mock_openai_client(upstream)
+    kwargs.setdefault("backoff", 0.001)
+    kwargs.setdefault("rate_limit_backoff", 0.001)
+    return ResilientRewriter(client=client, **kwargs)  # type: ignore[arg-type]
+
+
+def rewrite(rewriter: ResilientRewriter) -> str:
+    return asyncio.run(rewriter.rewrite(TONES.get("GRACE"), "shut up"))
+
+
+def test_transient_failures_are_retried_and_client_errors_are_not() -> None:
+    upstream = ScriptedUpstream([(500, 0), (429, 0), (200, 0)])
+    rewriter = resilient(upstream)
+    assert rewrite(rewriter) == "kind #3"
+    assert rewriter.stats().retries == 2
+
+    upstream = ScriptedUpstream([(400, 0), (200, 0)])
+    rewriter = resilient(upstream)
+    with pytest.raises(UpstreamError):
+        rewrite(rewriter)
+    assert upstream.calls == 1 and rewriter.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_then_lets_one_trial_through() -> None:
+    clock = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=lambda: clock[0])
+    upstream = ScriptedUpstream([(503, 0), (503, 0), (200, 0)])
+    rewriter = resilient(upstream, breaker=breaker, max_attempts=1)
+
+    for _ in range(2):
+        with pytest.raises(UpstreamError):
+            rewrite(rewriter)
+    with pytest.raises(CircuitOpen):
+        rewrite(rewriter)
+    assert upstream.calls == 2 and breaker.state == CircuitBreaker.OPEN
+
+    clock[0] += 10.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert rewrite(rewriter) == "kind #3"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert rewriter.stats().short_circuits == 1
+
+
+def test_slow_calls_are_hedged_after_the_p95_delay() -> None:
+    upstream = ScriptedUpstream([(200, 1.0), (200, 0)])
+    rewriter = resilient(upstream, hedge_min_samples=20, hedge_min_delay=0.01)
+    for _ in range(20):
+        rewriter.latency.record(0.02)
+
+    async def run() -> tuple:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        reply = await rewriter.rewrite(TONES.get("GRACE"), "shut up")
+        return reply, loop.time() - started
+
+    reply, elapsed = asyncio.run(run())
+    assert reply == "kind #2" and elapsed < 0.5
+    stats = rewriter.stats()
+    assert (stats.hedges, stats.hedge_wins) == (1, 1)
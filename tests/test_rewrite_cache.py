@@ -0,0 +1,86 @@
+"""Tests for the hosted rewrite cache."""
+
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from text_angel import TONES, Tone
+from text_angel.rewrite_cache import RewriteCache, rewrite_cache_key
+
+
+def test_cache_key_normalizes_message_and_tracks_prompts() -> None:
+    grace = TONES.get("GRACE")
+    key = rewrite_cache_key("I hate  this\n", grace, "gpt-4o-mini")
+    assert key == rewrite_cache_key(" I hate this", grace, "gpt-4o-mini")
+    assert key != rewrite_cache_key("i hate this", grace, "gpt-4o-mini")
+    assert key != rewrite_cache_key("I hate this", grace, "gpt-4o")
+    assert key != rewrite_cache_key("I hate this", TONES.get("CALM"), "gpt-4o-mini")
+    edited = Tone(key=grace.key, label=grace.label, prompt="Be nicer.", system=grace.system)
+    assert key != rewrite_cache_key("I hate this", edited, "gpt-4o-mini")
+
+
+def test_cache_evicts_least_recently_used_and_expires(monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = RewriteCache(maxsize=2, ttl=10.0)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")
+    assert cache.get("b") is None and cache.get("a") == "A"
+
+    clock = [1000.0]
+    monkeypatch.setattr("text_angel.rewrite_cache.time.monotonic", lambda: clock[0])
+    cache.set("d", "D")
+    clock[0] += 11.0
+    assert cache.get("d") is None
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.memory_entries) == (2, 2, 1)
+    assert stats.hit_rate == 0.5 and stats.disk_entries is None
+
+
+def test_disk_tier_is_shared_and_survives_restarts(tmp_path: Path) -> None:
+    path = tmp_path / "rewrites.sqlite3"
+    first = RewriteCache(path=path)
+    second = RewriteCache(path=path)
+    first.set("key", "kind words")
+    assert second.get("key") == "kind words"
+    first.close()
+    second.close()
+
+    restarted = RewriteCache(path=path)
+    assert restarted.get("key") == "kind words"
+    assert restarted.get("key") == "kind words"
+    stats = restarted.stats()
+    assert (stats.disk_hits, stats.memory_hits, stats.disk_entries) == (1, 1, 1)
+    restarted.close()
+
+
+def test_locked_disk_tier_never_blocks_the_event_loop(tmp_path: Path) -> None:
+    path = tmp_path / "rewrites.sqlite3"
+    cache = RewriteCache(path=path)
+    other_worker = sqlite3.connect(path, isolation_level=None)
+    other_worker.execute("BEGIN IMMEDIATE")  # holds the write lock
+
+    async def run() -> float:
+        ticks = []
+
+        async def ticker() -> None:
+            for _ in range(20):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(cache.aset("key", "kind words"), ticker())
+        return max(later - earlier for earlier, later in zip(ticks, ticks[1:]))
+
+    assert asyncio.run(run()) < 0.2
+    other_worker.execute("ROLLBACK")
+    other_worker.close()
+    assert asyncio.run(cache.aget("key")) == "kind words"
+    assert cache.stats().disk_errors == 1
+    restarted = RewriteCache(path=path)
+    assert restarted.get("key") is None
+    restarted.close()
+    cache.close()
@@ -0,0 +1,54 @@
+"""Tests for routing rewrites between the hosted model and the local engine."""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+
+from text_angel.rewriter import LatencyWindow  # noqa: E402
+from text_angel.router import HOSTED, LOCAL, LatencyRouter  # noqa: E402
+
+
+def fake_rewriter(
+    latencies, in_flight=0, waiting=0, max_concurrency=4, clock=None, oldest_in_flight=0.0
+):
+    window = LatencyWindow(max_age=60.0, clock=clock or (lambda: 0.0))
+    for seconds in latencies:
+        window.record(seconds)
+    return SimpleNamespace(
+        latency=window,
+        in_flight=in_flight,
+        waiting=waiting,
+        max_concurrency=max_concurrency,
+        oldest_in_flight=oldest_in_flight,
+    )
+
+
+def test_projection_grows_with_the_queue() -> None:
+    idle = LatencyRouter(fake_rewriter([1.0] * 10))
+    assert idle.projected_latency() == 1.0
+    # Four busy slots and four queued: this call waits for about a full wave.
+    busy = LatencyRouter(fake_rewriter([1.0] * 10, in_flight=4, waiting=4))
+    assert busy.projected_latency() == pytest.approx(1.0 + 5 / 4)
+    assert LatencyRouter(fake_rewriter([1.0] * 9)).projected_latency() is None
+    # A call already running longer than usual is a brownout in progress.
+    stuck = LatencyRouter(fake_rewriter([1.0] * 9, in_flight=1, oldest_in_flight=3.0))
+    assert stuck.projected_latency() == 3.0
+
+
+def test_choose_meets_the_tightest_known_deadline() -> None:
+    router = LatencyRouter(fake_rewriter([0.2] * 10 + [3.0]), deadline=5.0, quantile=0.95)
+    assert router.choose() == HOSTED
+    assert router.choose(deadline=1.0) == LOCAL
+    assert LatencyRouter(router.rewriter).choose() == HOSTED  # no deadline at all
+    stats = router.stats()
+    assert (stats.hosted, stats.local, stats.deadline) == (1, 1, 5.0)
+
+
+def test_old_samples_age_out_so_the_hosted_model_is_retried() -> None:
+    clock = [0.0]
+    router = LatencyRouter(fake_rewriter([5.0] * 10, clock=lambda: clock[0]), deadline=1.0)
+    assert router.choose() == LOCAL
+    clock[0] += 61.0
+    assert router.projected_latency() is None and router.choose() == HOSTED
@@ -2,7 +2,20 @@ from pathlib import Path
 
 import pytest
 
-from text_angel import ShieldConfig, load_shield_config, shield_text
+from text_angel import (
+    ShieldConfig,
+    ShieldConfigNotFound,
+    ShieldConfigWatcher,
+    ShieldMatcher,
+    ShieldStream,
+    ShieldingError,
+    load_shield_config,
+    shield_chunks,
+    shield_contains_any,
+    shield_first_match,
+    shield_text,
+    shield_texts,
+)
 
 
 @pytest.fixture()
@@ -24,3 +37,199 @@ def test_shield_handles_multiple_categories(shield_config: ShieldConfig) -> None
     assert result.total_matches == 2
     assert result.matches_by_category["anger"] == 1
     assert result.matches_by_category["kindness"] == 1
+
+
+def test_shield_config_compiles_once(shield_config: ShieldConfig) -> None:
+    matcher = shield_config.compile()
+    assert shield_config.compile() is matcher
+    shield_text("mean", shield_config)
+    assert shield_config.compile() is matcher
+
+
+def test_shield_text_accepts_matcher(shield_config: ShieldConfig) -> None:
+    matcher = ShieldMatcher(shield_config)
+    result = shield_text("I hate dumb things", matcher)
+    assert result.sanitized_text == "I 🛡️ 🛡️ things"
+    assert result.total_matches == 2
+
+
+def test_shield_single_pass_keeps_whole_words() -> None:
+    config = ShieldConfig(categories={"profanity": ["ass"], "insult": ["asshole"]})
+    result = shield_text("You ASSHOLE, don't assess the ass", config)
+    assert result.sanitized_text == "You 🛡️, don't assess the 🛡️"
+    assert result.matches_by_category == {"profanity": 1, "insult": 1}
+    assert [match.word for match in result.matched_words] == ["ASSHOLE", "ass"]
+
+
+def test_shield_matches_phrases_across_categories() -> None:
+    config = ShieldConfig(categories={"calm": ["shut up"], "anger": ["up", "hate"]})
+    result = shield_text("Shut up, I hate it", config)
+    assert result.sanitized_text == "🛡️, I 🛡️ it"
+    assert result.matches_by_category == {"calm": 1, "anger": 1}
+
+
+def test_shield_texts_in_process_preserves_order(shield_config: ShieldConfig) -> None:
+    texts = ["mean", "kind", "I hate it"]
+    results = list(shield_texts(texts, shield_config, workers=1))
+    assert [result.total_matches for result in results] == [1, 0, 1]
+
+
+def test_shield_texts_process_pool_matches_serial(shield_config: ShieldConfig) -> None:
+    texts = [f"message {index} is {'dumb' if index % 3 else 'fine'}" for index in range(40)]
+    parallel = list(shield_texts(iter(texts), shield_config, workers=2, chunksize=4))
+    serial = [shield_text(text, shield_config) for text in texts]
+    assert parallel == serial
+
+
+def test_shield_result_keeps_spans_and_builds_text_lazily(shield_config: ShieldConfig) -> None:
+    result = shield_text("so mean, I hate it", shield_config)
+    assert list(result.spans()) == [(3, 7, "kindness"), (11, 15, "anger")]
+    assert result._sanitized_text is None
+    assert result.sanitized_text == "so 🛡️, I 🛡️ it"
+    assert result.sanitized_text is result.sanitized_text
+    assert result.render(lambda word: "▆" * len(word)) == "so ▆▆▆▆, I ▆▆▆▆ it"
+    assert result.matched_words[1].start == 11
+
+
+def test_shield_contains_any_checks_whole_words(shield_config: ShieldConfig) -> None:
+    assert shield_contains_any("That was MEAN.", shield_config)
+    assert not shield_contains_any("Meanwhile, I hated nothing", shield_config)
+
+
+def test_shield_first_match_prefers_earliest_word() -> None:
+    config = ShieldConfig(categories={"calm": ["shut up"], "anger": ["up", "hate"]})
+    match = shield_first_match("please shut up, I hate it", config)
+    assert match is not None
+    assert (match.category, match.word, match.start, match.end) == ("calm", "shut up", 7, 14)
+    assert shield_first_match("all good here", config) is None
+
+
+def test_shield_config_watcher_swaps_on_change(tmp_path: Path) -> None:
+    config_path = tmp_path / "shield.json"
+    config_path.write_text('{"anger": ["hate"]}', encoding="utf-8")
+    watcher = ShieldConfigWatcher(config_path)
+    first = watcher.matcher
+    assert shield_text("I hate it", watcher).config_version == watcher.version
+    assert not watcher.reload()
+
+    config_path.write_text('{"anger": ["hate", "rage"]}', encoding="utf-8")
+    assert watcher.reload(force=True)
+    assert watcher.matcher is not first
+    assert shield_text("rage", watcher).total_matches == 1
+    assert first.shield("rage").total_matches == 0
+
+    config_path.write_text("not json", encoding="utf-8")
+    assert not watcher.reload(force=True)
+    assert watcher.last_error is not None
+    assert shield_text("rage", watcher).total_matches == 1
+
+
+def test_shield_chunks_catch_words_split_across_chunks(shield_config: ShieldConfig) -> None:
+    text = "you are mean and I hate dumb stuff"
+    chunks = [text[index : index + 3] for index in range(0, len(text), 3)]
+    assert "".join(shield_chunks(chunks, shield_config)) == shield_text(text, shield_config).sanitized_text
+
+
+def test_shield_stream_holds_back_only_possible_words(shield_config: ShieldConfig) -> None:
+    stream = ShieldStream(shield_config)
+    assert stream.feed("I ha") == ""
+    assert stream.feed("te it, so mea") == "I 🛡️ it, so"
+    assert stream.feed("nwhile") == " meanw"
+    assert stream.close() == "hile"
+    assert stream.matches_by_category == {"kindness": 0, "anger": 1}
+
+
+def test_shield_normalize_catches_obfuscated_words() -> None:
+    config = ShieldConfig(categories={"bullying": ["stupid", "idiot"], "anger": ["hate"]}, normalize=True)
+    result = shield_text("You st*pid iiiidiot, I h4te s.t.u.p.i.d stuff", config)
+    assert result.sanitized_text == "You 🛡️ 🛡️, I 🛡️ 🛡️ stuff"
+    assert [match.word for match in result.matched_words] == ["st*pid", "iiiidiot", "h4te", "s.t.u.p.i.d"]
+    assert not shield_contains_any("*hugs* you're kind", config)
+
+
+def test_shield_normalize_keeps_doubled_letters_distinct() -> None:
+    config = load_shield_config(
+        Path(__file__).resolve().parents[1] / "shield_filter_words.json", normalize=True
+    )
+    for text in ("As far as I know, he will be fine.", "the heel", "pass", "H.E.L.L.O"):
+        assert shield_text(text, config).sanitized_text == text
+    custom = ShieldConfig(categories={"greeting": ["hello"]}, normalize=True)
+    assert not shield_contains_any("helo", custom)
+    assert shield_text("hellllo", custom).sanitized_text == "🛡️"
+
+
+def test_shield_fuzzy_categories_from_json(tmp_path: Path) -> None:
+    config_path = tmp_path / "shield.json"
+    config_path.write_text(
+        '{"bullying": {"words": ["stupid", "idiot"], "max_distance": 1}, "anger": ["hate"]}',
+        encoding="utf-8",
+    )
+    config = load_shield_config(config_path)
+    assert config.max_distances == {"bullying": 1}
+    result = shield_text("so stupidd, you idoit, I hate it", config)
+    assert [match.word for match in result.matched_words] == ["stupidd", "idoit", "hate"]
+    assert not shield_contains_any("I have a stupendous idea", config)
+    assert not shield_contains_any("I hatt it", config)
+
+
+def test_shield_fuzzy_rejects_bad_distance(tmp_path: Path) -> None:
+    config_path = tmp_path / "shield.json"
+    config_path.write_text('{"bullying": {"words": ["stupid"], "max_distance": "1"}}', encoding="utf-8")
+    with pytest.raises(ShieldingError):
+        load_shield_config(config_path)
+
+
+def test_shield_tiers_follow_sensitivity(tmp_path: Path) -> None:
+    config_path = tmp_path / "shield.json"
+    config_path.write_text(
+        '{"mild": {"words": ["dumb", {"word": "jerk", "severity": 6}], "severity": 3},'
+        ' "severe": ["hate"]}',
+        encoding="utf-8",
+    )
+    config = load_shield_config(config_path)
+    tiers = config.tiers()
+    text = "dumb jerk, I hate it"
+    assert tiers.shield(text, 0).total_matches == 0
+    assert tiers.shield(text, 1).total_matches == 1
+    assert tiers.shield(text, 5).total_matches == 2
+    assert tiers.shield(text, 10).total_matches == 3
+    assert tiers.matcher(1) is tiers.matcher(4)
+    assert tiers.matcher(42) is tiers.matcher(10)
+    assert tiers.shield(text, 1).matches_by_category == {"mild": 0, "severe": 1}
+    tier = config.at_sensitivity(5)
+    assert tier.severity("mild", "jerk") == 6
+    assert tier.severity("mild", "dumb") == 3
+    assert tier.at_sensitivity(5).categories == tier.categories
+
+
+def test_shield_word_severity_is_per_category(tmp_path: Path) -> None:
+    config_path = tmp_path / "shield.json"
+    config_path.write_text(
+        '{"teasing": [{"word": "loser", "severity": 2}],'
+        ' "bullying": [{"word": "loser", "severity": 9}]}',
+        encoding="utf-8",
+    )
+    config = load_shield_config(config_path)
+    assert config.severity("teasing", "loser") == 2
+    assert config.severity("bullying", "loser") == 9
+    result = config.tiers().shield("what a loser", 3)
+    assert result.matches_by_category == {"teasing": 0, "bullying": 1}
+
+
+def test_shield_loads_flat_word_list() -> None:
+    path = Path(__file__).resolve().parents[1] / "shield_filter" / "shield_filter_words.json"
+    config = load_shield_config(path)
+    assert list(config.categories) == ["blocked"]
+    assert "hell" in config.categories["blocked"]
+    assert shield_contains_any("what the hell", config)
+    assert not shield_contains_any("hello there", config)
+
+
+def test_shield_missing_file_is_distinguished_from_bad_file(tmp_path: Path) -> None:
+    with pytest.raises(ShieldConfigNotFound):
+        ShieldConfigWatcher(tmp_path / "missing.json")
+    bad_path = tmp_path / "bad.json"
+    bad_path.write_text("{not json", encoding="utf-8")
+    with pytest.raises(ShieldingError) as excinfo:
+        ShieldConfigWatcher(bad_path)
+    assert not isinstance(excinfo.value, FileNotFoundError)
@@ -0,0 +1,63 @@
+"""Tests for coalescing identical concurrent calls."""
+
+import asyncio
+
+import pytest
+
+from text_angel.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call() -> None:
+    flights = SingleFlight()
+    calls = []
+
+    async def call() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "kind"
+
+    async def run() -> list:
+        results = await asyncio.gather(*(flights.do("key", call) for _ in range(5)))
+        # Once the shared call is done the next caller starts a new one.
+        results.append(await flights.do("key", call))
+        return results
+
+    assert asyncio.run(run()) == ["kind"] * 6
+    assert len(calls) == 2
+    assert (flights.started, flights.coalesced, flights.in_flight) == (2, 4, 0)
+
+
+def test_errors_reach_every_caller() -> None:
+    flights = SingleFlight()
+
+    async def call() -> str:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run() -> list:
+        return await asyncio.gather(
+            *(flights.do("key", call) for _ in range(3)), return_exceptions=True
+        )
+
+    errors = asyncio.run(run())
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert errors[0] is errors[1] is errors[2]
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call() -> None:
+    flights = SingleFlight()
+
+    async def call() -> str:
+        await asyncio.sleep(0.02)
+        return "kind"
+
+    async def run() -> str:
+        first = asyncio.create_task(flights.do("key", call))
+        second = asyncio.create_task(flights.do("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "kind"
@@ -1,6 +1,19 @@
 """Tests for tone rewriting helpers."""
 
-from text_angel import AVAILABLE_TONES, rewrite_text
+import json
+from pathlib import Path
+
+import pytest
+
+from text_angel import (
+    AVAILABLE_TONES,
+    TONES,
+    ToneProfile,
+    ToneRegistry,
+    rewrite_all_tones,
+    rewrite_many,
+    rewrite_text,
+)
 
 
 def test_rewrite_returns_text_with_prefix() -> None:
@@ -13,3 +26,72 @@ def test_rewrite_softens_language() -> None:
     tone = next(t for t in AVAILABLE_TONES if t.name == "Gentle & Kind")
     result = rewrite_text("I hate this", tone)
     assert "really dislike" in result.rewritten_text
+
+
+def test_professional_rewrite_applies_every_replacement_in_one_pass() -> None:
+    tone = next(t for t in AVAILABLE_TONES if t.name == "Professional")
+    result = rewrite_text("  hey,   I HATE it and you can't stop.  thanks ", tone)
+    assert result.rewritten_text == (
+        "For clarity, Hello, I really dislike it and you may not be able to stop. "
+        "thank you. I appreciate your attention to this matter."
+    )
+
+
+def test_rewrite_all_tones_matches_each_tone_rewritten_alone() -> None:
+    text = "hey, I hate it. thanks"
+    results = rewrite_all_tones(text)
+    assert [result.tone for result in results] == AVAILABLE_TONES
+    assert [result.rewritten_text for result in results] == [
+        rewrite_text(text, tone).rewritten_text for tone in AVAILABLE_TONES
+    ]
+    assert rewrite_all_tones(text) == results
+
+
+def test_rewrite_many_accepts_custom_tones() -> None:
+    shout = ToneProfile(name="Shout", description="Upper-cases.", transform=str.upper)
+    rows = rewrite_many(["i hate this", "hi"], [AVAILABLE_TONES[0], shout])
+    assert [[result.rewritten_text for result in row] for row in rows] == [
+        ["I want to share this gently: I really dislike this.", "I HATE THIS"],
+        ["I want to share this gently: Hi.", "HI"],
+    ]
+
+
+def test_available_tones_come_from_the_tone_file() -> None:
+    assert [tone.name for tone in AVAILABLE_TONES] == [
+        "Gentle & Kind",
+        "Professional",
+        "Empathetic",
+        "Calm & Direct",
+    ]
+    assert TONES.names(hosted=True) == ["GRACE", "TRUTH", "CALM"]
+    assert TONES.get("grace").profile is AVAILABLE_TONES[0]
+
+
+def test_tone_registry_builds_tones_lazily(tmp_path: Path) -> None:
+    path = tmp_path / "tones.json"
+    registry = ToneRegistry(path)  # nothing is read yet
+    path.write_text(
+        json.dumps(
+            {
+                "GRACE": "You are gentle.",
+                "BRIEF": {
+                    "local": {"stage": "tidy", "suffix": " (brief)"},
+                    "style": {"emoji": "✂️"},
+                },
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    grace = registry.get("Grace")
+    assert grace.profile is None
+    assert grace.messages("hi") == [
+        {"role": "system", "content": "You are gentle."},
+        {"role": "user", "content": "hi"},
+    ]
+    assert registry.get("GRACE") is grace
+    assert registry.names(hosted=True) == ["GRACE"]
+    brief = registry.get("brief").profile
+    assert rewrite_text("  ok  then", brief).rewritten_text == "Ok then. (brief)"
+    with pytest.raises(ValueError, match="Choose from GRACE, BRIEF"):
+        registry.get("CALM")
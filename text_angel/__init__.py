@@ -2,23 +2,64 @@
 
 from .shield import (
     ShieldConfig,
+    ShieldConfigNotFound,
+    ShieldConfigWatcher,
     ShieldMatch,
+    ShieldMatcher,
     ShieldResult,
+    ShieldStream,
+    ShieldTiers,
     ShieldingError,
     load_shield_config,
+    shield_chunks,
+    shield_contains_any,
+    shield_first_match,
     shield_text,
+    shield_texts,
+)
+from .registry import RegistryStats, ShieldRegistry
+from .tone import (
+    TONES,
+    RewriteResult,
+    Tone,
+    ToneProfile,
+    ToneRegistry,
+    rewrite_all_tones,
+    rewrite_many,
+    rewrite_text,
 )
-from .tone import AVAILABLE_TONES, RewriteResult, ToneProfile, rewrite_text
 
 __all__ = [
     "ShieldConfig",
+    "ShieldConfigNotFound",
+    "ShieldConfigWatcher",
     "ShieldMatch",
+    "ShieldMatcher",
     "ShieldResult",
+    "ShieldStream",
+    "ShieldTiers",
     "ShieldingError",
     "load_shield_config",
+    "shield_chunks",
+    "shield_contains_any",
+    "shield_first_match",
     "shield_text",
+    "shield_texts",
+    "RegistryStats",
+    "ShieldRegistry",
     "AVAILABLE_TONES",
     "RewriteResult",
+    "TONES",
+    "Tone",
     "ToneProfile",
+    "ToneRegistry",
+    "rewrite_all_tones",
+    "rewrite_many",
     "rewrite_text",
 ]
+
+
+def __getattr__(name: str) -> object:
+    if name == "AVAILABLE_TONES":
+        return TONES.profiles()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,50 +2,64 @@
 
 from __future__ import annotations
 import os
+from typing import Iterator
+
 import openai
 
+from .shield import ShieldConfig
+from .tone import TONES
+
 # Configure the OpenAI client using the environment variable
 api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise RuntimeError("OPENAI_API_KEY environment variable not set.")
 client = openai.OpenAI(api_key=api_key)
 
-# Tone instructions
-TONE_PROMPTS = {
-    "GRACE": "Rewrite the following message with kindness, care, and gentleness.",
-    "TRUTH": "Rewrite the following message to be honest, clear, and respectful.",
-    "CALM": "Rewrite the following message in a peaceful and soft tone, with no harshness.",
-}
-
 # ---------------------------------------------------------------------
 # Main Rewrite Function
 # ---------------------------------------------------------------------
 def handle_rewrite_input(message: str, tone: str = "GRACE") -> str:
     """Rewrites the input message using the chosen tone."""
-    if tone not in TONE_PROMPTS:
-        raise ValueError("Invalid tone. Choose from GRACE, TRUTH, or CALM.")
-
-    prompt = f"{TONE_PROMPTS[tone]} Message: {message}"
+    tones = TONES.names(hosted=True)
+    if tone not in tones:
+        raise ValueError(f"Invalid tone. Choose from {', '.join(tones)}.")
 
     response = client.chat.completions.create(
         model="gpt-4",
-        messages=[
-            {"role": "system", "content": "You are a kind and emotionally intelligent assistant."},
-            {"role": "user", "content": prompt},
-        ],
+        messages=TONES.get(tone).messages(message),
         temperature=0.7,
         max_tokens=150,
     )
 
     return response.choices[0].message.content.strip()
 
+def stream_rewrite_input(message: str, tone: str = "GRACE") -> Iterator[str]:
+    """Like :func:`handle_rewrite_input`, but yields the rewrite as it is written."""
+    tones = TONES.names(hosted=True)
+    if tone not in tones:
+        raise ValueError(f"Invalid tone. Choose from {', '.join(tones)}.")
+
+    stream = client.chat.completions.create(
+        model="gpt-4",
+        messages=TONES.get(tone).messages(message),
+        temperature=0.7,
+        max_tokens=150,
+        stream=True,
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
 # ---------------------------------------------------------------------
 # Shield Filter Function
 # ---------------------------------------------------------------------
+BLOCKED_MATCHER = ShieldConfig(
+    categories={"blocked": ["hate", "stupid", "kill", "dumb", "ugly"]}
+).compile()
+
 def shield_input_text(message: str) -> str:
     """Simple text shield – blocks harmful or aggressive phrases before rewrite."""
-    blocked_terms = ["hate", "stupid", "kill", "dumb", "ugly"]
-    if any(term in message.lower() for term in blocked_terms):
+    if BLOCKED_MATCHER.contains_any(message):
         return "⚠️ Message contained harmful words. Please rephrase kindly."
     return message
 
@@ -56,7 +70,7 @@ def main() -> None:
     """Run interactively from terminal."""
     print("🕊️ TEXT ANGEL – Angel Edit Engine\n")
     msg = input("Type your message: ")
-    tone = input("Choose a tone (GRACE, TRUTH, CALM): ").strip().upper()
+    tone = input(f"Choose a tone ({', '.join(TONES.names(hosted=True))}): ").strip().upper()
 
     safe_text = shield_input_text(msg)
     if safe_text.startswith("⚠️"):
@@ -0,0 +1,204 @@
+"""Shielding whole pandas or Arrow string columns for offline reports.
+
+Calling :func:`text_angel.shield_text` row by row spends almost all of its
+time on rows that contain nothing to shield. :func:`shield_column` first
+runs one vectorized Arrow regex kernel over the whole column to find the rows
+that could hold a shielded word, then shields each distinct flagged text once
+and scatters the counts (and, optionally, sanitized text) back into columns.
+
+The prefilter is a case-insensitive whole-word test that errs on the side of
+flagging, so it may flag a row the shield then clears but never skips a row
+the shield would catch. Normalizing and typo-tolerant configurations cannot be
+prefiltered this way; for those every row goes through the shield, which
+still benefits from the per-distinct-text deduplication.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .shield import ShieldMatcher, ShieldSource, _as_matcher, _fold, _is_word_char
+
+Column = Union[pd.Series, pa.Array, pa.ChunkedArray]
+
+_PATTERN_WORDS = 2000
+"""Words per prefilter regex; RE2 refuses to compile huge alternations."""
+
+# Boundary context classes for the lower-cased column. ASCII characters are
+# classified exactly; any non-ASCII character may count as either side, since
+# RE2 and Python disagree on some Unicode letters and the prefilter must never
+# reject a row the shield would catch.
+_NOT_WORD = "[^0-9a-z_]"
+_MAYBE_WORD = "(?:[0-9a-z_]|[^\\x00-\\x7f])"
+
+_SIGMA = "[σς]"
+
+
+@dataclass(frozen=True, slots=True)
+class ColumnShieldResult:
+    """Per-row shield counts for a column, in the column's own type.
+
+    For a :class:`pandas.Series` every field is a Series sharing its index;
+    for Arrow input every field is a :class:`pyarrow.Array`. ``sanitized`` is
+    only filled in when :func:`shield_column` is asked for it.
+    """
+
+    counts: Any
+    category_counts: Dict[str, Any]
+    sanitized: Optional[Any] = None
+
+    @property
+    def category_totals(self) -> Dict[str, int]:
+        """Total shielded words per category across the whole column."""
+
+        return {
+            category: int(pc.sum(column).as_py() or 0)
+            if isinstance(column, (pa.Array, pa.ChunkedArray))
+            else int(column.sum())
+            for category, column in self.category_counts.items()
+        }
+
+
+def _escape(word: str) -> str:
+    """Escape ``word`` as an RE2 literal."""
+
+    pieces = []
+    for char in word:
+        if char in "σς":
+            # Python lower-cases a final capital sigma to ``ς``; Arrow never does.
+            pieces.append(_SIGMA)
+        elif char.isascii() and not char.isalnum():
+            pieces.append("\\" + char)
+        else:
+            pieces.append(char)
+    return "".join(pieces)
+
+
+def _prefilter_patterns(matcher: ShieldMatcher) -> List[str]:
+    """Build RE2 patterns that together match every row the shield could catch.
+
+    A word matches on whole-word boundaries, so its neighbours must be
+    non-word characters when its first or last character is a word
+    character, and word characters otherwise.
+    """
+
+    words = {
+        _fold(word.strip())
+        for words in matcher.config.categories.values()
+        for word in words
+        if word.strip()
+    }
+    # Lower-case the words with the same kernel as the column so both sides
+    # agree on characters that Python and Arrow case-fold differently.
+    lowered = pc.utf8_lower(pa.array(sorted(words), pa.large_string())).to_pylist()
+    groups: Dict[Tuple[bool, bool], List[str]] = {}
+    for word in sorted(set(lowered)):
+        key = (_is_word_char(word[0]), _is_word_char(word[-1]))
+        groups.setdefault(key, []).append(_escape(word))
+
+    patterns = []
+    for (word_start, word_end), escaped in groups.items():
+        before = f"(?:^|{_NOT_WORD})" if word_start else _MAYBE_WORD
+        after = f"(?:$|{_NOT_WORD})" if word_end else _MAYBE_WORD
+        for index in range(0, len(escaped), _PATTERN_WORDS):
+            alternation = "|".join(escaped[index : index + _PATTERN_WORDS])
+            patterns.append(f"{before}(?:{alternation}){after}")
+    return patterns
+
+
+def _candidate_mask(values: pa.Array, matcher: ShieldMatcher) -> pa.Array:
+    """Return a null-free mask of the rows that may contain a shielded word."""
+
+    if not matcher._exact_only:
+        return pc.is_valid(values)
+    lowered = pc.utf8_lower(values)
+    mask = pa.array(np.zeros(len(values), dtype=bool))
+    for pattern in _prefilter_patterns(matcher):
+        mask = pc.or_(mask, pc.fill_null(pc.match_substring_regex(lowered, pattern), False))
+    return mask
+
+
+def _as_arrow(column: Union[Column, Iterable[Optional[str]]]) -> pa.Array:
+    if isinstance(column, pd.Series):
+        column = pa.array(column, type=pa.large_string(), from_pandas=True)
+    elif not isinstance(column, (pa.Array, pa.ChunkedArray)):
+        column = pa.array(column, type=pa.large_string())
+    column = column.cast(pa.large_string())
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    return column
+
+
+def shield_column(
+    column: Union[Column, Iterable[Optional[str]]],
+    config: ShieldSource,
+    sanitize: bool = False,
+) -> ColumnShieldResult:
+    """Shield every row of a pandas Series or Arrow string column.
+
+    Counts match what :func:`text_angel.shield_text` reports row by row; null
+    rows count as zero and stay null in ``sanitized``. Any other iterable of
+    strings is treated as Arrow input.
+    """
+
+    matcher = _as_matcher(config)
+    values = _as_arrow(column)
+    rows = len(values)
+
+    mask = _candidate_mask(values, matcher)
+    flagged_rows = pc.indices_nonzero(mask).to_numpy()
+    encoded = pc.take(values, flagged_rows).dictionary_encode()
+    codes = encoded.indices.to_numpy(zero_copy_only=False)
+    results = [matcher.shield(text) for text in encoded.dictionary.to_pylist()]
+
+    totals = np.fromiter((result.total_matches for result in results), np.int64, len(results))
+    found = np.fromiter(
+        (category_id for result in results for category_id in result.category_ids),
+        np.int64,
+        int(totals.sum()),
+    )
+    per_text = np.zeros((len(results), len(matcher._categories)), dtype=np.int64)
+    np.add.at(per_text, (np.repeat(np.arange(len(results)), totals), found), 1)
+
+    counts = np.zeros(rows, dtype=np.int64)
+    counts[flagged_rows] = totals[codes]
+    category_counts: Dict[str, np.ndarray] = {}
+    for category_id, category in enumerate(matcher._categories):
+        per_row = np.zeros(rows, dtype=np.int64)
+        per_row[flagged_rows] = per_text[codes, category_id]
+        category_counts[category] = per_row
+
+    sanitized = None
+    if sanitize:
+        replacements = pa.array(
+            [result.sanitized_text for result in results], pa.large_string()
+        ).take(encoded.indices)
+        sanitized = pc.replace_with_mask(values, mask, replacements)
+
+    if isinstance(column, pd.Series):
+        index = column.index
+        return ColumnShieldResult(
+            counts=pd.Series(counts, index=index, name=column.name),
+            category_counts={
+                category: pd.Series(per_row, index=index, name=category)
+                for category, per_row in category_counts.items()
+            },
+            sanitized=None
+            if sanitized is None
+            else pd.Series(
+                sanitized.to_numpy(zero_copy_only=False), index=index, name=column.name
+            ),
+        )
+    return ColumnShieldResult(
+        counts=pa.array(counts),
+        category_counts={
+            category: pa.array(per_row) for category, per_row in category_counts.items()
+        },
+        sanitized=sanitized,
+    )
@@ -0,0 +1,366 @@
+"""Binary, memory-mappable form of a compiled shield dictionary.
+
+Parsing a large shield JSON file and building its automaton takes a while and
+every worker process would otherwise hold its own copy. :func:`write_compiled_shield`
+stores the automaton tables and category word lists in one versioned file;
+:func:`load_compiled_shield` maps that file read-only, so all workers on a host
+share a single page-cache copy and start without compiling anything.
+
+Build an artifact from the command line with::
+
+    python -m text_angel.compiled shield_filter_words.json shield.tashield
+
+Layout (all integers little-endian)::
+
+    magic b"TASHIELD" | format u32 | metadata length u32 | metadata JSON
+    padding to 4 bytes | uint32 tables | word blob
+
+The metadata records the category names, replacement, configuration version,
+table sizes and where each category's newline-separated words sit in the
+blob. Typo-tolerant categories cannot be stored; their deletion index is built
+per process.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .normalize import WILDCARD
+from .shield import (
+    ShieldConfig,
+    ShieldMatcher,
+    ShieldingError,
+    _Automaton,
+    _NORMALIZED_TOKEN,
+    _fold,
+    _is_boundary,
+    _resolve_spans,
+    load_shield_config,
+)
+
+MAGIC = b"TASHIELD"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sII")
+_TABLES = (
+    "state_offsets",
+    "edge_chars",
+    "edge_targets",
+    "fail",
+    "dict_link",
+    "output_length",
+    "output_category",
+)
+_NO_LINK = 0xFFFFFFFF
+
+
+def _flatten(automaton: _Automaton) -> Dict[str, array]:
+    """Lay the automaton's tables out as flat ``uint32`` arrays.
+
+    Transitions use a compressed sparse row layout: the edges of state ``s``
+    are ``edge_chars[state_offsets[s]:state_offsets[s + 1]]``, sorted by code
+    point so they can be binary searched.
+    """
+
+    tables = {name: array("I") for name in _TABLES}
+    for state, edges in enumerate(automaton._goto):
+        tables["state_offsets"].append(len(tables["edge_chars"]))
+        for char in sorted(edges):
+            tables["edge_chars"].append(ord(char))
+            tables["edge_targets"].append(edges[char])
+        output = automaton._output[state]
+        tables["output_length"].append(output[0] if output is not None else 0)
+        tables["output_category"].append(output[1] if output is not None else 0)
+        link = automaton._dict_link[state]
+        tables["dict_link"].append(link if link >= 0 else _NO_LINK)
+    tables["state_offsets"].append(len(tables["edge_chars"]))
+    tables["fail"].extend(automaton._fail)
+    return tables
+
+
+def write_compiled_shield(config: ShieldConfig, path: Path) -> None:
+    """Compile ``config`` and write it to ``path`` as a binary artifact."""
+
+    if config.max_distances:
+        raise ShieldingError("Typo-tolerant shield configurations cannot be compiled to a file.")
+    automaton = config.compile()._automaton
+    tables = _flatten(automaton)
+
+    blob = bytearray()
+    categories = []
+    for name, words in config.categories.items():
+        encoded = "\n".join(word.strip() for word in words if word.strip()).encode("utf-8")
+        categories.append([name, len(blob), len(encoded)])
+        blob += encoded
+
+    metadata = {
+        "categories": categories,
+        "replacement": config.replacement,
+        "version": config.version,
+        "normalize": config.normalize,
+        "severities": dict(config.severities),
+        # JSON objects only take string keys, so word severities are stored
+        # as ``[[category, word], severity]`` pairs.
+        "word_severities": [
+            [[category, word], severity]
+            for (category, word), severity in config.word_severities.items()
+        ],
+        "max_length": automaton.max_length,
+        "tables": {name: len(table) for name, table in tables.items()},
+    }
+    encoded_metadata = json.dumps(metadata, ensure_ascii=False).encode("utf-8")
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded_metadata)) + encoded_metadata
+    header += b"\0" * (-len(header) % 4)
+
+    with open(path, "wb") as handle:
+        handle.write(header)
+        for name in _TABLES:
+            table = tables[name]
+            if sys.byteorder != "little":
+                table = array("I", table)
+                table.byteswap()
+            handle.write(table.tobytes())
+        handle.write(blob)
+
+
+class _ArtifactCategories(Mapping[str, List[str]]):
+    """Category word lists decoded from the artifact only when asked for."""
+
+    def __init__(
+        self, path: Path, blob: memoryview, spans: Sequence[Tuple[str, int, int]]
+    ) -> None:
+        self.path = path
+        self._blob = blob
+        self._spans = {name: (offset, length) for name, offset, length in spans}
+
+    def __reduce__(self):  # type: ignore[no-untyped-def]
+        return _reopen_categories, (str(self.path),)
+
+    def __getitem__(self, category: str) -> List[str]:
+        offset, length = self._spans[category]
+        if not length:
+            return []
+        return bytes(self._blob[offset : offset + length]).decode("utf-8").split("\n")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._spans)
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+
+class _MappedAutomaton:
+    """Read-only automaton whose tables live in a memory-mapped artifact.
+
+    It offers the same scanning methods as the in-memory automaton; transitions
+    are found by binary search over each state's sorted edges instead of a
+    dict lookup.
+    """
+
+    def __init__(self, path: Path, tables: Dict[str, Sequence[int]], max_length: int) -> None:
+        self.path = path
+        self.max_length = max_length
+        self._offsets = tables["state_offsets"]
+        self._chars = tables["edge_chars"]
+        self._targets = tables["edge_targets"]
+        self._fail = tables["fail"]
+        self._dict_link = tables["dict_link"]
+        self._lengths = tables["output_length"]
+        self._output_categories = tables["output_category"]
+        # Most steps start from the root, whose edges are few and hot, so they
+        # are kept in a small per-process dict.
+        self._root = {
+            self._chars[index]: self._targets[index]
+            for index in range(self._offsets[0], self._offsets[1])
+        }
+
+    def __reduce__(self):  # type: ignore[no-untyped-def]
+        # Worker processes reopen the mapping rather than copying the tables.
+        return _reopen_automaton, (str(self.path),)
+
+    def _child(self, state: int, code: int) -> Optional[int]:
+        low = self._offsets[state]
+        high = self._offsets[state + 1]
+        index = bisect_left(self._chars, code, low, high)
+        if index < high and self._chars[index] == code:
+            return self._targets[index]
+        return None
+
+    def _step(self, state: int, code: int) -> int:
+        while state:
+            child = self._child(state, code)
+            if child is not None:
+                return child
+            state = self._fail[state]
+        return self._root.get(code, 0)
+
+    def _hits(self, state: int) -> Iterator[Tuple[int, int]]:
+        terminal = state if self._lengths[state] else self._dict_link[state]
+        while terminal != _NO_LINK:
+            yield self._lengths[terminal], self._output_categories[terminal]
+            terminal = self._dict_link[terminal]
+
+    def candidates(
+        self,
+        text: str,
+        min_start: int = 0,
+        boundary: Callable[[str, int], bool] = _is_boundary,
+    ) -> List[Tuple[int, int, int]]:
+        candidates: List[Tuple[int, int, int]] = []
+        state = 0
+        lengths = self._lengths
+        dict_link = self._dict_link
+        for index, char in enumerate(_fold(text)):
+            state = self._step(state, ord(char))
+            if not lengths[state] and dict_link[state] == _NO_LINK:
+                continue
+            for length, category_id in self._hits(state):
+                end = index + 1
+                start = end - length
+                if start >= min_start and boundary(text, start) and boundary(text, end):
+                    candidates.append((start, end, category_id))
+        return candidates
+
+    def first(self, text: str) -> Optional[Tuple[int, int, int]]:
+        state = 0
+        for index, char in enumerate(_fold(text)):
+            state = self._step(state, ord(char))
+            for length, category_id in self._hits(state):
+                end = index + 1
+                start = end - length
+                if _is_boundary(text, start) and _is_boundary(text, end):
+                    return start, end, category_id
+        return None
+
+    def wildcard_candidates(self, text: str) -> List[Tuple[int, int, int]]:
+        candidates: List[Tuple[int, int, int]] = []
+        for token in _NORMALIZED_TOKEN.finditer(text):
+            word = token.group()
+            if WILDCARD not in word:
+                continue
+            states = [0]
+            for char in word:
+                if char == WILDCARD:
+                    states = [
+                        self._targets[index]
+                        for state in states
+                        for index in range(self._offsets[state], self._offsets[state + 1])
+                        if chr(self._chars[index]).isalpha()
+                    ]
+                else:
+                    code = ord(char)
+                    states = [
+                        child
+                        for child in (self._child(state, code) for state in states)
+                        if child is not None
+                    ]
+                if not states:
+                    break
+            for state in states:
+                if self._lengths[state]:
+                    candidates.append((token.start(), token.end(), self._output_categories[state]))
+                    break
+        return candidates
+
+    def scan(self, text: str, min_start: int = 0) -> Tuple[array, array, array]:
+        return _resolve_spans(self.candidates(text, min_start))
+
+
+def _map_artifact(path: Path) -> Tuple[dict, Dict[str, Sequence[int]], memoryview]:
+    with open(path, "rb") as handle:
+        try:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as exc:
+            raise ShieldingError(f"Compiled shield artifact is empty: {path}") from exc
+    view = memoryview(mapped)
+    if len(view) < _HEADER.size:
+        raise ShieldingError(f"Not a compiled shield artifact: {path}")
+    magic, format_version, metadata_length = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ShieldingError(f"Not a compiled shield artifact: {path}")
+    if format_version != FORMAT_VERSION:
+        raise ShieldingError(
+            f"Compiled shield artifact {path} uses format {format_version}; "
+            f"this version of Text Angel reads format {FORMAT_VERSION}."
+        )
+    offset = _HEADER.size
+    metadata = json.loads(bytes(view[offset : offset + metadata_length]).decode("utf-8"))
+    offset += metadata_length
+    offset += -offset % 4
+
+    tables: Dict[str, Sequence[int]] = {}
+    for name in _TABLES:
+        size = metadata["tables"][name] * 4
+        chunk = view[offset : offset + size]
+        if sys.byteorder == "little":
+            tables[name] = chunk.cast("I")
+        else:
+            table = array("I", bytes(chunk))
+            table.byteswap()
+            tables[name] = table
+        offset += size
+    return metadata, tables, view[offset:]
+
+
+def _reopen_categories(path: str) -> _ArtifactCategories:
+    metadata, _, blob = _map_artifact(Path(path))
+    return _ArtifactCategories(Path(path), blob, metadata["categories"])
+
+
+def _reopen_automaton(path: str) -> _MappedAutomaton:
+    metadata, tables, _ = _map_artifact(Path(path))
+    return _MappedAutomaton(Path(path), tables, metadata["max_length"])
+
+
+def load_compiled_shield(path: Path) -> ShieldMatcher:
+    """Map a compiled shield artifact and return a ready-to-use matcher.
+
+    Nothing is compiled: the automaton is read straight out of the shared
+    mapping and category word lists are only decoded if something reads
+    ``matcher.config.categories[...]``.
+    """
+
+    path = Path(path)
+    try:
+        metadata, tables, blob = _map_artifact(path)
+    except FileNotFoundError as exc:
+        raise ShieldingError(f"Compiled shield artifact not found: {path}") from exc
+    config = ShieldConfig(
+        categories=_ArtifactCategories(path, blob, metadata["categories"]),
+        replacement=metadata["replacement"],
+        version=metadata["version"],
+        normalize=metadata["normalize"],
+        severities=metadata.get("severities", {}),
+        word_severities={
+            (category, word): severity
+            for (category, word), severity in metadata.get("word_severities", [])
+        },
+    )
+    matcher = ShieldMatcher._prebuilt(
+        config, _MappedAutomaton(path, tables, metadata["max_length"])  # type: ignore[arg-type]
+    )
+    object.__setattr__(config, "_matcher", matcher)
+    return matcher
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compile a shield JSON file to a binary artifact.")
+    parser.add_argument("source", type=Path, help="shield configuration JSON file")
+    parser.add_argument("output", type=Path, help="where to write the compiled artifact")
+    parser.add_argument(
+        "--normalize", action="store_true", help="fold obfuscated spellings before matching"
+    )
+    args = parser.parse_args(argv)
+    write_compiled_shield(load_shield_config(args.source, normalize=args.normalize), args.output)
+
+
+if __name__ == "__main__":
+    main()
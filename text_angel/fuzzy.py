@@ -0,0 +1,132 @@
+"""Typo-tolerant word lookup for the Text Angel shield filter.
+
+Misspellings such as ``stupidd`` or ``idoit`` slip past exact matching. The
+:class:`DeletionIndex` finds dictionary words within a small edit distance of
+a message token using symmetric deletes (as popularised by SymSpell): every
+word is stored under each string obtainable by deleting up to ``d`` of its
+characters, and a token is looked up the same way. A lookup therefore costs a
+handful of dictionary probes per token, independent of how many words the
+shield holds.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+MIN_LENGTH_PER_EDIT = 5
+"""Words shorter than ``MIN_LENGTH_PER_EDIT + 2 * (d - 1)`` are not matched
+fuzzily at distance ``d``; short words sit one typo away from too many
+harmless ones (``hate`` and ``have``, ``hell`` and ``help``)."""
+
+
+def min_fuzzy_length(max_distance: int) -> int:
+    return MIN_LENGTH_PER_EDIT + 2 * (max_distance - 1)
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    """Return the optimal string alignment distance, capped at ``limit + 1``.
+
+    Insertions, deletions, substitutions and swaps of adjacent characters all
+    cost one edit, so ``idoit`` is a single edit from ``idiot``.
+    """
+
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    previous_previous: List[int] = []
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, start=1):
+        current = [row] + [0] * len(second)
+        best = row
+        for column, second_char in enumerate(second, start=1):
+            cost = 0 if first_char == second_char else 1
+            value = min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + cost,
+            )
+            if (
+                row > 1
+                and column > 1
+                and first_char == second[column - 2]
+                and first[row - 2] == second_char
+            ):
+                value = min(value, previous_previous[column - 2] + 1)
+            current[column] = value
+            best = min(best, value)
+        if best > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def _deletes(word: str, depth: int) -> Set[str]:
+    """Return ``word`` and every string left after deleting up to ``depth`` characters."""
+
+    variants = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {
+            variant[:index] + variant[index + 1 :]
+            for variant in frontier
+            for index in range(len(variant))
+        }
+        variants |= frontier
+    return variants
+
+
+class DeletionIndex:
+    """Symmetric-delete index over ``(word, category_id, max_distance)`` entries."""
+
+    __slots__ = ("_index", "_cache", "max_distance", "min_length", "max_length")
+
+    CACHE_SIZE = 65536
+    """Tokens whose lookup result is remembered; ordinary chat reuses the same
+    few thousand words, so most lookups are answered from the cache."""
+
+    def __init__(self, entries: Iterable[Tuple[str, int, int]]) -> None:
+        index: Dict[str, List[Tuple[str, int, int]]] = {}
+        max_distance = 0
+        lengths: List[int] = []
+        for word, category_id, distance in entries:
+            if distance <= 0 or len(word) < min_fuzzy_length(distance):
+                continue
+            max_distance = max(max_distance, distance)
+            lengths.append(len(word))
+            for variant in _deletes(word, distance):
+                index.setdefault(variant, []).append((word, category_id, distance))
+        self._index = index
+        self._cache: Dict[str, Optional[int]] = {}
+        self.max_distance = max_distance
+        self.min_length = min(lengths, default=0) - max_distance
+        self.max_length = max(lengths, default=0) + max_distance
+
+    def __bool__(self) -> bool:
+        return bool(self._index)
+
+    def lookup(self, token: str) -> Optional[int]:
+        """Return the category id of the closest word to ``token``, if any.
+
+        Ties between equally close words go to the earliest category.
+        """
+
+        if not self.min_length <= len(token) <= self.max_length:
+            return None
+        cache = self._cache
+        if token in cache:
+            return cache[token]
+        index = self._index
+        best: Optional[Tuple[int, int]] = None
+        seen: Set[Tuple[str, int]] = set()
+        for variant in _deletes(token, self.max_distance):
+            for word, category_id, distance in index.get(variant, ()):
+                if (word, category_id) in seen:
+                    continue
+                seen.add((word, category_id))
+                found = edit_distance(token, word, distance)
+                if found <= distance and (best is None or (found, category_id) < best):
+                    best = (found, category_id)
+        result = None if best is None else best[1]
+        if len(cache) >= self.CACHE_SIZE:
+            cache.clear()
+        cache[token] = result
+        return result
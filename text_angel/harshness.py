@@ -0,0 +1,201 @@
+"""Local harshness scoring for Text Angel messages.
+
+Most messages sent for rewriting are already kind, and calling the hosted
+model for them costs latency and money. :class:`HarshnessModel` is a small
+logistic regression over hashed word, word-pair and character n-grams that
+scores a message from 0 (kind) to 1 (harsh) in microseconds, so callers can
+skip the hosted rewrite when the score is below the model's threshold.
+
+Train a model from a JSON Lines file of ``{"text": "...", "label": 0 or 1}``
+records with::
+
+    python -m text_angel.harshness labeled_messages.jsonl harshness.npz
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .shield import _fold
+
+FEATURE_BITS = 18
+"""Features are hashed into ``2 ** FEATURE_BITS`` weights."""
+
+DEFAULT_THRESHOLD = 0.5
+
+_TOKEN = re.compile(r"\w+|[!?]+")
+_CHAR_NGRAMS = (3, 4)
+
+
+def _feature_names(text: str) -> List[str]:
+    tokens = _TOKEN.findall(_fold(text))
+    names = [f"w:{token}" for token in tokens]
+    names.extend(f"b:{first} {second}" for first, second in zip(tokens, tokens[1:]))
+    for token in tokens:
+        padded = f" {token} "
+        for size in _CHAR_NGRAMS:
+            names.extend(
+                f"c:{padded[index:index + size]}" for index in range(len(padded) - size + 1)
+            )
+    return names
+
+
+def _vectorize(texts: Sequence[str], bits: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Hash ``texts`` into a sparse matrix given as ``(rows, columns, values)``.
+
+    Each row is scaled to unit length so long messages do not score higher
+    merely for having more n-grams.
+    """
+
+    mask = (1 << bits) - 1
+    rows: List[int] = []
+    columns: List[int] = []
+    for row, text in enumerate(texts):
+        hashed = [zlib.crc32(name.encode("utf-8")) & mask for name in _feature_names(text)]
+        columns.extend(hashed)
+        rows.extend([row] * len(hashed))
+    row_ids = np.asarray(rows, dtype=np.int64)
+    column_ids = np.asarray(columns, dtype=np.int64)
+    lengths = np.bincount(row_ids, minlength=len(texts)).astype(np.float64)
+    values = 1.0 / np.sqrt(np.maximum(lengths, 1.0))[row_ids]
+    return row_ids, column_ids, values
+
+
+def _sigmoid(logits: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(logits, -30.0, 30.0)))
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class HarshnessModel:
+    """Hashed n-gram logistic regression scoring how harsh a message is."""
+
+    weights: np.ndarray
+    bias: float
+    threshold: float = DEFAULT_THRESHOLD
+
+    @property
+    def bits(self) -> int:
+        return int(self.weights.size).bit_length() - 1
+
+    def score(self, text: str) -> float:
+        """Return the probability that ``text`` is harsh."""
+
+        return float(self.score_batch([text])[0])
+
+    def score_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Score many messages at once; returns one probability per text."""
+
+        rows, columns, values = _vectorize(texts, self.bits)
+        logits = np.bincount(rows, weights=self.weights[columns] * values, minlength=len(texts))
+        return _sigmoid(logits + self.bias)
+
+    def is_harsh(self, text: str) -> bool:
+        return self.score(text) >= self.threshold
+
+    def save(self, path: Path) -> None:
+        # ``np.savez`` appends ``.npz`` to other names; write through a handle
+        # so the file lands exactly at ``path``.
+        with open(path, "wb") as handle:
+            np.savez_compressed(
+                handle,
+                weights=self.weights,
+                bias=np.float64(self.bias),
+                threshold=np.float64(self.threshold),
+            )
+
+
+def load_harshness_model(path: Path) -> HarshnessModel:
+    """Load a model written by :meth:`HarshnessModel.save`."""
+
+    with np.load(path) as saved:
+        return HarshnessModel(
+            weights=saved["weights"],
+            bias=float(saved["bias"]),
+            threshold=float(saved["threshold"]),
+        )
+
+
+def load_labeled_messages(path: Path) -> Tuple[List[str], np.ndarray]:
+    """Read ``{"text": ..., "label": ...}`` JSON Lines records from ``path``."""
+
+    texts: List[str] = []
+    labels: List[float] = []
+    with open(path, encoding="utf-8") as handle:
+        for number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                text, label = record["text"], float(record["label"])
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+                raise ValueError(
+                    f"{path}:{number}: expected {{\"text\": ..., \"label\": 0 or 1}}"
+                ) from exc
+            if not isinstance(text, str) or not 0.0 <= label <= 1.0:
+                raise ValueError(f"{path}:{number}: text must be a string and label within [0, 1]")
+            texts.append(text)
+            labels.append(label)
+    return texts, np.asarray(labels, dtype=np.float64)
+
+
+def train_harshness_model(
+    texts: Sequence[str],
+    labels: Iterable[float],
+    epochs: int = 200,
+    learning_rate: float = 0.5,
+    l2: float = 1e-5,
+    threshold: float = DEFAULT_THRESHOLD,
+    bits: int = FEATURE_BITS,
+) -> HarshnessModel:
+    """Fit a model by full-batch gradient descent with per-feature (Adagrad) steps."""
+
+    targets = np.asarray(list(labels), dtype=np.float64)
+    if len(texts) != len(targets) or not len(texts):
+        raise ValueError("Training needs one label per text and at least one text.")
+    rows, columns, values = _vectorize(texts, bits)
+    weights = np.zeros(1 << bits, dtype=np.float64)
+    bias = 0.0
+    squared = np.zeros_like(weights)
+    bias_squared = 0.0
+    for _ in range(epochs):
+        logits = np.bincount(rows, weights=weights[columns] * values, minlength=len(texts))
+        residual = _sigmoid(logits + bias) - targets
+        gradient = np.bincount(
+            columns, weights=values * residual[rows], minlength=weights.size
+        ) / len(texts)
+        gradient += l2 * weights
+        squared += gradient * gradient
+        weights -= learning_rate * gradient / (np.sqrt(squared) + 1e-8)
+        bias_gradient = float(residual.mean())
+        bias_squared += bias_gradient * bias_gradient
+        bias -= learning_rate * bias_gradient / (bias_squared ** 0.5 + 1e-8)
+    return HarshnessModel(weights=weights, bias=bias, threshold=threshold)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train a local harshness scorer.")
+    parser.add_argument("labeled", type=Path, help="JSON Lines file of text/label records")
+    parser.add_argument("output", type=Path, help="where to write the trained model")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="scores below this count as kind enough to skip the hosted rewrite",
+    )
+    args = parser.parse_args(argv)
+    texts, labels = load_labeled_messages(args.labeled)
+    model = train_harshness_model(texts, labels, epochs=args.epochs, threshold=args.threshold)
+    model.save(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Micro-batching short hosted rewrites into shared upstream calls.
+
+Most messages are a sentence or two, so each hosted rewrite spends most of
+its tokens and time on the system prompt and the round trip.
+:class:`MicroBatcher` collects short messages for the same tone for a few
+milliseconds (or until it has ``max_items``), sends them as one numbered
+prompt that asks for a JSON reply, and hands each caller its own rewrite.
+If the reply cannot be split back into one rewrite per message, every
+message in the batch is rewritten on its own instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .rewriter import HostedRewriter, UpstreamError
+from .tone import DEFAULT_SYSTEM_PROMPT, Tone
+
+_INSTRUCTIONS = (
+    "You will receive {count} numbered messages. Rewrite each one separately, as "
+    "instructed, and never merge or reorder them. Reply with only a JSON object "
+    'of the form {{"rewrites": ["...", ...]}} holding exactly {count} strings, '
+    "the rewrite of message 1 first."
+)
+
+
+@dataclass(frozen=True, slots=True)
+class MicroBatchStats:
+    """Counters for a :class:`MicroBatcher`."""
+
+    batches: int
+    batched_messages: int
+    single_calls: int
+    fallbacks: int
+
+
+_Pending = Tuple[str, "asyncio.Future[str]"]
+
+
+class MicroBatcher:
+    """Pack concurrent short rewrites for the same tone into one upstream call.
+
+    A batch is sent ``max_wait`` seconds after its first message arrives, or
+    as soon as it holds ``max_items`` messages; while every upstream slot is
+    busy it stays open a little longer, since sending it would only queue.
+    Messages longer than ``max_words`` words, and batches of one, are sent on
+    their own. Upstream errors for a batch reach every caller in it; only
+    malformed replies fall back to single calls.
+    """
+
+    def __init__(
+        self,
+        rewriter: HostedRewriter,
+        max_items: int = 8,
+        max_wait: float = 0.005,
+        max_words: int = 30,
+    ) -> None:
+        if max_items < 1 or max_wait < 0:
+            raise ValueError("MicroBatcher needs max_items >= 1 and max_wait >= 0.")
+        self.rewriter = rewriter
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self.max_words = max_words
+        self._pending: Dict[Tone, List[_Pending]] = {}
+        self._timers: Dict[Tone, asyncio.TimerHandle] = {}
+        self._tasks: set = set()
+        self._batches = 0
+        self._batched_messages = 0
+        self._single_calls = 0
+        self._fallbacks = 0
+
+    def stats(self) -> MicroBatchStats:
+        """Return a snapshot of the batching counters."""
+
+        return MicroBatchStats(
+            batches=self._batches,
+            batched_messages=self._batched_messages,
+            single_calls=self._single_calls,
+            fallbacks=self._fallbacks,
+        )
+
+    async def rewrite(self, tone: Tone, message: str) -> str:
+        """Return ``message`` rewritten in ``tone``, batched with its neighbours."""
+
+        if len(message.split()) > self.max_words:
+            self._single_calls += 1
+            return await self.rewriter.rewrite(tone, message)
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[str]" = loop.create_future()
+        pending = self._pending.setdefault(tone, [])
+        pending.append((message, future))
+        if len(pending) >= self.max_items:
+            self._flush(tone)
+        elif tone not in self._timers:
+            self._timers[tone] = loop.call_later(self.max_wait, self._expire, tone)
+        return await future
+
+    def _expire(self, tone: Tone) -> None:
+        # While every upstream slot is busy the batch would only queue, so
+        # keep it open to gather more messages at no extra latency.
+        rewriter = self.rewriter
+        if rewriter.in_flight + rewriter.waiting >= rewriter.max_concurrency:
+            loop = asyncio.get_running_loop()
+            self._timers[tone] = loop.call_later(self.max_wait, self._expire, tone)
+        else:
+            self._flush(tone)
+
+    def _flush(self, tone: Tone) -> None:
+        timer = self._timers.pop(tone, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending.pop(tone, [])
+        if pending:
+            task = asyncio.ensure_future(self._send(tone, pending))
+            # Keep a reference so the task is not garbage collected mid-flight.
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, tone: Tone, pending: List[_Pending]) -> None:
+        live = [(message, future) for message, future in pending if not future.done()]
+        if not live:
+            return
+        if len(live) == 1:
+            self._single_calls += 1
+            await self._send_single(tone, *live[0])
+            return
+        self._batches += 1
+        self._batched_messages += len(live)
+        try:
+            reply = await self.rewriter.complete(
+                _batch_messages(tone, [message for message, _ in live]),
+                max_tokens=self.rewriter.max_tokens * len(live),
+                response_format={"type": "json_object"},
+            )
+        except UpstreamError as exc:
+            for _, future in live:
+                _settle(future, error=exc)
+            return
+        rewrites = _split_reply(reply, len(live))
+        if rewrites is None:
+            self._fallbacks += 1
+            self._single_calls += len(live)
+            await asyncio.gather(*(self._send_single(tone, *item) for item in live))
+            return
+        for (_, future), rewritten in zip(live, rewrites):
+            _settle(future, result=rewritten)
+
+    async def _send_single(self, tone: Tone, message: str, future: "asyncio.Future[str]") -> None:
+        try:
+            _settle(future, result=await self.rewriter.rewrite(tone, message))
+        except UpstreamError as exc:
+            _settle(future, error=exc)
+
+
+def _batch_messages(tone: Tone, messages: List[str]) -> List[Dict[str, str]]:
+    numbered = "\n".join(
+        f"{number}. {json.dumps(message, ensure_ascii=False)}"
+        for number, message in enumerate(messages, start=1)
+    )
+    instructions = _INSTRUCTIONS.format(count=len(messages))
+    return [
+        {"role": "system", "content": f"{tone.system or DEFAULT_SYSTEM_PROMPT} {instructions}"},
+        {"role": "user", "content": f"{tone.prompt or ''}\n\nMessages:\n{numbered}".lstrip()},
+    ]
+
+
+def _split_reply(reply: str, count: int) -> Optional[List[str]]:
+    """Return the ``count`` rewrites in ``reply``, or ``None`` if it is malformed."""
+
+    try:
+        rewrites = json.loads(reply)["rewrites"]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return None
+    if (
+        not isinstance(rewrites, list)
+        or len(rewrites) != count
+        or not all(isinstance(rewrite, str) and rewrite.strip() for rewrite in rewrites)
+    ):
+        return None
+    return [rewrite.strip() for rewrite in rewrites]
+
+
+def _settle(
+    future: "asyncio.Future[str]",
+    result: Optional[str] = None,
+    error: Optional[BaseException] = None,
+) -> None:
+    # A caller that was cancelled has already given up on its future.
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
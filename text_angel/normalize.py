@@ -0,0 +1,282 @@
+"""Obfuscation folding for the Text Angel shield filter.
+
+People dodge word filters with leetspeak (``h4te``), lookalike characters
+(Cyrillic ``а`` for Latin ``a``), stretched letters (``iiiidiot``), punctuation
+between letters (``s.t.u.p.i.d``) and masking (``st*pid``). Instead of
+expanding every shield word into variants, both the shield words and the
+incoming text are folded onto one canonical form in a single linear pass, and
+an offset map ties every folded character back to the original text.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List
+
+WILDCARD = "*"
+"""A masking character that stands in for exactly one letter."""
+
+_LEET_DIGITS: Dict[str, str] = {
+    "0": "o",
+    "1": "i",
+    "3": "e",
+    "4": "a",
+    "5": "s",
+    "6": "g",
+    "7": "t",
+    "8": "b",
+    "9": "g",
+}
+
+_LEET_SYMBOLS: Dict[str, str] = {
+    "@": "a",
+    "$": "s",
+    "!": "i",
+    "|": "i",
+    "+": "t",
+    "€": "e",
+}
+
+_SEPARATORS = frozenset(".-_~'")
+
+_INVISIBLE = "­͏᠎​‌‍⁠﻿"
+
+_LOOKALIKES = {
+    # Cyrillic
+    "а": "a", "в": "b", "е": "e", "ё": "e", "з": "3", "к": "k",
+    "м": "m", "н": "h", "о": "o", "р": "p", "с": "c", "т": "t", "у": "y",
+    "х": "x", "ѕ": "s", "і": "i", "ї": "i", "ј": "j", "ԁ": "d", "ԛ": "q",
+    "ԝ": "w", "ɡ": "g",
+    # Greek
+    "α": "a", "β": "b", "γ": "y", "ε": "e", "η": "n", "ι": "i", "κ": "k",
+    "ν": "v", "ο": "o", "ρ": "p", "τ": "t", "υ": "u", "χ": "x", "ω": "w",
+}
+
+
+def _build_confusables() -> Dict[str, str]:
+    """Map lookalike, accented and full-width characters to plain ASCII.
+
+    Characters that should vanish (zero-width joiners, soft hyphens and
+    combining marks) map to the empty string.
+    """
+
+    table: Dict[str, str] = {char: "" for char in _INVISIBLE}
+    for codepoint in range(0x0300, 0x0370):
+        table[chr(codepoint)] = ""
+    ranges = (range(0x00C0, 0x0250), range(0x1E00, 0x1F00), range(0xFF01, 0xFF5F))
+    for codepoints in ranges:
+        for codepoint in codepoints:
+            char = chr(codepoint)
+            base = "".join(
+                part
+                for part in unicodedata.normalize("NFKD", char)
+                if not unicodedata.combining(part)
+            ).lower()
+            if len(base) == 1 and base.isascii() and base != char:
+                table[char] = base
+    table.update(_LOOKALIKES)
+    return table
+
+
+_CONFUSABLES = _build_confusables()
+
+
+@dataclass(frozen=True, slots=True)
+class NormalizedText:
+    """Folded text plus the offset map back into the original string.
+
+    Folded character ``i`` came from ``original[starts[i]:ends[i]]``; a folded
+    span ``[a, b)`` therefore covers ``original[starts[a]:ends[b - 1]]``.
+    ``stretched`` records whether a run of three or more of one letter was
+    folded, i.e. whether folding with another ``stretch`` would differ.
+    """
+
+    text: str
+    starts: array
+    ends: array
+    stretched: bool = False
+
+
+def _wildcard_run_closes(text: str, index: int) -> bool:
+    """Return ``True`` if the run of wildcards at ``index`` is followed by a letter."""
+
+    length = len(text)
+    while index < length and text[index] == WILDCARD:
+        index += 1
+    return index < length and text[index].isalnum()
+
+
+# Plain lower-case ASCII letters and punctuation that folding never changes.
+# Everything else, plus runs of three or more of one letter, goes through
+# ``_Folder.push``.
+_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+_SPECIAL = re.compile(r"([a-z])\1\1+|[^a-z \t\n,?;:\"()]")
+
+
+class _Folder:
+    """Mutable state of one :func:`normalize_text` pass."""
+
+    __slots__ = (
+        "text",
+        "stretch",
+        "out",
+        "starts",
+        "ends",
+        "last",
+        "repeat",
+        "run",
+        "segment",
+        "wildcard_ok",
+        "stretched",
+    )
+
+    def __init__(self, text: str, stretch: int) -> None:
+        self.text = text
+        self.stretch = stretch
+        self.out: List[str] = []
+        self.starts = array("q")
+        self.ends = array("q")
+        self.last = ""  # last folded character
+        self.repeat = 0  # original letters in the run ending at ``last``
+        self.run = 0  # word characters in the current folded word
+        self.segment = 0  # word characters since the last dropped separator
+        self.wildcard_ok = False  # whether the current wildcard run closes on a letter
+        self.stretched = False  # whether a run of three or more letters was folded
+
+    def push(self, index: int, lower: str) -> None:
+        """Fold the single character at ``index``, already lower-cased."""
+
+        mapped = _CONFUSABLES.get(lower, lower)
+        if not mapped:
+            if self.last:
+                self.ends[-1] = index + 1
+            return
+        text = self.text
+        following = text[index + 1] if index + 1 < len(text) else ""
+
+        if mapped in _LEET_DIGITS:
+            if self.last.isalpha() or following.isalpha():
+                mapped = _LEET_DIGITS[mapped]
+        elif mapped in _LEET_SYMBOLS:
+            if following.isalnum():
+                mapped = _LEET_SYMBOLS[mapped]
+        elif mapped == WILDCARD:
+            if self.last != WILDCARD:
+                self.wildcard_ok = self.run > 0 and _wildcard_run_closes(text, index)
+            if not self.wildcard_ok:
+                # Decorative asterisks (``*hugs*``) only separate words.
+                mapped = " "
+        elif mapped in _SEPARATORS and self.segment == 1 and following.isalnum():
+            self.ends[-1] = index + 1
+            self.segment = 0
+            return
+
+        is_word = mapped == WILDCARD or mapped.isalnum() or mapped == "_"
+        if is_word and mapped.isalpha() and self.run and self.last == mapped:
+            self.repeat += 1
+            if self.repeat == 3:
+                # Two letters may be the word's own spelling ("hell", "ass");
+                # a third means the run was stretched.
+                self.stretched = True
+                if self.stretch == 1:
+                    self.out.pop()
+                    self.starts.pop()
+                    self.ends.pop()
+                    self.run -= 1
+                    self.segment -= 1
+            if self.repeat > 2:
+                self.ends[-1] = index + 1
+                return
+        else:
+            self.repeat = 1
+
+        self.out.append(mapped)
+        self.starts.append(index)
+        self.ends.append(index + 1)
+        self.last = mapped
+        if is_word:
+            self.run += 1
+            self.segment += 1
+        else:
+            self.run = 0
+            self.segment = 0
+
+    def extend(self, lowered: str, start: int, stop: int) -> None:
+        """Copy the plain stretch ``lowered[start:stop]`` through unchanged."""
+
+        # The leading characters may still continue the previous folded
+        # letter's run.
+        self.push(start, lowered[start])
+        start += 1
+        while start < stop and lowered[start] == self.last:
+            self.push(start, lowered[start])
+            start += 1
+        if start >= stop:
+            return
+        chunk = lowered[start:stop]
+        self.out.append(chunk)
+        self.starts.extend(range(start, stop))
+        self.ends.extend(range(start + 1, stop + 1))
+        self.last = chunk[-1]
+        self.repeat = len(chunk) - len(chunk.rstrip(self.last))
+        trailing = len(chunk) - len(chunk.rstrip(_LETTERS))
+        if trailing == len(chunk):
+            self.run += trailing
+            self.segment += trailing
+        else:
+            self.run = trailing
+            self.segment = trailing
+
+
+def normalize_text(text: str, stretch: int = 2) -> NormalizedText:
+    """Fold ``text`` into the canonical form the shield matches against.
+
+    The pass lower-cases, maps lookalikes and accented letters to ASCII,
+    decodes leetspeak inside words, drops invisible characters and
+    punctuation inserted between single letters, folds runs of three or more
+    of one letter down to ``stretch`` letters (1 or 2), and keeps a
+    :data:`WILDCARD` that masks a letter inside a word. Single and doubled
+    letters are kept as they are, so "as" and "ass" stay distinct. Plain
+    stretches of ASCII are copied through in bulk.
+    """
+
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        lowered = "".join(
+            lower if len(lower) == 1 else char
+            for char, lower in ((char, char.lower()) for char in text)
+        )
+
+    folder = _Folder(text, stretch)
+    cursor = 0
+    for special in _SPECIAL.finditer(lowered):
+        start = special.start()
+        if start > cursor:
+            folder.extend(lowered, cursor, start)
+        for index in range(start, special.end()):
+            folder.push(index, lowered[index])
+        cursor = special.end()
+    if cursor < len(lowered):
+        folder.extend(lowered, cursor, len(lowered))
+
+    return NormalizedText(
+        text="".join(folder.out),
+        starts=folder.starts,
+        ends=folder.ends,
+        stretched=folder.stretched,
+    )
+
+
+def is_normalized_word_char(char: str) -> bool:
+    return char == WILDCARD or char.isalnum() or char == "_"
+
+
+def is_normalized_boundary(text: str, index: int) -> bool:
+    """Word boundary test for folded text, where wildcards count as letters."""
+
+    before = index > 0 and is_normalized_word_char(text[index - 1])
+    after = index < len(text) and is_normalized_word_char(text[index])
+    return before != after
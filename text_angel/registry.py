@@ -0,0 +1,203 @@
+"""Multi-tenant shield registry for the Text Angel project.
+
+Each tenant (a school, say) layers its own words on top of one shared base
+configuration. Only a tenant's additions are stored per tenant, words are
+interned so a word shared by many tenants is held once, and compiled
+matchers live in an LRU cache bounded by an approximate memory budget.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, Mapping, Tuple, Union
+
+from .shield import ShieldConfig, ShieldMatcher, ShieldResult, ShieldingError, load_shield_config
+
+
+@dataclass(frozen=True, slots=True)
+class RegistryStats:
+    """Cache counters for sizing a :class:`ShieldRegistry` memory budget."""
+
+    hits: int
+    misses: int
+    evictions: int
+    cached_tenants: int
+    cached_bytes: int
+    memory_budget: int
+
+
+def _matcher_size(matcher: ShieldMatcher) -> int:
+    """Approximate the bytes held by a compiled matcher.
+
+    Only the containers that grow with the dictionary are counted; it is meant
+    for relative budgeting, not exact accounting.
+    """
+
+    automaton = matcher._automaton
+    size = sum(sys.getsizeof(edges) for edges in automaton._goto)
+    size += sys.getsizeof(automaton._goto) + sys.getsizeof(automaton._output)
+    size += sys.getsizeof(automaton._fail) + sys.getsizeof(automaton._dict_link)
+    size += 64 * sum(1 for output in automaton._output if output is not None)
+    if matcher._tokens is not None:
+        size += sys.getsizeof(matcher._tokens)
+    return size
+
+
+class ShieldRegistry:
+    """Per-tenant shield matchers layered over a shared base configuration.
+
+    A tenant's words are added to the base categories of the same name (or
+    form new categories); the base's replacement and normalization apply to
+    every tenant. :meth:`matcher` compiles a tenant's layered
+    configuration on first use and keeps it in an LRU cache; once the cached
+    matchers exceed ``memory_budget`` bytes, the least recently used tenants
+    are evicted and recompiled on their next request. Unknown tenants, and
+    ``None``, get the base matcher, which is never evicted.
+    """
+
+    def __init__(self, base: ShieldConfig, memory_budget: int = 64 * 1024 * 1024) -> None:
+        self.base = ShieldConfig(
+            categories={
+                sys.intern(category): [sys.intern(word) for word in words]
+                for category, words in base.categories.items()
+            },
+            replacement=base.replacement,
+            version=base.version,
+            normalize=base.normalize,
+            max_distances=base.max_distances,
+            severities=base.severities,
+            word_severities=base.word_severities,
+        )
+        self.memory_budget = memory_budget
+        self._overrides: Dict[Hashable, ShieldConfig] = {}
+        self._cache: "OrderedDict[Hashable, Tuple[ShieldMatcher, int]]" = OrderedDict()
+        self._cached_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def set_tenant(
+        self, tenant_id: Hashable, overrides: Union[ShieldConfig, Mapping[str, Iterable[str]]]
+    ) -> None:
+        """Register (or replace) what ``tenant_id`` layers on top of the base.
+
+        ``overrides`` is either a mapping of categories to extra words or a
+        :class:`ShieldConfig`, whose typo distances and severities then take
+        precedence over the base's for the tenant.
+        """
+
+        if tenant_id is None:
+            raise ShieldingError("Tenant ids must not be None.")
+        if not isinstance(overrides, ShieldConfig):
+            overrides = ShieldConfig(categories=dict(overrides))
+        categories = {
+            sys.intern(category): [sys.intern(word.strip()) for word in words if word.strip()]
+            for category, words in overrides.categories.items()
+        }
+        version = overrides.version or hashlib.sha256(
+            json.dumps(categories, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:12]
+        overlay = ShieldConfig(
+            categories=categories,
+            version=version,
+            max_distances=overrides.max_distances,
+            severities=overrides.severities,
+            word_severities=overrides.word_severities,
+        )
+        with self._lock:
+            self._overrides[tenant_id] = overlay
+            self._drop(tenant_id)
+
+    def load_tenant(self, tenant_id: Hashable, path: Path) -> None:
+        """Register ``tenant_id``'s overrides from a shield JSON file."""
+
+        self.set_tenant(tenant_id, load_shield_config(path))
+
+    def remove_tenant(self, tenant_id: Hashable) -> None:
+        """Forget ``tenant_id``; it falls back to the base matcher."""
+
+        with self._lock:
+            self._overrides.pop(tenant_id, None)
+            self._drop(tenant_id)
+
+    def config_for(self, tenant_id: Hashable) -> ShieldConfig:
+        """Return the base configuration with ``tenant_id``'s overrides layered on."""
+
+        overlay = self._overrides.get(tenant_id)
+        base = self.base
+        if overlay is None:
+            return base
+        categories = {category: list(words) for category, words in base.categories.items()}
+        for category, words in overlay.categories.items():
+            existing = categories.setdefault(category, [])
+            seen = set(existing)
+            existing.extend(word for word in words if word not in seen)
+        return ShieldConfig(
+            categories=categories,
+            replacement=base.replacement,
+            version=f"{base.version or 'base'}+{overlay.version}",
+            normalize=base.normalize,
+            max_distances={**base.max_distances, **overlay.max_distances},
+            severities={**base.severities, **overlay.severities},
+            word_severities={**base.word_severities, **overlay.word_severities},
+        )
+
+    def matcher(self, tenant_id: Hashable) -> ShieldMatcher:
+        """Return the compiled matcher for ``tenant_id``."""
+
+        if tenant_id not in self._overrides:
+            return self.base.compile()
+        with self._lock:
+            cached = self._cache.get(tenant_id)
+            if cached is not None:
+                self._cache.move_to_end(tenant_id)
+                self._hits += 1
+                return cached[0]
+            self._misses += 1
+
+        # Compile outside the lock so one slow tenant does not stall the rest.
+        matcher = self.config_for(tenant_id).compile()
+        size = _matcher_size(matcher)
+        with self._lock:
+            if tenant_id in self._overrides and tenant_id not in self._cache:
+                self._cache[tenant_id] = (matcher, size)
+                self._cached_bytes += size
+                self._evict()
+        return matcher
+
+    def shield(self, text: str, tenant_id: Hashable) -> ShieldResult:
+        """Shield ``text`` with ``tenant_id``'s matcher."""
+
+        return self.matcher(tenant_id).shield(text)
+
+    def stats(self) -> RegistryStats:
+        """Return a snapshot of the cache counters."""
+
+        with self._lock:
+            return RegistryStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                cached_tenants=len(self._cache),
+                cached_bytes=self._cached_bytes,
+                memory_budget=self.memory_budget,
+            )
+
+    def _drop(self, tenant_id: Hashable) -> None:
+        cached = self._cache.pop(tenant_id, None)
+        if cached is not None:
+            self._cached_bytes -= cached[1]
+
+    def _evict(self) -> None:
+        # Always keep the most recent matcher, even if it alone is over budget.
+        while self._cached_bytes > self.memory_budget and len(self._cache) > 1:
+            _, (_, size) = self._cache.popitem(last=False)
+            self._cached_bytes -= size
+            self._evictions += 1
@@ -0,0 +1,285 @@
+"""Retries, circuit breaking and hedging for hosted rewrites.
+
+:class:`ResilientRewriter` is a :class:`~text_angel.rewriter.HostedRewriter`
+that rides out a flaky upstream:
+
+* transient failures are retried with exponential backoff and full jitter,
+  waiting longer after a rate limit than after a server error;
+* a :class:`CircuitBreaker` stops calling an upstream that keeps failing
+  and raises :class:`CircuitOpen` instead, so callers can fall back to the
+  local tone rewrite until a trial call succeeds again;
+* a call still running after the recent 95th-percentile latency (from
+  :attr:`HostedRewriter.latency`) is hedged with a second identical call,
+  and whichever answers first wins.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception_type,
+    stop_after_attempt,
+)
+
+from .rewriter import (
+    HostedRewriter,
+    UpstreamError,
+    UpstreamRateLimited,
+    UpstreamTimeout,
+    UpstreamUnavailable,
+)
+from .tone import Tone
+
+_TRANSIENT = (UpstreamRateLimited, UpstreamTimeout, UpstreamUnavailable)
+"""Failures worth retrying, and the ones that count against the breaker."""
+
+
+class CircuitOpen(UpstreamError):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures.
+
+    While open every call is refused. After ``reset_timeout`` seconds the
+    breaker is half open and lets a single trial call through: success
+    closes it, failure opens it for another ``reset_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Return whether a call may go upstream now."""
+
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def release(self) -> None:
+        """End a trial call that neither succeeded nor failed, e.g. a cancelled one."""
+
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial or self._failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+            self._trial = False
+
+
+@dataclass(frozen=True, slots=True)
+class ResilienceStats:
+    """Counters for a :class:`ResilientRewriter`."""
+
+    breaker_state: str
+    retries: int
+    hedges: int
+    hedge_wins: int
+    short_circuits: int
+    p95_latency: Optional[float]
+
+
+class ResilientRewriter(HostedRewriter):
+    """A :class:`HostedRewriter` with retries, a circuit breaker and hedging.
+
+    Each call is tried up to ``max_attempts`` times. Retries wait a random
+    time of up to ``backoff * 2 ** (attempt - 1)`` seconds (``rate_limit_backoff``
+    after a rate limit), capped at ``max_backoff``. Hedging starts once
+    ``hedge_min_samples`` latencies are known and never while every
+    concurrency slot is taken, since a hedge would only queue. Streams are
+    guarded by the breaker but not retried or hedged: their tokens may
+    already have reached the client. Other keyword arguments are passed to
+    :class:`HostedRewriter`; its own client retries default to 0 here.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        *,
+        max_attempts: int = 3,
+        backoff: float = 0.2,
+        rate_limit_backoff: float = 1.0,
+        max_backoff: float = 8.0,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge: bool = True,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        hedge_min_delay: float = 0.05,
+        **kwargs: Any,
+    ) -> None:
+        kwargs.setdefault("max_retries", 0)
+        super().__init__(api_key, **kwargs)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.rate_limit_backoff = rate_limit_backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self._retries = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._short_circuits = 0
+
+    def stats(self) -> ResilienceStats:
+        """Return a snapshot of the resilience counters."""
+
+        return ResilienceStats(
+            breaker_state=self.breaker.state,
+            retries=self._retries,
+            hedges=self._hedges,
+            hedge_wins=self._hedge_wins,
+            short_circuits=self._short_circuits,
+            p95_latency=self.latency.quantile(0.95),
+        )
+
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            self._short_circuits += 1
+            raise CircuitOpen("The hosted model is unavailable; the circuit breaker is open.")
+
+    def _wait(self, retry_state: RetryCallState) -> float:
+        outcome = retry_state.outcome
+        rate_limited = outcome is not None and isinstance(
+            outcome.exception(), UpstreamRateLimited
+        )
+        base = self.rate_limit_backoff if rate_limited else self.backoff
+        ceiling = min(self.max_backoff, base * 2 ** (retry_state.attempt_number - 1))
+        return random.uniform(0.0, ceiling)
+
+    def _before_retry(self, retry_state: RetryCallState) -> None:
+        self._retries += 1
+
+    def _breaker_open(self, retry_state: RetryCallState) -> bool:
+        return self.breaker.state != CircuitBreaker.CLOSED
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge or len(self.latency) < self.hedge_min_samples:
+            return None
+        if self.in_flight + self.waiting >= self.max_concurrency:
+            return None
+        delay = self.latency.quantile(self.hedge_quantile)
+        return None if delay is None else max(delay, self.hedge_min_delay)
+
+    async def complete(
+        self, messages: List[Dict[str, str]], timeout: Optional[float] = None, **options: Any
+    ) -> str:
+        """Return the model's reply to ``messages``, retrying and hedging as needed."""
+
+        self._admit()
+        call = super().complete
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts) | self._breaker_open,
+            wait=self._wait,
+            retry=retry_if_exception_type(_TRANSIENT),
+            before_sleep=self._before_retry,
+            reraise=True,
+        )
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    try:
+                        reply = await self._hedged(lambda: call(messages, timeout, **options))
+                    except _TRANSIENT:
+                        self.breaker.record_failure()
+                        raise
+        except UpstreamError as exc:
+            if not isinstance(exc, _TRANSIENT):
+                # The upstream answered; the request itself was at fault.
+                self.breaker.record_success()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return reply
+
+    async def _hedged(self, call: Callable[[], Awaitable[str]]) -> str:
+        """Run ``call``, racing a second copy if it outlives the hedge delay."""
+
+        async def tagged(index: int) -> Tuple[int, str]:
+            return index, await call()
+
+        tasks = [asyncio.ensure_future(tagged(0))]
+        try:
+            delay = self._hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self._hedges += 1
+                    tasks.append(asyncio.ensure_future(tagged(1)))
+            error: Optional[BaseException] = None
+            for finished in asyncio.as_completed(tasks):
+                try:
+                    index, reply = await finished
+                except UpstreamError as exc:
+                    error = exc
+                    continue
+                if index:
+                    self._hedge_wins += 1
+                return reply
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream(
+        self, tone: Tone, message: str, timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        self._admit()
+        try:
+            async for piece in super().stream(tone, message, timeout):
+                yield piece
+        except _TRANSIENT:
+            self.breaker.record_failure()
+            raise
+        except UpstreamError:
+            self.breaker.record_success()
+            raise
+        except BaseException:
+            # The caller stopped reading or was cancelled.
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
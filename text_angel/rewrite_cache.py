@@ -0,0 +1,266 @@
+"""Caching hosted rewrites for the Text Angel API.
+
+The same short messages ("I hate this", "shut up") are sent for rewriting
+over and over, and each hosted rewrite is a round trip of a second or more.
+:class:`RewriteCache` remembers finished rewrites under a key made from the
+normalized message, the tone, the model and a digest of the tone's prompts,
+so editing ``tone_prompts.json`` or switching models never serves a stale
+rewrite.
+
+Entries live in an in-memory LRU tier and, when ``path`` is given, in a
+SQLite file as well. The file survives restarts and is shared by every
+worker on the host; a miss in memory that hits on disk is promoted back into
+memory. Both tiers expire entries after ``ttl`` seconds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+from .tone import Tone
+
+_PURGE_EVERY = 256
+"""Disk writes between sweeps of expired rows."""
+
+_BUSY_TIMEOUT = 0.5
+"""Seconds a disk lookup or write waits for another worker's lock."""
+
+
+@dataclass(frozen=True, slots=True)
+class RewriteCacheStats:
+    """Counters for a :class:`RewriteCache`."""
+
+    hits: int
+    misses: int
+    memory_hits: int
+    disk_hits: int
+    memory_entries: int
+    disk_entries: Optional[int]
+    disk_errors: int
+    maxsize: int
+    ttl: float
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def normalize_message(message: str) -> str:
+    """Return ``message`` as it is keyed: NFC-normalized, whitespace collapsed."""
+
+    return " ".join(unicodedata.normalize("NFC", message).split())
+
+
+@lru_cache(maxsize=64)
+def prompt_version(tone: Tone) -> str:
+    """Short digest of the prompts ``tone`` sends to the hosted model."""
+
+    prompts = json.dumps(tone.messages(""), sort_keys=True).encode("utf-8")
+    return hashlib.sha256(prompts).hexdigest()[:12]
+
+
+def rewrite_cache_key(message: str, tone: Tone, model: str) -> str:
+    """Key for the rewrite of ``message`` in ``tone`` by ``model``."""
+
+    fields = [normalize_message(message), tone.key, model, prompt_version(tone)]
+    return hashlib.sha256(json.dumps(fields).encode("utf-8")).hexdigest()
+
+
+class RewriteCache:
+    """LRU + TTL cache of rewrites, optionally backed by a shared SQLite file.
+
+    ``maxsize`` bounds the in-memory tier; the disk tier is bounded only by
+    ``ttl``, with expired rows swept out as new ones are written. Async
+    callers use :meth:`aget` and :meth:`aset`, which check memory inline but
+    run the disk tier in a worker thread, so waiting on another worker's
+    write lock never stalls the event loop. A disk error, such as a lock
+    held past the busy timeout, counts as a miss or a skipped write.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: float = 24 * 60 * 60,
+        path: Optional[Union[str, Path]] = None,
+    ) -> None:
+        if maxsize < 1 or ttl <= 0:
+            raise ValueError("RewriteCache needs a positive maxsize and ttl.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = None if path is None else Path(path)
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._hits = self._misses = self._memory_hits = self._disk_hits = 0
+        self._writes = 0
+        self._disk_errors = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if self.path is not None:
+            self._db = sqlite3.connect(
+                self.path, timeout=_BUSY_TIMEOUT, check_same_thread=False
+            )
+            # WAL lets workers read while another one writes.
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS rewrites "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached rewrite for ``key``, or ``None``.
+
+        A disk lookup runs on the calling thread; see :meth:`aget`.
+        """
+
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        return self._disk_found(key, self._disk_get(key))
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Like :meth:`get`, with the disk lookup run in a worker thread."""
+
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        row = await asyncio.to_thread(self._disk_get, key) if self._db is not None else None
+        return self._disk_found(key, row)
+
+    def set(self, key: str, value: str) -> None:
+        """Store ``value`` under ``key`` in every tier."""
+
+        with self._lock:
+            self._remember(key, value, self.ttl)
+        self._disk_set(key, value)
+
+    async def aset(self, key: str, value: str) -> None:
+        """Like :meth:`set`, with the disk write run in a worker thread."""
+
+        with self._lock:
+            self._remember(key, value, self.ttl)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, value)
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self._hits += 1
+            self._memory_hits += 1
+            return value
+
+    def _disk_found(self, key: str, row: Optional[Tuple[str, float]]) -> Optional[str]:
+        with self._lock:
+            if row is None:
+                self._misses += 1
+                return None
+            value, remaining = row
+            self._remember(key, value, remaining)
+            self._hits += 1
+            self._disk_hits += 1
+            return value
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return the live ``(value, remaining ttl)`` on disk for ``key``, if any."""
+
+        with self._db_lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT value, expires FROM rewrites WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                self._disk_error()
+                return None
+        if row is None:
+            return None
+        remaining = row[1] - time.time()
+        return (row[0], remaining) if remaining > 0 else None
+
+    def _disk_set(self, key: str, value: str) -> None:
+        with self._db_lock:
+            if self._db is None:
+                return
+            now = time.time()
+            try:
+                # The connection commits on success and rolls back on error.
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO rewrites (key, value, expires) VALUES (?, ?, ?)",
+                        (key, value, now + self.ttl),
+                    )
+                    self._writes += 1
+                    if self._writes % _PURGE_EVERY == 0:
+                        self._db.execute("DELETE FROM rewrites WHERE expires <= ?", (now,))
+            except sqlite3.Error:
+                self._disk_error()
+
+    def _disk_error(self) -> None:
+        with self._lock:
+            self._disk_errors += 1
+
+    def _remember(self, key: str, value: str, ttl: float) -> None:
+        self._memory[key] = (time.monotonic() + ttl, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+
+        with self._lock:
+            self._memory.clear()
+        with self._db_lock:
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM rewrites")
+
+    def stats(self) -> RewriteCacheStats:
+        """Return a snapshot of the cache counters."""
+
+        disk_entries = None
+        with self._db_lock:
+            if self._db is not None:
+                try:
+                    disk_entries = self._db.execute("SELECT COUNT(*) FROM rewrites").fetchone()[0]
+                except sqlite3.Error:
+                    self._disk_error()
+        with self._lock:
+            return RewriteCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                memory_hits=self._memory_hits,
+                disk_hits=self._disk_hits,
+                memory_entries=len(self._memory),
+                disk_entries=disk_entries,
+                disk_errors=self._disk_errors,
+                maxsize=self.maxsize,
+                ttl=self.ttl,
+            )
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
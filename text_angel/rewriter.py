@@ -0,0 +1,297 @@
+"""Hosted (OpenAI) rewrites for the Text Angel API.
+
+:class:`HostedRewriter` owns one async OpenAI client backed by a pooled,
+keep-alive HTTP connection pool, so rewrites never block the event loop and
+concurrent requests reuse warm connections. :meth:`HostedRewriter.stream`
+relays the rewrite token by token as the model produces it. A semaphore
+caps how many upstream calls are in flight; further callers wait their turn
+instead of piling more load onto a slow upstream.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import httpx
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncOpenAI,
+    RateLimitError,
+)
+
+from .tone import Tone
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+T = TypeVar("T")
+
+
+class UpstreamError(RuntimeError):
+    """Raised when the hosted model cannot produce a rewrite."""
+
+
+class UpstreamTimeout(UpstreamError):
+    """Raised when the hosted model does not answer within the timeout."""
+
+
+class UpstreamRateLimited(UpstreamError):
+    """Raised when the hosted model rejects a call for exceeding a rate limit."""
+
+
+class UpstreamUnavailable(UpstreamError):
+    """Raised when the hosted model cannot be reached or fails server-side."""
+
+
+def _upstream_error(exc: Exception) -> UpstreamError:
+    """Classify an OpenAI client exception as one of the errors above."""
+
+    if isinstance(exc, (APITimeoutError, TimeoutError)):
+        return UpstreamTimeout("The hosted model did not answer in time.")
+    if isinstance(exc, RateLimitError):
+        return UpstreamRateLimited(str(exc))
+    if isinstance(exc, APIConnectionError) or (
+        isinstance(exc, APIStatusError) and exc.status_code >= 500
+    ):
+        return UpstreamUnavailable(str(exc))
+    return UpstreamError(str(exc))
+
+
+class LatencyWindow:
+    """The most recent ``size`` latencies, for rolling percentiles.
+
+    With ``max_age``, samples older than that many seconds are forgotten, so
+    the window reflects the upstream as it is now rather than as it was.
+    """
+
+    def __init__(
+        self,
+        size: int = 200,
+        max_age: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_age = max_age
+        self._clock = clock
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=size)
+
+    def _prune(self) -> None:
+        if self.max_age is not None:
+            oldest = self._clock() - self.max_age
+            while self._samples and self._samples[0][0] < oldest:
+                self._samples.popleft()
+
+    def __len__(self) -> int:
+        self._prune()
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append((self._clock(), seconds))
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the ``q`` quantile of the window, or ``None`` if it is empty."""
+
+        self._prune()
+        if not self._samples:
+            return None
+        ordered = sorted(seconds for _, seconds in self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HostedRewriter:
+    """Rewrites messages with a hosted chat model, without blocking.
+
+    ``timeout`` bounds each upstream call and may be overridden per call;
+    ``max_concurrency`` caps upstream calls in flight. :attr:`latency` holds
+    how long recent calls took once they had a slot, failures included,
+    over the last ``latency_max_age`` seconds. Pass ``client`` to use
+    a preconfigured :class:`openai.AsyncOpenAI` (tests use one with a fake
+    transport); otherwise one is built with a shared connection pool that
+    retries ``max_retries`` times, which should be 0 when a layer above,
+    such as :class:`text_angel.resilience.ResilientRewriter`, retries.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        *,
+        client: Optional[AsyncOpenAI] = None,
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        max_tokens: int = 200,
+        timeout: float = 30.0,
+        max_concurrency: int = 32,
+        max_connections: int = 64,
+        keepalive_expiry: float = 30.0,
+        max_retries: int = 2,
+        latency_max_age: float = 60.0,
+    ) -> None:
+        if client is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                    keepalive_expiry=keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            )
+            client = AsyncOpenAI(
+                api_key=api_key, http_client=http_client, max_retries=max_retries
+            )
+        self.client = client
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._waiting = 0
+        self.latency = LatencyWindow(max_age=latency_max_age)
+        self._started: Dict[object, float] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Upstream calls currently running."""
+
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        """Calls queued behind the concurrency limit."""
+
+        return self._waiting
+
+    @property
+    def oldest_in_flight(self) -> float:
+        """Seconds the longest-running upstream call has been running, or 0."""
+
+        if not self._started:
+            return 0.0
+        return time.perf_counter() - min(self._started.values())
+
+    def _request(
+        self, messages: List[Dict[str, str]], timeout: Optional[float], **options: Any
+    ) -> Dict[str, Any]:
+        request = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "timeout": self.timeout if timeout is None else timeout,
+        }
+        request.update(options)
+        return request
+
+    async def _acquire(self) -> Tuple[object, float]:
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+        call, started = object(), time.perf_counter()
+        self._started[call] = started
+        return call, started
+
+    def _release(self, call: object) -> None:
+        del self._started[call]
+        self._in_flight -= 1
+        self._slots.release()
+
+    async def rewrite(self, tone: Tone, message: str, timeout: Optional[float] = None) -> str:
+        """Return ``message`` rewritten in ``tone`` by the hosted model."""
+
+        return await self.complete(tone.messages(message), timeout)
+
+    async def complete(
+        self, messages: List[Dict[str, str]], timeout: Optional[float] = None, **options: Any
+    ) -> str:
+        """Return the model's reply to ``messages``.
+
+        ``options`` are passed on to the chat completions call and override
+        the rewriter's defaults, such as ``max_tokens``.
+        """
+
+        request = self._request(messages, timeout, **options)
+        call, started = await self._acquire()
+        try:
+            # The client's own timeout applies per attempt; this bounds the
+            # whole call, retries included.
+            async with asyncio.timeout(request["timeout"]):
+                response = await self.client.chat.completions.create(**request)
+        except Exception as exc:
+            self.latency.record(time.perf_counter() - started)
+            raise _upstream_error(exc) from exc
+        else:
+            self.latency.record(time.perf_counter() - started)
+        finally:
+            self._release(call)
+        content = response.choices[0].message.content if response.choices else None
+        if not content:
+            raise UpstreamError("The hosted model returned an empty rewrite.")
+        return content.strip()
+
+    async def stream(
+        self, tone: Tone, message: str, timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Yield the rewrite of ``message`` in ``tone`` piece by piece.
+
+        The timeout bounds the whole stream, not each piece. The concurrency
+        slot is held until the stream ends or the caller stops iterating.
+        """
+
+        request = self._request(tone.messages(message), timeout)
+        deadline = asyncio.get_running_loop().time() + request["timeout"]
+        call, started = await self._acquire()
+        try:
+            chunks = await _before(
+                deadline, self.client.chat.completions.create(stream=True, **request)
+            )
+            try:
+                produced = False
+                while True:
+                    try:
+                        chunk = await _before(deadline, chunks.__anext__())
+                    except StopAsyncIteration:
+                        break
+                    content = chunk.choices[0].delta.content if chunk.choices else None
+                    if content:
+                        produced = True
+                        yield content
+                if not produced:
+                    raise UpstreamError("The hosted model returned an empty rewrite.")
+            finally:
+                await chunks.close()
+        except Exception as exc:
+            self.latency.record(time.perf_counter() - started)
+            if isinstance(exc, UpstreamError):
+                raise
+            raise _upstream_error(exc) from exc
+        else:
+            self.latency.record(time.perf_counter() - started)
+        finally:
+            self._release(call)
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+
+async def _before(deadline: float, awaitable: Awaitable[T]) -> T:
+    """Await ``awaitable``, raising :class:`TimeoutError` at loop time ``deadline``."""
+
+    return await asyncio.wait_for(awaitable, deadline - asyncio.get_running_loop().time())
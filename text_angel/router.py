@@ -0,0 +1,99 @@
+"""Routing rewrites between the hosted model and the local tone engine.
+
+The hosted model writes better rewrites, but during an upstream brownout
+its latency climbs far past what a user will wait for. :class:`LatencyRouter`
+projects how long a hosted rewrite would take right now, from the rewriter's
+recent call latencies and its queue, and sends the request to the local
+:mod:`text_angel.tone` engine whenever that projection misses the deadline.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+from .rewriter import HostedRewriter
+
+HOSTED = "hosted"
+LOCAL = "local"
+
+
+@dataclass(frozen=True, slots=True)
+class RouterStats:
+    """Counters for a :class:`LatencyRouter`."""
+
+    hosted: int
+    local: int
+    projected_latency: Optional[float]
+    deadline: Optional[float]
+
+
+class LatencyRouter:
+    """Send rewrites to the local engine when the hosted one would be too slow.
+
+    The projection is the ``quantile`` of recent call latencies, or the age
+    of the oldest call still running if that is longer, stretched by the
+    calls queued ahead for a concurrency slot. Counting running calls
+    notices a brownout as it starts, before any slow call has finished.
+    With fewer than ``min_samples`` latencies and no call running, there is
+    nothing to project from and requests go to the hosted model; samples
+    age out of the rewriter's latency window, so after a brownout traffic
+    returns to the hosted model to re-measure it. Requests without a
+    deadline, and without a configured default ``deadline``, always go to
+    the hosted model.
+    """
+
+    def __init__(
+        self,
+        rewriter: HostedRewriter,
+        deadline: Optional[float] = None,
+        quantile: float = 0.95,
+        min_samples: int = 10,
+    ) -> None:
+        self.rewriter = rewriter
+        self.deadline = deadline
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self._hosted = 0
+        self._local = 0
+
+    def projected_latency(self) -> Optional[float]:
+        """Seconds a hosted rewrite started now is expected to take, if known."""
+
+        rewriter = self.rewriter
+        latency = rewriter.latency
+        recent = latency.quantile(self.quantile) if len(latency) >= self.min_samples else None
+        running = rewriter.oldest_in_flight
+        if recent is None and not running:
+            return None
+        service = max(recent or 0.0, running)
+        # Calls that must finish before this one gets a slot, in waves of
+        # ``max_concurrency``.
+        ahead = max(0, rewriter.in_flight + rewriter.waiting - rewriter.max_concurrency + 1)
+        return service * (1 + ahead / rewriter.max_concurrency)
+
+    def budget(self, deadline: Optional[float] = None) -> Optional[float]:
+        """The request's own deadline, else the configured one, in seconds."""
+
+        return self.deadline if deadline is None else deadline
+
+    def choose(self, deadline: Optional[float] = None) -> str:
+        """Return :data:`HOSTED` or :data:`LOCAL` for a request due in ``deadline`` seconds."""
+
+        budget = self.budget(deadline)
+        projected = None if budget is None else self.projected_latency()
+        if projected is not None and projected > budget:
+            self._local += 1
+            return LOCAL
+        self._hosted += 1
+        return HOSTED
+
+    def stats(self) -> RouterStats:
+        """Return a snapshot of the routing counters."""
+
+        return RouterStats(
+            hosted=self._hosted,
+            local=self._local,
+            projected_latency=self.projected_latency(),
+            deadline=self.deadline,
+        )
@@ -2,38 +2,160 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import re
-from dataclasses import dataclass
+import threading
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping, MutableMapping
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from .fuzzy import DeletionIndex
+from .normalize import WILDCARD, NormalizedText, is_normalized_boundary, normalize_text
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class ShieldMatch:
     """Represents a single category match in the shield filter."""
 
     category: str
     word: str
     replacement: str
+    start: int
+    end: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ShieldResult:
-    """Container returned after shielding text."""
+    """Container returned after shielding text.
+
+    Matches are stored as parallel offset arrays (``starts``, ``ends`` and
+    ``category_ids`` indexing into ``categories``) over ``source_text``.
+    Everything else, including ``sanitized_text``, is derived from those
+    spans on access, so callers that only need counts or positions never pay
+    for building strings or match objects. ``config_version`` records which
+    configuration produced the result, for auditing.
+    """
 
-    sanitized_text: str
-    total_matches: int
-    matches_by_category: Mapping[str, int]
-    matched_words: List[ShieldMatch]
+    source_text: str
+    replacement: str
+    categories: Tuple[str, ...]
+    starts: array = field(default_factory=lambda: array("q"))
+    ends: array = field(default_factory=lambda: array("q"))
+    category_ids: array = field(default_factory=lambda: array("I"))
+    config_version: Optional[str] = None
+    _sanitized_text: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
+    @property
+    def total_matches(self) -> int:
+        return len(self.starts)
+
+    @property
+    def matches_by_category(self) -> Mapping[str, int]:
+        counts = [0] * len(self.categories)
+        for category_id in self.category_ids:
+            counts[category_id] += 1
+        return dict(zip(self.categories, counts))
+
+    @property
+    def matched_words(self) -> List[ShieldMatch]:
+        text = self.source_text
+        categories = self.categories
+        return [
+            ShieldMatch(
+                category=categories[category_id],
+                word=text[start:end],
+                replacement=self.replacement,
+                start=start,
+                end=end,
+            )
+            for start, end, category_id in zip(self.starts, self.ends, self.category_ids)
+        ]
+
+    @property
+    def sanitized_text(self) -> str:
+        sanitized = self._sanitized_text
+        if sanitized is None:
+            sanitized = self.render(self.replacement)
+            object.__setattr__(self, "_sanitized_text", sanitized)
+        return sanitized
+
+    def spans(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield ``(start, end, category)`` for every match, in text order."""
+
+        categories = self.categories
+        for start, end, category_id in zip(self.starts, self.ends, self.category_ids):
+            yield start, end, categories[category_id]
+
+    def render(self, replacement: Union[str, Callable[[str], str]]) -> str:
+        """Return ``source_text`` with every match replaced.
+
+        ``replacement`` is either the text to substitute or a callable that
+        receives the matched word and returns its substitute.
+        """
 
-@dataclass(frozen=True)
+        text = self.source_text
+        if not self.starts:
+            return text
+        pieces: List[str] = []
+        cursor = 0
+        for start, end in zip(self.starts, self.ends):
+            pieces.append(text[cursor:start])
+            pieces.append(replacement if isinstance(replacement, str) else replacement(text[start:end]))
+            cursor = end
+        pieces.append(text[cursor:])
+        return "".join(pieces)
+
+
+@dataclass(frozen=True, slots=True)
 class ShieldConfig:
-    """Configuration for the shield filter."""
+    """Configuration for the shield filter.
+
+    With ``normalize`` set, words and messages are folded by
+    :func:`text_angel.normalize.normalize_text` before matching, so
+    obfuscated spellings such as ``h4te`` or ``s.t.u.p.i.d`` are caught too.
+    ``max_distances`` opts categories into typo-tolerant matching: a message
+    word within that many edits of one of the category's words counts as a
+    match (see :mod:`text_angel.fuzzy`).
+
+    Every word has a severity from 1 to 10: its ``(category, word)`` entry in
+    ``word_severities``, else its category's entry in ``severities``, else
+    :data:`MAX_SEVERITY`.
+    Severities only matter for :meth:`tiers`, which filters by user
+    sensitivity; :meth:`compile` always shields every word.
+    """
 
     categories: Mapping[str, List[str]]
     replacement: str = "🛡️"
+    version: Optional[str] = None
+    normalize: bool = False
+    max_distances: Mapping[str, int] = field(default_factory=dict)
+    severities: Mapping[str, int] = field(default_factory=dict)
+    word_severities: Mapping[Tuple[str, str], int] = field(default_factory=dict)
+    _matcher: Optional["ShieldMatcher"] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _tiers: Optional["ShieldTiers"] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def compile_patterns(self) -> Mapping[str, re.Pattern[str]]:
         """Precompile regex patterns for every category.
@@ -56,76 +178,928 @@ class ShieldConfig:
             compiled[category] = re.compile(rf"\b({joined})\b", re.IGNORECASE)
         return compiled
 
+    def compile(self) -> "ShieldMatcher":
+        """Return the compiled matcher for this configuration.
+
+        The matcher is built on first use and cached on the configuration, so
+        repeated calls (and :func:`shield_text` calls given this config) reuse
+        the same compiled patterns.
+        """
+
+        matcher = self._matcher
+        if matcher is None:
+            matcher = ShieldMatcher(self)
+            object.__setattr__(self, "_matcher", matcher)
+        return matcher
+
+    def severity(self, category: str, word: str) -> int:
+        """Return the severity of ``word`` within ``category``."""
+
+        severity = self.word_severities.get((category, word))
+        if severity is None:
+            severity = self.severities.get(category, MAX_SEVERITY)
+        return severity
+
+    def at_sensitivity(self, sensitivity: int) -> "ShieldConfig":
+        """Return a copy holding only the words shielded at ``sensitivity``.
+
+        A word is shielded when ``severity + sensitivity > MAX_SENSITIVITY``,
+        so sensitivity 10 shields everything and 0 shields nothing. Empty
+        categories are kept so results always report the same categories.
+        """
+
+        threshold = MAX_SENSITIVITY + 1 - _clamp_sensitivity(sensitivity)
+        return ShieldConfig(
+            categories={
+                category: [word for word in words if self.severity(category, word) >= threshold]
+                for category, words in self.categories.items()
+            },
+            replacement=self.replacement,
+            version=self.version,
+            normalize=self.normalize,
+            max_distances=self.max_distances,
+            severities=self.severities,
+            word_severities=self.word_severities,
+        )
+
+    def tiers(self) -> "ShieldTiers":
+        """Return the per-sensitivity matchers, compiled once and cached."""
+
+        tiers = self._tiers
+        if tiers is None:
+            tiers = ShieldTiers(self)
+            object.__setattr__(self, "_tiers", tiers)
+        return tiers
+
+
+MIN_SENSITIVITY = 0
+MAX_SENSITIVITY = 10
+MAX_SEVERITY = 10
+
+
+def _clamp_sensitivity(sensitivity: int) -> int:
+    return max(MIN_SENSITIVITY, min(MAX_SENSITIVITY, int(sensitivity)))
+
+
+class ShieldTiers:
+    """Precompiled matchers for every sensitivity level of one configuration.
+
+    All eleven levels are compiled up front, and levels that shield the same
+    set of words share one matcher, so choosing a user's filter at request
+    time is a tuple lookup.
+    """
+
+    __slots__ = ("config", "_matchers")
+
+    def __init__(self, config: ShieldConfig) -> None:
+        self.config = config
+        by_words: Dict[Tuple[Tuple[str, Tuple[str, ...]], ...], ShieldMatcher] = {}
+        matchers: List[ShieldMatcher] = []
+        for sensitivity in range(MIN_SENSITIVITY, MAX_SENSITIVITY + 1):
+            tier = config.at_sensitivity(sensitivity)
+            key = tuple((category, tuple(words)) for category, words in tier.categories.items())
+            matcher = by_words.get(key)
+            if matcher is None:
+                matcher = by_words[key] = tier.compile()
+            matchers.append(matcher)
+        self._matchers = tuple(matchers)
+
+    def matcher(self, sensitivity: int) -> "ShieldMatcher":
+        """Return the matcher for ``sensitivity``, clamped to 0-10."""
+
+        return self._matchers[_clamp_sensitivity(sensitivity) - MIN_SENSITIVITY]
+
+    def shield(self, text: str, sensitivity: int) -> "ShieldResult":
+        """Shield ``text`` for a user at ``sensitivity``."""
+
+        return self.matcher(sensitivity).shield(text)
+
+
+_TOKEN = re.compile(r"\w+")
+_NORMALIZED_TOKEN = re.compile(r"[\w*]+")
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    """Return ``True`` when ``index`` sits on a regex ``\\b`` word boundary."""
+
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+
+def _fold(text: str) -> str:
+    """Lower-case ``text`` without changing its length.
+
+    A handful of characters expand when lower-cased (``"İ"`` becomes two code
+    points); those are left untouched so offsets into the folded text stay
+    valid offsets into the original.
+    """
+
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    pieces = []
+    for char in text:
+        lower = char.lower()
+        pieces.append(lower if len(lower) == 1 else char)
+    return "".join(pieces)
+
+
+def _fold_normalized(word: str) -> str:
+    return normalize_text(word).text
+
+
+class _Automaton:
+    """Aho-Corasick automaton over every word of every shield category.
+
+    States are integers; ``_goto[state]`` maps a character to the next state,
+    ``_fail[state]`` is the failure link and ``_output[state]`` holds the
+    ``(length, category_id)`` of the word ending there, if any. ``_dict_link``
+    points at the nearest terminal state along the failure chain so a scan
+    only visits states that actually end a word. ``max_length`` is the length
+    of the longest word.
+    """
+
+    __slots__ = ("_goto", "_fail", "_output", "_dict_link", "max_length")
+
+    def __init__(self, words: Iterable[Tuple[str, int]]) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        output: List[Optional[Tuple[int, int]]] = [None]
+        max_length = 0
+        for word, category_id in words:
+            max_length = max(max_length, len(word))
+            state = 0
+            for char in word:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append(None)
+                state = next_state
+            # The first category to claim a word keeps it, mirroring the
+            # category order of the configuration.
+            if output[state] is None:
+                output[state] = (len(word), category_id)
+
+        fail = [0] * len(goto)
+        dict_link = [-1] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[child] = target if target != child else 0
+                link = fail[child]
+                dict_link[child] = link if output[link] is not None else dict_link[link]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+        self._dict_link = dict_link
+        self.max_length = max_length
+
+    def first(self, text: str) -> Optional[Tuple[int, int, int]]:
+        """Return the first whole-word match to complete in ``text``, if any.
+
+        Scanning stops as soon as a match is found, so nothing past it is
+        examined.
+        """
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        dict_link = self._dict_link
+
+        state = 0
+        for index, char in enumerate(_fold(text)):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            terminal = state if output[state] is not None else dict_link[state]
+            while terminal > 0:
+                length, category_id = output[terminal]  # type: ignore[misc]
+                end = index + 1
+                start = end - length
+                if _is_boundary(text, start) and _is_boundary(text, end):
+                    return start, end, category_id
+                terminal = dict_link[terminal]
+        return None
+
+    def candidates(
+        self,
+        text: str,
+        min_start: int = 0,
+        boundary: Callable[[str, int], bool] = _is_boundary,
+    ) -> List[Tuple[int, int, int]]:
+        """Return every whole-word ``(start, end, category_id)`` hit in ``text``.
+
+        Hits may overlap. Those starting before ``min_start`` are ignored; the
+        characters there only serve as boundary context.
+        """
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        dict_link = self._dict_link
+
+        candidates: List[Tuple[int, int, int]] = []
+        state = 0
+        for index, char in enumerate(_fold(text)):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            terminal = state if output[state] is not None else dict_link[state]
+            while terminal > 0:
+                length, category_id = output[terminal]  # type: ignore[misc]
+                end = index + 1
+                start = end - length
+                if start >= min_start and boundary(text, start) and boundary(text, end):
+                    candidates.append((start, end, category_id))
+                terminal = dict_link[terminal]
+        return candidates
+
+    def wildcard_candidates(self, text: str) -> List[Tuple[int, int, int]]:
+        """Return hits for normalized words that contain a :data:`WILDCARD`.
+
+        Each such word is walked down the trie with the wildcard standing in
+        for any single letter, and only whole-word hits are kept.
+        """
+
+        goto = self._goto
+        output = self._output
+        candidates: List[Tuple[int, int, int]] = []
+        for token in _NORMALIZED_TOKEN.finditer(text):
+            word = token.group()
+            if WILDCARD not in word:
+                continue
+            states = [0]
+            for char in word:
+                if char == WILDCARD:
+                    states = [
+                        child
+                        for state in states
+                        for key, child in goto[state].items()
+                        if key.isalpha()
+                    ]
+                else:
+                    states = [goto[state][char] for state in states if char in goto[state]]
+                if not states:
+                    break
+            for state in states:
+                hit = output[state]
+                if hit is not None:
+                    candidates.append((token.start(), token.end(), hit[1]))
+                    break
+        return candidates
+
+    def scan(self, text: str, min_start: int = 0) -> Tuple[array, array, array]:
+        """Return whole-word matches in ``text`` as parallel offset arrays.
+
+        The arrays hold each match's start, end and category id; see
+        :func:`_resolve_spans` for how overlapping hits are settled.
+        """
+
+        return _resolve_spans(self.candidates(text, min_start))
+
+
+def _resolve_spans(candidates: List[Tuple[int, int, int]]) -> Tuple[array, array, array]:
+    """Settle overlapping hits leftmost-longest into parallel offset arrays.
+
+    That is the way a reader would pick the words out of the message.
+    """
+
+    starts = array("q")
+    ends = array("q")
+    category_ids = array("I")
+    if not candidates:
+        return starts, ends, category_ids
+    candidates.sort(key=lambda item: (item[0], -item[1]))
+    cursor = 0
+    for start, end, category_id in candidates:
+        if start >= cursor:
+            starts.append(start)
+            ends.append(end)
+            category_ids.append(category_id)
+            cursor = end
+    return starts, ends, category_ids
+
+
+class ShieldMatcher:
+    """Compiled, reusable form of a :class:`ShieldConfig`.
+
+    Building a matcher compiles every category's words into a single
+    automaton; shielding a message afterwards is one left-to-right scan over
+    the message, however many categories or words the configuration holds.
+    Normalizing configurations fold the message first and map the matches
+    back onto the original characters.
+    """
+
+    __slots__ = ("config", "_categories", "_automaton", "_tokens", "_phrases", "_fuzzy")
+
+    def __init__(self, config: ShieldConfig) -> None:
+        self.config = config
+        self._categories = tuple(config.categories.keys())
+        fold = _fold_normalized if config.normalize else _fold
+        words = [
+            (fold(word), category_id)
+            for category_id, category in enumerate(self._categories)
+            for word in (word.strip() for word in config.categories[category])
+            if word
+        ]
+        self._automaton = _Automaton(words)
+
+        # A single-token word matches on whole-word boundaries exactly when it
+        # equals a maximal ``\w+`` run of the message, so detection can look
+        # those up in a dict and leave only the rest to the automaton.
+        tokens: Dict[str, int] = {}
+        phrases: List[Tuple[str, int]] = []
+        for word, category_id in words:
+            if _TOKEN.fullmatch(word):
+                tokens.setdefault(word, category_id)
+            else:
+                phrases.append((word, category_id))
+        self._tokens = tokens
+        self._phrases = _Automaton(phrases) if phrases else None
+
+        max_distances = [config.max_distances.get(category, 0) for category in self._categories]
+        fuzzy = DeletionIndex(
+            (word, category_id, max_distances[category_id])
+            for word, category_id in tokens.items()
+        )
+        self._fuzzy = fuzzy if fuzzy else None
+
+    @classmethod
+    def _prebuilt(cls, config: ShieldConfig, automaton: "_Automaton") -> "ShieldMatcher":
+        """Wrap an automaton compiled elsewhere (see :mod:`text_angel.compiled`).
+
+        Such matchers skip the per-process token table, so detection runs on
+        the automaton's early-exit scan instead.
+        """
+
+        matcher = cls.__new__(cls)
+        matcher.config = config
+        matcher._categories = tuple(config.categories.keys())
+        matcher._automaton = automaton
+        matcher._tokens = None
+        matcher._phrases = None
+        matcher._fuzzy = None
+        return matcher
+
+    @property
+    def _exact_only(self) -> bool:
+        return not self.config.normalize and self._fuzzy is None
+
+    @property
+    def _max_span(self) -> int:
+        """Longest stretch of text a single match can cover."""
+
+        extra = self._fuzzy.max_distance if self._fuzzy is not None else 0
+        return self._automaton.max_length + extra
+
+    def contains_any(self, text: str) -> bool:
+        """Return ``True`` if ``text`` contains any shielded word.
+
+        This is the cheap path for yes/no checks: it stops at the first
+        whole-word hit and never builds a :class:`ShieldResult`.
+        """
+
+        if not self._exact_only:
+            return len(self._spans(text)[0]) > 0
+        if self._tokens is None:
+            return self._automaton.first(text) is not None
+        folded = _fold(text)
+        tokens = self._tokens
+        for token in _TOKEN.findall(folded):
+            if token in tokens:
+                return True
+        return self._phrases is not None and self._phrases.first(text) is not None
+
+    def first_match(self, text: str) -> Optional[ShieldMatch]:
+        """Return the first shielded word to complete in ``text``, if any."""
+
+        best: Optional[Tuple[int, int, int]] = None
+        if not self._exact_only:
+            starts, ends, category_ids = self._spans(text)
+            if starts:
+                best = (starts[0], ends[0], category_ids[0])
+            return self._match(text, best)
+        tokens = self._tokens
+        if tokens is None:
+            return self._match(text, self._automaton.first(text))
+        for token in _TOKEN.finditer(_fold(text)):
+            category_id = tokens.get(token.group())
+            if category_id is not None:
+                best = (token.start(), token.end(), category_id)
+                break
+        if self._phrases is not None:
+            phrase = self._phrases.first(text if best is None else text[: best[1]])
+            if phrase is not None and (best is None or phrase[1] <= best[1]):
+                best = phrase
+        return self._match(text, best)
+
+    def _match(self, text: str, span: Optional[Tuple[int, int, int]]) -> Optional[ShieldMatch]:
+        if span is None:
+            return None
+        start, end, category_id = span
+        return ShieldMatch(
+            category=self._categories[category_id],
+            word=text[start:end],
+            replacement=self.config.replacement,
+            start=start,
+            end=end,
+        )
+
+    def _spans(self, text: str, min_start: int = 0) -> Tuple[array, array, array]:
+        # ``min_start`` is only honoured for non-normalizing configurations,
+        # which are the only ones :class:`ShieldStream` accepts.
+        if self._exact_only:
+            return self._automaton.scan(text, min_start)
+        if not self.config.normalize:
+            candidates = self._automaton.candidates(text, min_start)
+            self._add_fuzzy_candidates(_fold(text), candidates, min_start)
+            return _resolve_spans(candidates)
+
+        folded = normalize_text(text)
+        candidates = self._normalized_candidates(folded)
+        if folded.stretched:
+            # A stretched run ("iiiidiot") may stand for one letter as well
+            # as two, so the text is matched with both readings.
+            candidates.extend(self._normalized_candidates(normalize_text(text, stretch=1)))
+        return _resolve_spans(candidates)
+
+    def _normalized_candidates(self, folded: NormalizedText) -> List[Tuple[int, int, int]]:
+        """Return hits in ``folded`` as offsets into the original text."""
+
+        candidates = self._automaton.candidates(folded.text, boundary=is_normalized_boundary)
+        candidates.extend(self._automaton.wildcard_candidates(folded.text))
+        self._add_fuzzy_candidates(folded.text, candidates)
+        starts = folded.starts
+        ends = folded.ends
+        return [
+            (starts[start], ends[end - 1], category_id)
+            for start, end, category_id in candidates
+        ]
+
+    def _add_fuzzy_candidates(
+        self, folded: str, candidates: List[Tuple[int, int, int]], min_start: int = 0
+    ) -> None:
+        fuzzy = self._fuzzy
+        if fuzzy is None:
+            return
+        tokens = self._tokens
+        for token in _TOKEN.finditer(folded, min_start):
+            start = token.start()
+            if start and _is_word_char(folded[start - 1]):
+                # The tail of a word that began before ``min_start``.
+                continue
+            word = token.group()
+            if word in tokens:
+                continue
+            category_id = fuzzy.lookup(word)
+            if category_id is not None:
+                candidates.append((start, token.end(), category_id))
+
+    def shield(self, text: str) -> ShieldResult:
+        """Apply the compiled shield filter to ``text``."""
+
+        starts, ends, category_ids = self._spans(text)
+        return ShieldResult(
+            source_text=text,
+            replacement=self.config.replacement,
+            categories=self._categories,
+            starts=starts,
+            ends=ends,
+            category_ids=category_ids,
+            config_version=self.config.version,
+        )
+
+
+class ShieldStream:
+    """Incremental shielder for text that arrives in chunks.
+
+    :meth:`feed` accepts the next chunk and returns the sanitized text that is
+    now final; :meth:`close` flushes the rest. Only the trailing characters
+    that could still belong to a word split across chunks (at most the length
+    of the longest shield word, plus any typo allowance) are held back
+    between calls, so memory stays bounded by the chunk size. The output is
+    identical to shielding the concatenated input in one go.
+    """
+
+    def __init__(self, config: "ShieldSource") -> None:
+        self.matcher = _as_matcher(config)
+        if self.matcher.config.normalize:
+            # Folding can shrink arbitrarily long runs of text into one word,
+            # so there is no bound on how much would have to be held back.
+            raise ShieldingError("Normalizing shield configurations cannot be streamed.")
+        self.matches_by_category: Dict[str, int] = {
+            category: 0 for category in self.matcher._categories
+        }
+        self._context = ""
+        self._pending = ""
+        self._closed = False
+
+    @property
+    def total_matches(self) -> int:
+        return sum(self.matches_by_category.values())
+
+    def feed(self, chunk: str) -> str:
+        """Add ``chunk`` to the stream and return the sanitized text now final."""
+
+        if self._closed:
+            raise ShieldingError("Cannot feed a shield stream after it was closed.")
+        return self._advance(chunk, final=False)
+
+    def close(self) -> str:
+        """Flush and return the remaining sanitized text."""
+
+        if self._closed:
+            return ""
+        self._closed = True
+        return self._advance("", final=True)
+
+    def _advance(self, chunk: str, final: bool) -> str:
+        buffer = self._context + self._pending + chunk
+        skip = len(self._context)
+        # A match starting at or after ``limit`` might continue into text that
+        # has not arrived yet, or need the next character for its boundary.
+        limit = len(buffer) if final else len(buffer) - self.matcher._max_span
+        if limit <= skip:
+            self._pending = buffer[skip:]
+            return ""
+
+        replacement = self.matcher.config.replacement
+        categories = self.matcher._categories
+        starts, ends, category_ids = self.matcher._spans(buffer, min_start=skip)
+        pieces: List[str] = []
+        cursor = skip
+        for start, end, category_id in zip(starts, ends, category_ids):
+            if start >= limit:
+                break
+            self.matches_by_category[categories[category_id]] += 1
+            pieces.append(buffer[cursor:start])
+            pieces.append(replacement)
+            cursor = end
+        cut = max(cursor, limit)
+        pieces.append(buffer[cursor:cut])
+
+        self._context = buffer[cut - 1 : cut]
+        self._pending = buffer[cut:]
+        return "".join(pieces)
+
 
 class ShieldingError(RuntimeError):
     """Raised when the shield configuration cannot be loaded."""
 
 
-def _validate_config(raw: Mapping[str, Iterable[str]]) -> Dict[str, List[str]]:
+class ShieldConfigNotFound(ShieldingError, FileNotFoundError):
+    """Raised when the shield configuration file does not exist."""
+
+
+LIST_CATEGORY = "blocked"
+"""Category holding the words of a configuration written as a bare list."""
+
+
+def _validate_severity(key: str, severity: object) -> int:
+    if isinstance(severity, bool) or not isinstance(severity, int) or not 1 <= severity <= MAX_SEVERITY:
+        raise ShieldingError(
+            f"Invalid severity for category '{key}'. Use an integer from 1 to {MAX_SEVERITY}."
+        )
+    return severity
+
+
+def _validate_words(
+    key: str, words: object, word_severities: Dict[Tuple[str, str], int]
+) -> List[str]:
+    if isinstance(words, str) or not isinstance(words, Iterable):
+        raise ShieldingError("Shield category values must be iterable.")
+    cleaned = []
+    for word in words:
+        severity = None
+        if isinstance(word, Mapping):
+            severity = _validate_severity(key, word.get("severity", MAX_SEVERITY))
+            word = word.get("word")
+        if not isinstance(word, str):
+            raise ShieldingError(
+                f"Invalid word for category '{key}'. Only strings are allowed."
+            )
+        word = word.strip()
+        if word:
+            cleaned.append(word)
+            if severity is not None:
+                word_severities[key, word] = severity
+    return cleaned
+
+
+def _validate_config(raw: Mapping[str, object]) -> Dict[str, Mapping[str, object]]:
+    """Validate the raw JSON mapping of categories into ``ShieldConfig`` fields.
+
+    A category maps either to a list of words or to an object of the form
+    ``{"words": [...], "max_distance": 1, "severity": 7}``. A word may itself
+    be ``{"word": "...", "severity": 9}`` to override its category's severity.
+    """
+
     validated: Dict[str, List[str]] = {}
-    for key, words in raw.items():
+    max_distances: Dict[str, int] = {}
+    severities: Dict[str, int] = {}
+    word_severities: Dict[Tuple[str, str], int] = {}
+    for key, value in raw.items():
         if not isinstance(key, str):
             raise ShieldingError("Shield category keys must be strings.")
-        if not isinstance(words, Iterable):
-            raise ShieldingError("Shield category values must be iterable.")
-        cleaned = []
-        for word in words:
-            if not isinstance(word, str):
+        if isinstance(value, Mapping):
+            distance = value.get("max_distance", 0)
+            if isinstance(distance, bool) or not isinstance(distance, int) or not 0 <= distance <= 3:
                 raise ShieldingError(
-                    f"Invalid word for category '{key}'. Only strings are allowed."
+                    f"Invalid max_distance for category '{key}'. Use an integer from 0 to 3."
                 )
-            word = word.strip()
-            if word:
-                cleaned.append(word)
-        validated[key] = cleaned
+            if distance:
+                max_distances[key] = distance
+            if "severity" in value:
+                severities[key] = _validate_severity(key, value["severity"])
+            value = value.get("words", [])
+        validated[key] = _validate_words(key, value, word_severities)
     if not validated:
         raise ShieldingError("Shield configuration must define at least one category.")
-    return validated
-
+    return {
+        "categories": validated,
+        "max_distances": max_distances,
+        "severities": severities,
+        "word_severities": word_severities,
+    }
 
-def load_shield_config(path: Path) -> ShieldConfig:
-    """Load the shield configuration from a JSON file."""
 
+def _parse_shield_config(raw: bytes, path: Path, normalize: bool = False) -> ShieldConfig:
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except FileNotFoundError as exc:
-        raise ShieldingError(f"Shield configuration not found: {path}") from exc
-    except json.JSONDecodeError as exc:
+        data = json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
         raise ShieldingError(f"Shield configuration is not valid JSON: {path}") from exc
 
+    if isinstance(data, list):
+        # A flat word list, as in ``shield_filter/shield_filter_words.json``.
+        data = {LIST_CATEGORY: data}
     if not isinstance(data, Mapping):
-        raise ShieldingError("Shield configuration must be an object mapping categories to words.")
+        raise ShieldingError(
+            "Shield configuration must be an object mapping categories to words, "
+            "or a list of words."
+        )
+
+    return ShieldConfig(
+        **_validate_config(data),  # type: ignore[arg-type]
+        version=hashlib.sha256(raw).hexdigest()[:12],
+        normalize=normalize,
+    )
+
+
+def _read_config_bytes(path: Path) -> bytes:
+    try:
+        return path.read_bytes()
+    except FileNotFoundError as exc:
+        raise ShieldConfigNotFound(f"Shield configuration not found: {path}") from exc
 
-    categories = _validate_config(data)
-    return ShieldConfig(categories=categories)
 
+def load_shield_config(path: Path, normalize: bool = False) -> ShieldConfig:
+    """Load the shield configuration from a JSON file.
 
-def shield_text(text: str, config: ShieldConfig) -> ShieldResult:
-    """Apply the shield filter to the provided text."""
+    The file maps categories to words, or is a bare list of words that all
+    go in the :data:`LIST_CATEGORY` category. The returned configuration's
+    ``version`` is a short hash of the file's contents. ``normalize``
+    enables obfuscation-aware matching.
+    """
 
-    patterns = config.compile_patterns()
-    matches_by_category: MutableMapping[str, int] = {
-        key: 0 for key in config.categories.keys()
-    }
-    matched_words: List[ShieldMatch] = []
-    sanitized_text = text
-
-    for category, pattern in patterns.items():
-        def replacement(match: re.Match[str]) -> str:
-            word = match.group(0)
-            matches_by_category[category] += 1
-            matched_words.append(
-                ShieldMatch(category=category, word=word, replacement=config.replacement)
+    return _parse_shield_config(_read_config_bytes(path), path, normalize)
+
+
+class ShieldConfigWatcher:
+    """Shield configuration that follows its JSON file as it changes.
+
+    :meth:`reload` checks the file's modification time and size, and when they
+    change, its content hash. A changed file is parsed and compiled off to the
+    side, and only a fully built :class:`ShieldMatcher` replaces the active one,
+    in a single attribute assignment. Callers that grabbed :attr:`matcher`
+    before a swap keep using it undisturbed. :meth:`start` polls in a
+    background thread. A file that fails to load leaves the active matcher in
+    place and is reported through :attr:`last_error`; only the first load,
+    in the constructor, raises :class:`ShieldingError` instead.
+    """
+
+    def __init__(self, path: Path, interval: float = 5.0, normalize: bool = False) -> None:
+        self.path = Path(path)
+        self.interval = interval
+        self.normalize = normalize
+        self.last_error: Optional[ShieldingError] = None
+        self._stamp = self._file_stamp()
+        self._matcher = load_shield_config(self.path, normalize).compile()
+        self._reload_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def matcher(self) -> ShieldMatcher:
+        """The currently active compiled matcher."""
+
+        return self._matcher
+
+    @property
+    def version(self) -> Optional[str]:
+        """Version of the currently active configuration."""
+
+        return self._matcher.config.version
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile the matcher if the file changed; return whether it did."""
+
+        with self._reload_lock:
+            stamp = self._file_stamp()
+            if not force and stamp == self._stamp:
+                return False
+            try:
+                raw = _read_config_bytes(self.path)
+                if not force and hashlib.sha256(raw).hexdigest()[:12] == self.version:
+                    self._stamp = stamp
+                    return False
+                matcher = _parse_shield_config(raw, self.path, self.normalize).compile()
+            except ShieldingError as exc:
+                self.last_error = exc
+                return False
+            self._stamp = stamp
+            self.last_error = None
+            self._matcher = matcher
+            return True
+
+    def start(self) -> "ShieldConfigWatcher":
+        """Start polling the file every ``interval`` seconds in the background."""
+
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._poll, name="shield-config-watcher", daemon=True
             )
-            return config.replacement
+            self._thread.start()
+        return self
 
-        sanitized_text = pattern.sub(replacement, sanitized_text)
+    def stop(self) -> None:
+        """Stop the background polling thread, if it is running."""
 
-    total_matches = sum(matches_by_category.values())
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+            self._thread = None
+
+    def _poll(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.reload()
+
+    def __enter__(self) -> "ShieldConfigWatcher":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+
+ShieldSource = Union[ShieldConfig, ShieldMatcher, ShieldConfigWatcher]
+
+
+def _as_matcher(config: ShieldSource) -> ShieldMatcher:
+    if isinstance(config, ShieldMatcher):
+        return config
+    if isinstance(config, ShieldConfigWatcher):
+        return config.matcher
+    return config.compile()
+
+
+def shield_text(text: str, config: ShieldSource) -> ShieldResult:
+    """Apply the shield filter to the provided text.
+
+    ``config`` may be a :class:`ShieldConfig`, whose compiled matcher is
+    cached after the first call, a prebuilt :class:`ShieldMatcher`, or a
+    :class:`ShieldConfigWatcher`, whose active matcher is used.
+    """
+
+    matcher = _as_matcher(config)
+    return matcher.shield(text)
+
+
+def shield_contains_any(text: str, config: ShieldSource) -> bool:
+    """Return ``True`` if ``text`` contains any word from the shield filter."""
+
+    matcher = _as_matcher(config)
+    return matcher.contains_any(text)
+
+
+def shield_first_match(
+    text: str, config: ShieldSource
+) -> Optional[ShieldMatch]:
+    """Return the first shielded word in ``text``, or ``None`` if it is clean."""
+
+    matcher = _as_matcher(config)
+    return matcher.first_match(text)
+
+
+def shield_chunks(chunks: Iterable[str], config: ShieldSource) -> Iterator[str]:
+    """Shield text arriving as ``chunks``, yielding sanitized chunks.
+
+    Words split across chunk boundaries are still caught; see
+    :class:`ShieldStream`.
+    """
+
+    stream = ShieldStream(config)
+    for chunk in chunks:
+        sanitized = stream.feed(chunk)
+        if sanitized:
+            yield sanitized
+    tail = stream.close()
+    if tail:
+        yield tail
+
+
+_WORKER_MATCHER: Optional[ShieldMatcher] = None
+
+
+def _init_shield_worker(matcher: ShieldMatcher) -> None:
+    global _WORKER_MATCHER
+    _WORKER_MATCHER = matcher
+
+
+def _shield_batch(texts: List[str]) -> List[ShieldResult]:
+    matcher = _WORKER_MATCHER
+    if matcher is None:
+        raise ShieldingError("Shield worker was started without a matcher.")
+    return [matcher.shield(text) for text in texts]
+
+
+def shield_texts(
+    texts: Iterable[str],
+    config: ShieldSource,
+    workers: Optional[int] = None,
+    chunksize: int = 256,
+) -> Iterator[ShieldResult]:
+    """Shield every message in ``texts``, yielding results in input order.
+
+    ``texts`` is consumed lazily, so arbitrarily large iterables can be
+    streamed through. When there is more than one worker and at least
+    ``workers * chunksize`` messages, batches of ``chunksize`` messages are
+    shielded in a process pool; each worker receives the compiled matcher once
+    when it starts. Smaller inputs are shielded in-process, where the cost of
+    starting a pool would outweigh the work.
+    """
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1.")
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1.")
+
+    matcher = _as_matcher(config)
+    iterator = iter(texts)
+    head = list(islice(iterator, workers * chunksize))
+
+    if workers == 1 or len(head) < workers * chunksize:
+        for text in head:
+            yield matcher.shield(text)
+        for text in iterator:
+            yield matcher.shield(text)
+        return
+
+    batches = [head[start : start + chunksize] for start in range(0, len(head), chunksize)]
+    pending: Deque[Future[List[ShieldResult]]] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_shield_worker, initargs=(matcher,)
+    ) as executor:
+        # Keep a bounded number of batches in flight so memory stays flat no
+        # matter how long the input is.
+        max_pending = workers * 2
+        for batch in _chain_batches(batches, iterator, chunksize):
+            pending.append(executor.submit(_shield_batch, batch))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _chain_batches(
+    head: Iterable[List[str]], rest: Iterator[str], chunksize: int
+) -> Iterator[List[str]]:
+    yield from head
+    while True:
+        batch = list(islice(rest, chunksize))
+        if not batch:
+            return
+        yield batch
 
-    return ShieldResult(
-        sanitized_text=sanitized_text,
-        total_matches=total_matches,
-        matches_by_category=dict(matches_by_category),
-        matched_words=matched_words,
-    )
@@ -0,0 +1,67 @@
+"""Coalescing identical concurrent calls for the Text Angel API.
+
+When a whole class pastes the same message at once, every request would
+otherwise make its own identical upstream call. :class:`SingleFlight` runs
+one call per key at a time; callers that arrive while it is running await
+the same call and receive its result or its exception.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers with the same key.
+
+    The shared call runs as its own task, so a caller that is cancelled
+    (say, because its client disconnected) stops waiting without cancelling
+    the call for everyone else. Once the call finishes, the next caller with
+    that key starts a new one.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Task[object]"] = {}
+        self._started = 0
+        self._coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Shared calls currently running."""
+
+        return len(self._calls)
+
+    @property
+    def started(self) -> int:
+        """Calls that actually ran."""
+
+        return self._started
+
+    @property
+    def coalesced(self) -> int:
+        """Callers that joined a call already in flight instead of starting one."""
+
+        return self._coalesced
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Await ``call()``, or the call already running for ``key``."""
+
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self._started += 1
+        else:
+            self._coalesced += 1
+        return await asyncio.shield(task)  # type: ignore[return-value]
+
+    def _finish(self, key: Hashable, task: "asyncio.Task[object]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved in case every caller gave up.
+            task.exception()
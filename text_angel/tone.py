@@ -1,9 +1,20 @@
-"""Tone rewriting helpers for the Text Angel Streamlit experience."""
+"""Tone rewriting helpers for the Text Angel Streamlit experience.
+
+Tones are defined once, in ``tone_prompts.json``: each entry may carry the
+prompts used for hosted (LLM) rewrites, a recipe for the local rewrite, and
+the colours and emoji the UIs show. :data:`TONES` reads that file the first
+time a tone is asked for and builds each tone only when it is first used.
+"""
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Callable, Dict, List
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 import re
 
@@ -47,97 +58,288 @@ POLITE_REPLACEMENTS = {
 }
 
 
-def _apply_replacements(text: str, replacements: Dict[str, str]) -> str:
-    result = text
-    for pattern, repl in replacements.items():
-        result = re.sub(pattern, repl, result, flags=re.IGNORECASE)
-    return result
+class _Replacer:
+    """A replacement table compiled into one case-insensitive alternation.
 
+    Each pattern becomes one capturing group, so the group that matched
+    (``match.lastindex``) picks the replacement and the text is scanned once
+    however many entries the table holds. Replacements are inserted
+    literally and are not scanned again. The pattern is compiled on first use.
+    """
 
-def _normalize_whitespace(text: str) -> str:
-    return re.sub(r"\s+", " ", text).strip()
+    __slots__ = ("_table", "_pattern", "_replacements")
 
+    def __init__(self, replacements: Dict[str, str]) -> None:
+        self._table = replacements
+        self._pattern: Optional[re.Pattern[str]] = None
+        self._replacements = ("",) + tuple(replacements.values())
 
-def _sentence_case(text: str) -> str:
-    if not text:
-        return text
-    text = text.strip()
-    return text[0].upper() + text[1:]
+    def _replace(self, match: re.Match[str]) -> str:
+        return self._replacements[match.lastindex or 0]
+
+    def sub(self, text: str) -> str:
+        pattern = self._pattern
+        if pattern is None:
+            pattern = re.compile(
+                "|".join(f"({pattern})" for pattern in self._table), re.IGNORECASE
+            )
+            self._pattern = pattern
+        return pattern.sub(self._replace, text)
 
 
-def _ensure_period(text: str) -> str:
+def _tidy(text: str) -> str:
+    """Collapse whitespace, capitalise and end with a period."""
+
+    text = " ".join(text.split())
     if not text:
         return text
-    if text[-1] in {".", "!", "?"}:
-        return text
-    return text + "."
+    text = text[0].upper() + text[1:]
+    if text[-1] not in ".!?":
+        text += "."
+    return text
+
+
+# The local tones share their early steps, so they are described as a small
+# graph of named stages: each stage is computed from its parent stage, and
+# ``"text"`` is the message itself. Rewriting into several tones at once
+# computes every stage they need exactly once.
+_STAGES: Dict[str, Tuple[str, Callable[[str], str]]] = {
+    "softened": ("text", _Replacer(SOFTEN_REPLACEMENTS).sub),
+    "polished": ("softened", _Replacer(POLITE_REPLACEMENTS).sub),
+    "tidy": ("text", _tidy),
+    "softened_tidy": ("softened", _tidy),
+    "polished_tidy": ("polished", _tidy),
+}
+
+
+def _resolve(stage: str, values: Dict[str, str]) -> str:
+    value = values.get(stage)
+    if value is None:
+        parent, step = _STAGES[stage]
+        value = step(_resolve(parent, values))
+        values[stage] = value
+    return value
+
+
+@dataclass(frozen=True)
+class _Template:
+    """Transform that wraps one stage's output in fixed text."""
+
+    stage: str
+    prefix: str = ""
+    suffix: str = ""
 
+    def render(self, values: Dict[str, str]) -> str:
+        return f"{self.prefix}{_resolve(self.stage, values)}{self.suffix}"
 
-def _gentle_transform(text: str) -> str:
-    softened = _apply_replacements(text, SOFTEN_REPLACEMENTS)
-    softened = _normalize_whitespace(softened)
-    softened = _sentence_case(softened)
-    softened = _ensure_period(softened)
-    return f"I want to share this gently: {softened}"
+    def __call__(self, text: str) -> str:
+        return self.render({"text": text})
 
 
-def _professional_transform(text: str) -> str:
-    polished = _apply_replacements(text, {**SOFTEN_REPLACEMENTS, **POLITE_REPLACEMENTS})
-    polished = _normalize_whitespace(polished)
-    polished = _sentence_case(polished)
-    polished = _ensure_period(polished)
-    return f"For clarity, {polished} I appreciate your attention to this matter."
+DEFAULT_TONES_PATH = Path(
+    os.getenv("TEXT_ANGEL_TONES_PATH", Path(__file__).resolve().parents[1] / "tone_prompts.json")
+)
 
+DEFAULT_SYSTEM_PROMPT = "You are a kind and emotionally intelligent assistant."
 
-def _empathetic_transform(text: str) -> str:
-    softened = _apply_replacements(text, SOFTEN_REPLACEMENTS)
-    softened = _normalize_whitespace(softened)
-    softened = _sentence_case(softened)
-    softened = _ensure_period(softened)
-    return (
-        "I hear how important this is and I want to respond with care: "
-        f"{softened} I'm here with you and open to continuing the conversation."
+
+@dataclass(frozen=True)
+class Tone:
+    """One tone from the tone registry.
+
+    ``prompt`` and ``system`` drive hosted rewrites; ``profile`` is the local
+    rewrite, or ``None`` for tones that only exist for the hosted model.
+    ``style`` holds presentation hints such as ``color`` and ``emoji``.
+    """
+
+    key: str
+    label: str
+    description: str = ""
+    prompt: Optional[str] = None
+    system: Optional[str] = None
+    profile: Optional[ToneProfile] = None
+    style: Mapping[str, str] = field(default_factory=dict, compare=False)
+
+    @property
+    def hosted(self) -> bool:
+        return self.prompt is not None or self.system is not None
+
+    def messages(self, message: str) -> List[Dict[str, str]]:
+        """Chat messages asking a hosted model to rewrite ``message`` in this tone."""
+
+        content = message if self.prompt is None else f"{self.prompt} Message: {message}"
+        return [
+            {"role": "system", "content": self.system or DEFAULT_SYSTEM_PROMPT},
+            {"role": "user", "content": content},
+        ]
+
+
+def _text_field(key: str, definition: Mapping[str, Any], name: str) -> Optional[str]:
+    value = definition.get(name)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"Tone '{key}': '{name}' must be a string.")
+    return value
+
+
+def _build_tone(key: str, definition: Any) -> Tone:
+    if isinstance(definition, str):
+        # The original file format: a bare system prompt per tone.
+        definition = {"system": definition}
+    if not isinstance(definition, Mapping):
+        raise ValueError(f"Tone '{key}' must be a prompt string or an object.")
+    label = _text_field(key, definition, "label") or key.title()
+    description = _text_field(key, definition, "description") or ""
+
+    profile = None
+    recipe = definition.get("local")
+    if recipe is not None:
+        if not isinstance(recipe, Mapping) or recipe.get("stage") not in _STAGES:
+            raise ValueError(
+                f"Tone '{key}': 'local' needs a 'stage' from {', '.join(sorted(_STAGES))}."
+            )
+        template = _Template(
+            recipe["stage"],
+            prefix=_text_field(key, recipe, "prefix") or "",
+            suffix=_text_field(key, recipe, "suffix") or "",
+        )
+        profile = ToneProfile(name=label, description=description, transform=template)
+
+    style = definition.get("style", {})
+    if not isinstance(style, Mapping):
+        raise ValueError(f"Tone '{key}': 'style' must be an object.")
+    return Tone(
+        key=key,
+        label=label,
+        description=description,
+        prompt=_text_field(key, definition, "prompt"),
+        system=_text_field(key, definition, "system"),
+        profile=profile,
+        style=dict(style),
     )
 
 
-def _direct_transform(text: str) -> str:
-    normalized = _normalize_whitespace(text)
-    normalized = _sentence_case(normalized)
-    normalized = _ensure_period(normalized)
-    return f"Here's the message in a clear, calm tone: {normalized}"
-
-
-AVAILABLE_TONES: List[ToneProfile] = [
-    ToneProfile(
-        name="Gentle & Kind",
-        description="Softens the language and adds a gentle introduction.",
-        transform=_gentle_transform,
-    ),
-    ToneProfile(
-        name="Professional",
-        description="Adds polish suitable for workplace conversations.",
-        transform=_professional_transform,
-    ),
-    ToneProfile(
-        name="Empathetic",
-        description="Centers care and emotional validation.",
-        transform=_empathetic_transform,
-    ),
-    ToneProfile(
-        name="Calm & Direct",
-        description="Keeps the core message while removing sharp edges.",
-        transform=_direct_transform,
-    ),
-]
+class ToneRegistry:
+    """Tone definitions loaded from a JSON file, each built on first use.
+
+    Tone names are case-insensitive. The file is read the first time any
+    tone is requested; a tone's local rewrite tables are compiled the first
+    time it rewrites something. Use the shared :data:`TONES` registry so
+    every caller in a process reuses the same tone objects.
+    """
+
+    def __init__(self, path: Path = DEFAULT_TONES_PATH) -> None:
+        self.path = Path(path)
+        self._definitions: Optional[Dict[str, Any]] = None
+        self._tones: Dict[str, Tone] = {}
+        self._profiles: Optional[List[ToneProfile]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Any]:
+        definitions = self._definitions
+        if definitions is None:
+            with self._lock:
+                if self._definitions is None:
+                    with open(self.path, encoding="utf-8") as handle:
+                        raw = json.load(handle)
+                    if not isinstance(raw, Mapping) or not raw:
+                        raise ValueError(f"{self.path} must map tone names to definitions.")
+                    self._definitions = {key.upper(): value for key, value in raw.items()}
+                definitions = self._definitions
+        return definitions
+
+    def names(self, hosted: bool = False) -> List[str]:
+        """Tone names in file order; only hosted-rewrite tones if ``hosted``."""
+
+        return [name for name in self._load() if not hosted or self.get(name).hosted]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name.upper() in self._load()
+
+    def get(self, name: str) -> Tone:
+        """Return the tone called ``name``, building it on first use."""
+
+        key = name.upper()
+        tone = self._tones.get(key)
+        if tone is None:
+            definitions = self._load()
+            if key not in definitions:
+                raise ValueError(f"Invalid tone. Choose from {', '.join(definitions)}.")
+            tone = _build_tone(key, definitions[key])
+            with self._lock:
+                tone = self._tones.setdefault(key, tone)
+        return tone
+
+    def profiles(self) -> List[ToneProfile]:
+        """Local rewrite profiles of every tone that has one, in file order."""
+
+        profiles = self._profiles
+        if profiles is None:
+            profiles = [
+                tone.profile
+                for tone in (self.get(name) for name in self._load())
+                if tone.profile is not None
+            ]
+            self._profiles = profiles
+        return profiles
+
+
+TONES = ToneRegistry()
+"""The process-wide tone registry."""
+
+
+def __getattr__(name: str) -> Any:
+    # ``AVAILABLE_TONES`` is resolved lazily so importing the package does not
+    # read the tone file.
+    if name == "AVAILABLE_TONES":
+        return TONES.profiles()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_GUIDANCE = (
+    "This rewrite uses Text Angel's local tone templates. "
+    "For production deployments you can connect the app to the hosted API "
+    "for GPT-powered rewrites."
+)
+
+REWRITE_CACHE_SIZE = 4096
+"""Distinct ``(text, tones)`` fan-outs remembered by :func:`rewrite_many`."""
 
 
 def rewrite_text(text: str, tone: ToneProfile) -> RewriteResult:
     """Rewrite ``text`` according to the provided ``tone`` profile."""
 
     rewritten = tone.transform(text)
-    guidance = (
-        "This rewrite uses Text Angel's local tone templates. "
-        "For production deployments you can connect the app to the hosted API "
-        "for GPT-powered rewrites."
-    )
-    return RewriteResult(tone=tone, rewritten_text=rewritten, guidance=guidance)
+    return RewriteResult(tone=tone, rewritten_text=rewritten, guidance=_GUIDANCE)
+
+
+@lru_cache(maxsize=REWRITE_CACHE_SIZE)
+def _rewrite_tones(text: str, tones: Tuple[ToneProfile, ...]) -> Tuple[RewriteResult, ...]:
+    values = {"text": text}
+    results = []
+    for tone in tones:
+        transform = tone.transform
+        if isinstance(transform, _Template):
+            rewritten = transform.render(values)
+        else:
+            rewritten = transform(text)
+        results.append(RewriteResult(tone=tone, rewritten_text=rewritten, guidance=_GUIDANCE))
+    return tuple(results)
+
+
+def rewrite_many(
+    texts: Iterable[str], tones: Optional[Sequence[ToneProfile]] = None
+) -> List[List[RewriteResult]]:
+    """Rewrite every text into every tone (every local tone by default).
+
+    Steps the tones share, such as softening, run once per text, and recent
+    fan-outs are memoized, so previewing the same message again is free.
+    """
+
+    selected = tuple(TONES.profiles() if tones is None else tones)
+    return [list(_rewrite_tones(text, selected)) for text in texts]
+
+
+def rewrite_all_tones(text: str) -> List[RewriteResult]:
+    """Rewrite ``text`` into each local tone, in registry order."""
+
+    return rewrite_many([text])[0]
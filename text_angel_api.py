@@ -3,11 +3,37 @@
 Protective rewrite and shielding service for emotional tone refinement.
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from pathlib import Path
+from typing import AsyncIterator
+
 from dotenv import load_dotenv
-import os, re
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from text_angel import (
+    TONES,
+    ShieldConfig,
+    ShieldConfigWatcher,
+    Tone,
+    rewrite_text,
+    shield_contains_any,
+    shield_text,
+)
+from text_angel.compiled import load_compiled_shield
+from text_angel.harshness import load_harshness_model
+from text_angel.microbatch import MicroBatcher
+from text_angel.resilience import CircuitBreaker, CircuitOpen, ResilientRewriter
+from text_angel.rewrite_cache import RewriteCache, rewrite_cache_key
+from text_angel.rewriter import DEFAULT_MODEL, UpstreamError, UpstreamTimeout
+from text_angel.router import HOSTED, LOCAL, LatencyRouter
+from text_angel.singleflight import SingleFlight
 
 # === Load environment ===
 load_dotenv()
@@ -15,30 +41,80 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise RuntimeError("❌ OPENAI_API_KEY not found. Please set it in your environment or .env file.")
 
-# === Initialize OpenAI client ===
-try:
-    # For modern SDK (>=1.0)
-    from openai import OpenAI
-    client = OpenAI(api_key=OPENAI_API_KEY)
-except Exception:
-    # For legacy SDK (<1.0)
-    import openai
-    openai.api_key = OPENAI_API_KEY
-    client = None
-    
-# === Handle either modern (OpenAI class) or legacy (openai.api_key) client ===
-try:
-    from openai import OpenAI  # ✅ modern client (v1.x+)
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    use_new_client = True
-except ImportError:
-    import openai               # 🕰️ legacy fallback (v0.28 style)
-    openai.api_key = OPENAI_API_KEY
-    client = None
-    use_new_client = False
+# === Hosted Rewrite Client ===
+# One async client with a pooled keep-alive connection pool per worker.
+# REWRITE_CONCURRENCY caps upstream calls in flight and REWRITE_TIMEOUT bounds
+# each one, so a slow upstream never stalls /shield or /ping. Transient
+# failures are retried up to REWRITE_MAX_ATTEMPTS times; after
+# BREAKER_FAILURES in a row the breaker opens for BREAKER_RESET seconds and
+# rewrites fall back to the local tone templates.
+rewriter = ResilientRewriter(
+    OPENAI_API_KEY,
+    model=os.getenv("OPENAI_MODEL", DEFAULT_MODEL),
+    timeout=float(os.getenv("REWRITE_TIMEOUT", "20")),
+    max_concurrency=int(os.getenv("REWRITE_CONCURRENCY", "16")),
+    max_attempts=int(os.getenv("REWRITE_MAX_ATTEMPTS", "3")),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv("BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.getenv("BREAKER_RESET", "30")),
+    ),
+    hedge=os.getenv("REWRITE_HEDGE", "1") != "0",
+)
+
+# === Latency Routing ===
+# Requests may carry `deadline_ms`; REWRITE_DEADLINE_MS sets a default. When
+# recent upstream latency and queue depth project a hosted rewrite past the
+# deadline, the local tone engine answers instead. Responses say which
+# engine served them.
+REWRITE_DEADLINE_MS = os.getenv("REWRITE_DEADLINE_MS")
+router = LatencyRouter(
+    rewriter,
+    deadline=float(REWRITE_DEADLINE_MS) / 1000 if REWRITE_DEADLINE_MS else None,
+)
+
+# === Micro-batching ===
+# With REWRITE_MICROBATCH_MS set, short messages (up to REWRITE_MICROBATCH_WORDS
+# words) for the same tone that arrive within that many milliseconds share one
+# upstream call of up to REWRITE_MICROBATCH_SIZE messages. Off by default.
+REWRITE_MICROBATCH_MS = float(os.getenv("REWRITE_MICROBATCH_MS", "0"))
+microbatcher = (
+    MicroBatcher(
+        rewriter,
+        max_items=int(os.getenv("REWRITE_MICROBATCH_SIZE", "8")),
+        max_wait=REWRITE_MICROBATCH_MS / 1000,
+        max_words=int(os.getenv("REWRITE_MICROBATCH_WORDS", "30")),
+    )
+    if REWRITE_MICROBATCH_MS > 0
+    else None
+)
+
+# === Rewrite Cache ===
+# Finished hosted rewrites are cached by (message, tone, model, prompt version).
+# Set REWRITE_CACHE_PATH to a SQLite file to keep them across restarts and
+# share them between the workers on one host.
+REWRITE_CACHE_PATH = os.getenv("REWRITE_CACHE_PATH")
+rewrite_cache = RewriteCache(
+    maxsize=int(os.getenv("REWRITE_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("REWRITE_CACHE_TTL", "86400")),
+    path=Path(REWRITE_CACHE_PATH) if REWRITE_CACHE_PATH else None,
+)
+
+# Identical rewrites already in flight are awaited rather than sent again.
+rewrite_flights = SingleFlight()
+
+# /rewrite/batch accepts up to REWRITE_BATCH_MAX items and runs at most
+# REWRITE_BATCH_CONCURRENCY of them at once per batch.
+REWRITE_BATCH_MAX = int(os.getenv("REWRITE_BATCH_MAX", "100"))
+REWRITE_BATCH_CONCURRENCY = int(os.getenv("REWRITE_BATCH_CONCURRENCY", "8"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await rewriter.aclose()
+    rewrite_cache.close()
 
 # === FastAPI App Initialization ===
-app = FastAPI(title="TEXT ANGEL API", version="2.0")
+app = FastAPI(title="TEXT ANGEL API", version="2.0", lifespan=lifespan)
 
 # Allow Streamlit / Flutter / iOS local dev to connect
 app.add_middleware(
@@ -53,10 +129,28 @@ app.add_middleware(
 class RewriteRequest(BaseModel):
     tone: str
     message: str
+    fresh: bool = False  # skip the cache and ask for a new variation
+    # answer locally if the hosted model would take longer than this
+    deadline_ms: int | None = Field(None, gt=0)
 
 class RewriteResponse(BaseModel):
     rewritten: str
     tone: str
+    engine: str  # "hosted" or "local"
+
+class BatchRewriteRequest(BaseModel):
+    items: list[RewriteRequest] = Field(min_length=1, max_length=REWRITE_BATCH_MAX)
+
+class BatchRewriteItem(BaseModel):
+    index: int
+    tone: str
+    rewritten: str | None = None
+    engine: str | None = None
+    status: int = 200
+    error: str | None = None
+
+class BatchRewriteResponse(BaseModel):
+    results: list[BatchRewriteItem]
 
 class ShieldRequest(BaseModel):
     message: str
@@ -65,76 +159,256 @@ class ShieldResponse(BaseModel):
     shielded: str
     count: int
     blocked_words: list[str]
+    config_version: str | None = None
 
-# === Tone Prompts ===
-TONE_PROMPTS = {
-    "GRACE": "Rewrite the following message with kindness, care, and gentleness.",
-    "TRUTH": "Rewrite the following message to be honest, clear, and respectful.",
-    "CALM": "Rewrite the following message in a peaceful and soft tone, with no harshness or aggression."
-}
+# === Tones ===
+# Tone prompts live in tone_prompts.json (see text_angel.tone.TONES);
+# unknown tones fall back to GRACE.
+def resolve_tone(tone: str) -> Tone:
+    if tone in TONES and TONES.get(tone).hosted:
+        return TONES.get(tone)
+    return TONES.get("GRACE")
 
 # === Rewrite Logic ===
-def handle_rewrite_input(tone: str, message: str) -> str:
-    """Send rewrite request to OpenAI with selected tone."""
-    prompt_text = TONE_PROMPTS.get(tone.upper(), TONE_PROMPTS["GRACE"])
-    prompt = f"{prompt_text}\n\nMessage: {message}"
+def fallback_rewrite(tone: str, message: str) -> str | None:
+    """Local rewrite used when the hosted model is unavailable or too slow."""
+    profile = resolve_tone(tone).profile
+    if profile is None:
+        return None
+    return rewrite_text(message, profile).rewritten_text
 
-    try:
-        if use_new_client:
-            # ✅ Modern OpenAI Python client (v1.x+)
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a kind, emotionally intelligent assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=200,
-            )
-            return response.choices[0].message.content.strip()
+def request_deadline(deadline_ms: int | None) -> float | None:
+    return router.budget(None if deadline_ms is None else deadline_ms / 1000)
 
+def routed_rewrite(tone: str, message: str, deadline_ms: int | None) -> str | None:
+    """Local rewrite if the hosted model is projected to miss the deadline."""
+    if router.choose(request_deadline(deadline_ms)) != LOCAL:
+        return None
+    return fallback_rewrite(tone, message)
+
+async def handle_rewrite_input(
+    tone: str, message: str, fresh: bool = False, deadline_ms: int | None = None
+) -> tuple[str, str]:
+    """Send rewrite request to OpenAI with selected tone, unless it is cached.
+
+    Returns the rewrite and the engine that produced it.
+    """
+    selected = resolve_tone(tone)
+    key = rewrite_cache_key(message, selected, rewriter.model)
+    if not fresh:
+        cached = await rewrite_cache.aget(key)
+        if cached is not None:
+            return cached, HOSTED
+    rewritten = routed_rewrite(tone, message, deadline_ms)
+    if rewritten is not None:
+        return rewritten, LOCAL
+
+    async def call_upstream() -> str:
+        if microbatcher is not None:
+            rewritten = await microbatcher.rewrite(selected, message)
         else:
-            # 🕰️ Legacy SDK style (v0.28)
-            import openai
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a kind, emotionally intelligent assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=200,
-            )
-            return response["choices"][0]["message"]["content"].strip()
-
-    except Exception as e:
+            rewritten = await rewriter.rewrite(selected, message)
+        await rewrite_cache.aset(key, rewritten)
+        return rewritten
+
+    try:
+        # Past the deadline the caller gets a local rewrite; the shared call
+        # keeps running and caches its result for the next request.
+        async with asyncio.timeout(request_deadline(deadline_ms)):
+            return await rewrite_flights.do(key, call_upstream), HOSTED
+    except TimeoutError:
+        rewritten = fallback_rewrite(tone, message)
+        if rewritten is None:
+            raise HTTPException(status_code=504, detail="Rewrite timed out: deadline exceeded")
+        return rewritten, LOCAL
+    except CircuitOpen as e:
+        # Local rewrites are not cached, so the hosted model takes over
+        # again as soon as it recovers.
+        rewritten = fallback_rewrite(tone, message)
+        if rewritten is None:
+            raise HTTPException(status_code=503, detail=f"Rewrite unavailable: {str(e)}")
+        return rewritten, LOCAL
+    except UpstreamTimeout as e:
+        raise HTTPException(status_code=504, detail=f"Rewrite timed out: {str(e)}")
+    except UpstreamError as e:
         raise HTTPException(status_code=500, detail=f"Rewrite failed: {str(e)}")
 
 # === Shield Logic ===
-def shield_input_text(message: str) -> tuple[str, int, list[str]]:
+BLOCKED_WORDS = ["shit", "fuck", "bitch", "asshole", "dick", "hate", "stupid", "ugly"]
+# Point SHIELD_WORDS_PATH at a shield JSON file to have word list updates
+# picked up without a restart, or SHIELD_ARTIFACT_PATH at a file built with
+# `python -m text_angel.compiled` to share one mapped copy across workers;
+# otherwise the built-in list above is used.
+SHIELD_WORDS_PATH = os.getenv("SHIELD_WORDS_PATH")
+SHIELD_ARTIFACT_PATH = os.getenv("SHIELD_ARTIFACT_PATH")
+if SHIELD_ARTIFACT_PATH:
+    BLOCKED_SHIELD = load_compiled_shield(Path(SHIELD_ARTIFACT_PATH))
+elif SHIELD_WORDS_PATH:
+    BLOCKED_SHIELD = ShieldConfigWatcher(Path(SHIELD_WORDS_PATH)).start()
+else:
+    BLOCKED_SHIELD = ShieldConfig(categories={"blocked": BLOCKED_WORDS}).compile()
+
+def shield_input_text(message: str) -> tuple[str, int, list[str], str | None]:
     """Replace flagged words with censor blocks."""
-    blocked_words = ["shit", "fuck", "bitch", "asshole", "dick", "hate", "stupid", "ugly"]
-    count = 0
-    found = []
-    for word in blocked_words:
-        pattern = re.compile(rf'\b{re.escape(word)}\b', re.IGNORECASE)
-        matches = pattern.findall(message)
-        if matches:
-            found.extend(matches)
-            count += len(matches)
-            message = pattern.sub(lambda m: "▆" * len(m.group()), message)
-    return message, count, found
+    result = shield_text(message, BLOCKED_SHIELD)
+    found = [message[start:end] for start, end, _ in result.spans()]
+    shielded = result.render(lambda word: "▆" * len(word))
+    return shielded, result.total_matches, found, result.config_version
+
+# === Local Harshness Gate ===
+# Point HARSHNESS_MODEL_PATH at a model built with `python -m text_angel.harshness`
+# to answer kind messages locally instead of calling OpenAI. With
+# HARSHNESS_SKIP_MODE=local they get the local tone template; by default they
+# are returned unchanged.
+HARSHNESS_MODEL_PATH = os.getenv("HARSHNESS_MODEL_PATH")
+HARSHNESS_MODEL = load_harshness_model(Path(HARSHNESS_MODEL_PATH)) if HARSHNESS_MODEL_PATH else None
+HARSHNESS_SKIP_MODE = os.getenv("HARSHNESS_SKIP_MODE", "original")
+
+def local_rewrite(tone: str, message: str) -> str | None:
+    """Rewrite kind messages locally; returns None when OpenAI is needed."""
+    if HARSHNESS_MODEL is None or shield_contains_any(message, BLOCKED_SHIELD):
+        return None
+    if HARSHNESS_MODEL.is_harsh(message):
+        return None
+    if HARSHNESS_SKIP_MODE != "local":
+        return message
+    profile = resolve_tone(tone).profile
+    if profile is None:
+        return None
+    return rewrite_text(message, profile).rewritten_text
 
 # === Routes ===
+async def rewrite_message(req: RewriteRequest) -> tuple[str, str]:
+    rewritten = local_rewrite(req.tone, req.message)
+    if rewritten is not None:
+        return rewritten, LOCAL
+    return await handle_rewrite_input(
+        req.tone, req.message, fresh=req.fresh, deadline_ms=req.deadline_ms
+    )
+
 @app.post("/rewrite", response_model=RewriteResponse)
 async def rewrite(req: RewriteRequest):
-    rewritten = handle_rewrite_input(req.tone, req.message)
-    return {"rewritten": rewritten, "tone": req.tone.upper()}
+    rewritten, engine = await rewrite_message(req)
+    return {"rewritten": rewritten, "tone": req.tone.upper(), "engine": engine}
+
+async def rewrite_batch_item(index: int, req: RewriteRequest, slots: asyncio.Semaphore) -> dict:
+    """Rewrite one batch item, reporting a failure instead of raising it."""
+    result = {"index": index, "tone": req.tone.upper()}
+    async with slots:
+        try:
+            result["rewritten"], result["engine"] = await rewrite_message(req)
+        except HTTPException as e:
+            result.update(status=e.status_code, error=e.detail)
+            return result
+        except Exception as e:
+            # Any other failure (say, a locked cache file) still only fails this item.
+            result.update(status=500, error=f"Rewrite failed: {str(e)}")
+            return result
+    result["status"] = 200
+    return result
+
+@app.post("/rewrite/batch", response_model=BatchRewriteResponse)
+async def rewrite_batch(req: BatchRewriteRequest, stream: bool = Query(False)):
+    # Items share the cache and in-flight coalescing with /rewrite. With
+    # ?stream=true results are sent as NDJSON lines in completion order.
+    slots = asyncio.Semaphore(REWRITE_BATCH_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(rewrite_batch_item(index, item, slots))
+        for index, item in enumerate(req.items)
+    ]
+    if not stream:
+        return {"results": await asyncio.gather(*tasks)}
+
+    async def lines() -> AsyncIterator[str]:
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def rewrite_events(req: RewriteRequest) -> AsyncIterator[str]:
+    """Server-sent events for /rewrite/stream: `token`s, then `done` or `error`."""
+    _, count, found, version = shield_input_text(req.message)
+    selected = resolve_tone(req.tone)
+    key = rewrite_cache_key(req.message, selected, rewriter.model)
+    engine = LOCAL
+    rewritten = local_rewrite(req.tone, req.message)
+    if rewritten is None and not req.fresh:
+        rewritten = await rewrite_cache.aget(key)
+        engine = HOSTED
+    if rewritten is None:
+        rewritten = routed_rewrite(req.tone, req.message, req.deadline_ms)
+        engine = LOCAL
+    if rewritten is not None:
+        yield sse_event("token", {"text": rewritten})
+    else:
+        engine = HOSTED
+        pieces = []
+        try:
+            async for piece in rewriter.stream(selected, req.message):
+                pieces.append(piece)
+                yield sse_event("token", {"text": piece})
+        except CircuitOpen as e:
+            rewritten = fallback_rewrite(req.tone, req.message)
+            if rewritten is None:
+                detail = f"Rewrite unavailable: {str(e)}"
+                yield sse_event("error", {"status": 503, "detail": detail})
+                return
+            engine = LOCAL
+            yield sse_event("token", {"text": rewritten})
+        except UpstreamTimeout as e:
+            yield sse_event("error", {"status": 504, "detail": f"Rewrite timed out: {str(e)}"})
+            return
+        except UpstreamError as e:
+            yield sse_event("error", {"status": 500, "detail": f"Rewrite failed: {str(e)}"})
+            return
+        else:
+            rewritten = "".join(pieces).strip()
+            await rewrite_cache.aset(key, rewritten)
+    shield = {"count": count, "blocked_words": found, "config_version": version}
+    done = {"rewritten": rewritten, "tone": req.tone.upper(), "engine": engine, "shield": shield}
+    yield sse_event("done", done)
+
+@app.post("/rewrite/stream")
+async def rewrite_stream(req: RewriteRequest):
+    # Tokens are relayed as the model produces them. Streams are not
+    # coalesced, but finished rewrites are cached like /rewrite's.
+    return StreamingResponse(
+        rewrite_events(req),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/rewrite/cache")
+def rewrite_cache_stats():
+    stats = rewrite_cache.stats()
+    return {
+        **asdict(stats),
+        "hit_rate": stats.hit_rate,
+        "in_flight": rewrite_flights.in_flight,
+        "coalesced": rewrite_flights.coalesced,
+    }
+
+@app.get("/rewrite/upstream")
+def rewrite_upstream_stats():
+    stats = rewriter.stats()
+    return {
+        **asdict(stats),
+        "in_flight": rewriter.in_flight,
+        "waiting": rewriter.waiting,
+        "router": asdict(router.stats()),
+    }
 
 @app.post("/shield", response_model=ShieldResponse)
 async def shield(req: ShieldRequest):
-    shielded, count, found = shield_input_text(req.message)
-    return {"shielded": shielded, "count": count, "blocked_words": found}
+    shielded, count, found, version = shield_input_text(req.message)
+    return {"shielded": shielded, "count": count, "blocked_words": found, "config_version": version}
 
 @app.get("/ping")
 def ping():
@@ -1,24 +1,34 @@
 
 import streamlit as st
-import json
-import re
+import io
+from dataclasses import replace
 from pathlib import Path
 
+from text_angel import ShieldStream, load_shield_config
+
 # Load shield words from JSON
-shield_path = "shield_filter_words.json"
-with open(shield_path, "r") as f:
-    shield_words = json.load(f)
+shield_path = Path("shield_filter_words.json")
+
+@st.cache_resource
+def load_guardian_matcher():
+    return replace(load_shield_config(shield_path), replacement="▆▆▆").compile()
+
+guardian_matcher = load_guardian_matcher()
 
 # Define censor logic
-def censor_message(message, shield_list):
-    blocked_count = 0
-    censored_message = message
-    for word in shield_list:
-        word_pattern = re.compile(r'\b' + re.escape(word) + r'\b', flags=re.IGNORECASE)
-        if word_pattern.search(censored_message):
-            blocked_count += len(word_pattern.findall(censored_message))
-            censored_message = word_pattern.sub("▆▆▆", censored_message)
-    return censored_message, blocked_count
+def censor_message(message, matcher=guardian_matcher):
+    result = matcher.shield(message)
+    return result.sanitized_text, result.total_matches
+
+def censor_export(binary_file, matcher=guardian_matcher, chunk_size=64 * 1024):
+    """Shield a (possibly huge) chat export chunk by chunk."""
+    stream = ShieldStream(matcher)
+    reader = io.TextIOWrapper(binary_file, encoding="utf-8", errors="replace")
+    censored = io.StringIO()
+    while chunk := reader.read(chunk_size):
+        censored.write(stream.feed(chunk))
+    censored.write(stream.close())
+    return censored.getvalue(), stream.total_matches
 
 # Streamlit UI
 st.set_page_config(page_title="TEXT ANGEL | Incoming Shield", layout="centered")
@@ -33,7 +43,7 @@ incoming_message = st.text_area("📥 Paste the message you received:", height=2
 
 # Shield processing
 if incoming_message:
-    censored, blocked_count = censor_message(incoming_message, shield_words)
+    censored, blocked_count = censor_message(incoming_message)
 
     if blocked_count > 0:
         st.error("⚠️ This message was shielded by TEXT ANGEL.")
@@ -51,3 +61,9 @@ if incoming_message:
     else:
         st.success("✅ This message contains no harmful words.")
 
+# Long chat exports are shielded in chunks instead of being pasted whole
+export_file = st.file_uploader("📂 Or upload a chat export (.txt):", type=["txt"])
+if export_file is not None:
+    censored_export, export_count = censor_export(export_file)
+    st.info(f"🛡️ {export_count} word{'s' if export_count != 1 else ''} were shielded in this export.")
+    st.download_button("⬇️ Download shielded export", censored_export, file_name="shielded_export.txt")
@@ -1,15 +1,17 @@
 import streamlit as st
 import openai
 import os
-import json
 from datetime import datetime
-import re
+from pathlib import Path
 import uuid
 
+from profile_system import get_sensitivity
+from text_angel import TONES, ShieldingError, load_shield_config
+
 # --- CONFIG --- #
 SOUND_FILE = "https://actions.google.com/sounds/v1/cartoon/clang_and_wobble.ogg"
 LOG_PATH = "user_interface/data/message_log.txt"
-SHIELD_WORDS_PATH = os.path.join(os.path.dirname(__file__), "..", "shield_filter", "shield_filter_words.json")
+SHIELD_WORDS_PATH = os.path.join(os.path.dirname(__file__), "shield_filter", "shield_filter_words.json")
 
 # --- SETUP --- #
 st.set_page_config(page_title="TEXT ANGEL", page_icon="😇")
@@ -17,49 +19,43 @@ st.title("😇 TEXT ANGEL")
 st.subheader("Fix your message with Grace, Truth, or Calm.")
 
 # --- Load Shield Words --- #
+# One set of precompiled matchers per sensitivity level, shared by every session
+@st.cache_resource
+def load_shield_tiers():
+    config = load_shield_config(Path(SHIELD_WORDS_PATH))
+    return config.tiers()
+
 try:
-    with open(SHIELD_WORDS_PATH) as f:
-        shield_words = json.load(f)
+    shield_tiers = load_shield_tiers()
 except FileNotFoundError:
-    shield_words = []
+    shield_tiers = None
     st.warning("Shield words file not found. Running without filter.")
+except ShieldingError as e:
+    st.error(f"Shield words file could not be loaded: {e}")
+    st.stop()
 
-# --- Tone Prompts --- #
-tone_prompts = {
-    "GRACE": "Rewrite the following message with kindness, care, and gentleness.",
-    "TRUTH": "Rewrite the following message to be honest, clear, and respectful.",
-    "CALM": "Rewrite the following message in a peaceful and soft tone, with no harshness."
-}
-tone_styles = {
-    "GRACE": {"color": "#FFF9E6", "emoji": "💛"},
-    "TRUTH": {"color": "#E6F0FF", "emoji": "💙"},
-    "CALM": {"color": "#E6FFF0", "emoji": "💚"}
-}
+# --- Tones (prompts, colors and emojis come from tone_prompts.json) --- #
+tone_names = TONES.names(hosted=True)
 
 # --- User Profile --- #
 st.markdown("### 👤 Your Profile")
 username = st.text_input("Name your Guardian Angel (just for fun):", value="Seraphiel")
 reminder = st.text_input("Reminder before sending:", value="Speak like an angel")
-sensitivity = st.slider("Auto-Filter Sensitivity", 0, 10, value=7)
+sensitivity = st.slider("Auto-Filter Sensitivity", 0, 10, value=get_sensitivity())
 
 st.markdown("---")
 
 # --- Input UI --- #
 message = st.text_area("📨 Type your message:")
-tone = st.selectbox("🧭 Choose an Angel Tone for this message:", ["GRACE", "TRUTH", "CALM"])
+tone = st.selectbox("🧭 Choose an Angel Tone for this message:", tone_names)
 submit = st.button("🕊️ Angel Edit")
 
 # --- Censorship Filter --- #
-def censor_message(message, blocked_words):
-    count = 0
-    censored = message
-    for word in blocked_words:
-        pattern = r"\b" + re.escape(word) + r"\b"
-        matches = re.findall(pattern, censored, flags=re.IGNORECASE)
-        if matches:
-            count += len(matches)
-            censored = re.sub(pattern, "▆▆▆", censored, flags=re.IGNORECASE)
-    return censored, count
+def censor_message(message, sensitivity):
+    if shield_tiers is None:
+        return message, 0
+    result = shield_tiers.shield(message, sensitivity)
+    return result.render("▆▆▆"), result.total_matches
 
 # --- Logging --- #
 def log_message(user, tone, original, rewritten):
@@ -70,22 +66,18 @@ def log_message(user, tone, original, rewritten):
 # --- PROCESSING --- #
 if submit and message:
     st.caption(f"🧘 {reminder}")
-    censored_message, shield_count = censor_message(message, shield_words)
+    censored_message, shield_count = censor_message(message, sensitivity)
 
     with st.spinner("Calling your angel..."):
         try:
-            prompt = f"{tone_prompts[tone]} {censored_message}"
             response = openai.ChatCompletion.create(
                 model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a kind and emotionally intelligent assistant."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=TONES.get(tone).messages(censored_message),
                 temperature=0.7,
                 max_tokens=150
             )
             rewritten = response["choices"][0]["message"]["content"]
-            style = tone_styles[tone]
+            style = TONES.get(tone).style
 
             st.success("✅ Your message has been filtered!")
             st.audio(SOUND_FILE)
@@ -1,10 +1,15 @@
 import streamlit as st
 import openai
 import os
-import json
 from datetime import datetime
+from pathlib import Path
+import sys
 import uuid
-import re
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from profile_system import get_sensitivity
+from text_angel import TONES, ShieldingError, load_shield_config
 
 # --- PAGE SETUP --- #
 st.set_page_config(page_title="TEXT ANGEL", page_icon="😇")
@@ -14,28 +19,25 @@ SOUND_FILE = "https://actions.google.com/sounds/v1/cartoon/clang_and_wobble.ogg"
 LOG_PATH = "data/message_log.txt"
 SHIELD_WORDS_PATH = os.path.join(os.path.dirname(__file__), "..", "shield_filter", "shield_filter_words.json")
 
+# One set of precompiled matchers per sensitivity level, shared by every session
+@st.cache_resource
+def load_shield_tiers():
+    config = load_shield_config(Path(SHIELD_WORDS_PATH))
+    return config.tiers()
+
 try:
-    with open(SHIELD_WORDS_PATH) as f:
-        shield_words = json.load(f)
+    shield_tiers = load_shield_tiers()
 except FileNotFoundError:
-    shield_words = []
+    shield_tiers = None
     st.warning("Shield words file not found. Running without filter.")
+except ShieldingError as e:
+    st.error(f"Shield words file could not be loaded: {e}")
+    st.stop()
 
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
-# --- Tone Styles --- #
-tone_styles = {
-    "GRACE": {"color": "#FFF9E6", "emoji": "💛"},
-    "TRUTH": {"color": "#E6F0FF", "emoji": "💙"},
-    "CALM": {"color": "#E6FFF0", "emoji": "💚"}
-}
-
-# --- Tone Prompts --- #
-tone_prompts = {
-    "GRACE": "Rewrite this message with gentle kindness, compassion, and loving understanding:",
-    "TRUTH": "Rewrite this message with honest clarity, directness, and truth but not cruelty:",
-    "CALM": "Rewrite this message to sound calm, peaceful, and emotionally soothing:"
-}
+# --- Tones (prompts, colors and emojis come from tone_prompts.json) --- #
+tone_names = TONES.names(hosted=True)
 
 st.title("😇 TEXT ANGEL")
 st.subheader("Fix your message with Grace, Truth, or Calm.")
@@ -44,18 +46,18 @@ st.subheader("Fix your message with Grace, Truth, or Calm.")
 st.markdown("### 👤 Your Profile")
 username = st.text_input("Your name:", value="Jagger")
 avatar = st.selectbox("Choose your angel avatar:", ["😇", "🧚", "🕊️", "🛡️", "🌟"])
-default_tone = st.selectbox("Choose your favorite Angel Tone:", ["GRACE", "TRUTH", "CALM"])
+default_tone = st.selectbox("Choose your favorite Angel Tone:", tone_names)
 style_pref = st.selectbox("Your messaging style:", ["Direct", "Gentle", "Playful", "Quiet"])
 triggers = st.multiselect("Common triggers (optional):", ["Criticism", "Sarcasm", "Being ignored", "Too many messages"])
 guardian = st.text_input("Name your Guardian Angel (just for fun):", value="Seraphiel")
 reminder = st.text_input("Reminder before sending:", value="Speak like an angel")
-auto_filter = st.slider("Auto-Filter Sensitivity", 0, 10, 7)
+auto_filter = st.slider("Auto-Filter Sensitivity", 0, 10, get_sensitivity())
 
 st.markdown("---")
 
 # --- MAIN --- #
 message = st.text_area("📨 Type your message:", height=150)
-tone = st.selectbox("🧭 Choose an Angel Tone for this message:", ["GRACE", "TRUTH", "CALM"], index=["GRACE", "TRUTH", "CALM"].index(default_tone))
+tone = st.selectbox("🧭 Choose an Angel Tone for this message:", tone_names, index=tone_names.index(default_tone))
 submit = st.button("🕊️ Angel Edit")
 
 # --- Utilities --- #
@@ -64,36 +66,27 @@ def log_message(user, tone, original, rewritten):
     with open(LOG_PATH, "a") as f:
         f.write(f"[{datetime.now()}] {user} | Tone: {tone}\nOriginal: {original}\nFiltered: {rewritten}\n\n")
 
-def censor_message(message, blocked_words):
-    count = 0
-    censored = message
-    for word in blocked_words:
-        pattern = r'\b' + re.escape(word) + r'\b'
-        matches = re.findall(pattern, censored, flags=re.IGNORECASE)
-        if matches:
-            count += len(matches)
-            censored = re.sub(pattern, '▆▆▆', censored, flags=re.IGNORECASE)
-    return censored, count
+def censor_message(message, sensitivity):
+    if shield_tiers is None:
+        return message, 0
+    result = shield_tiers.shield(message, sensitivity)
+    return result.render("▆▆▆"), result.total_matches
 
 # --- PROCESS --- #
 if submit and message:
     st.caption(f"🧘 {reminder}")
-    censored_message, shield_count = censor_message(message, shield_words)
+    censored_message, shield_count = censor_message(message, auto_filter)
 
     with st.spinner("Calling your angel..."):
         try:
-            prompt = f"{tone_prompts[tone]} {censored_message}"
             response = openai.ChatCompletion.create(
                 model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a kind and emotionally intelligent assistant."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=TONES.get(tone).messages(censored_message),
                 temperature=0.7,
                 max_tokens=150
             )
             rewritten = response["choices"][0]["message"]["content"]
-            style = tone_styles[tone]
+            style = TONES.get(tone).style
 
             st.success("✅ Your message has been filtered!")
             st.audio(SOUND_FILE)
@@ -1,57 +1,58 @@
 import streamlit as st
 import openai
 import os
-import json  # ← this is needed to read your JSON file
+import sys
+from pathlib import Path
 
-# Load Shield Words
-with open("shield_filter/shield_filter_words.json") as f:
-    shield_words = json.load(f)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from text_angel import TONES, ShieldConfigWatcher, ShieldingError
+
+st.set_page_config(page_title="TEXT ANGEL", page_icon="😇")
 
-# Angel tone prompts
-tone_prompts = {
-    "GRACE": "Rewrite the following message with kindness, care, and gentleness.",
-    "TRUTH": "Rewrite the following message to be honest, clear, and respectful.",
-    "CALM": "Rewrite the following message in a peaceful and soft tone, with no harshness."
-}
+# Load Shield Words once per server; the watcher picks up edits to the file
+@st.cache_resource
+def load_shield_watcher() -> ShieldConfigWatcher:
+    return ShieldConfigWatcher(Path("shield_filter/shield_filter_words.json")).start()
 
-# Tone colors and emojis
-tone_styles = {
-    "GRACE": {"color": "#FFF9E6", "emoji": "💛"},
-    "TRUTH": {"color": "#E6F0FF", "emoji": "💙"},
-    "CALM": {"color": "#E6FFF0", "emoji": "💚"}
-}
+try:
+    shield_watcher = load_shield_watcher()
+except FileNotFoundError:
+    shield_watcher = None
+    st.warning("Shield words file not found. Running without filter.")
+except ShieldingError as e:
+    st.error(f"Shield words file could not be loaded: {e}")
+    st.stop()
+
+openai.api_key = os.getenv("OPENAI_API_KEY")
+
+# Angel tones (prompts, colors and emojis) come from tone_prompts.json
+tone_names = TONES.names(hosted=True)
 
-st.set_page_config(page_title="TEXT ANGEL", page_icon="😇")
 st.title("😇 TEXT ANGEL")
 st.subheader("Fix your message with Grace, Truth, or Calm.")
 
 # Input
 message = st.text_area("Type your message below:", height=150)
-tone = st.selectbox("Choose an Angel Tone:", ["GRACE", "TRUTH", "CALM"])
+tone = st.selectbox("Choose an Angel Tone:", tone_names)
 submit = st.button("🕊️ Angel Edit")
 
 # Process
 if submit and message:
     # Check for blocked words
-    if any(word in message.lower() for word in shield_words):
+    if shield_watcher is not None and shield_watcher.matcher.contains_any(message):
         st.error("⚠️ Your message contains blocked words. Please revise it before using TEXT ANGEL.")
     else:
         with st.spinner("Calling your angel..."):
             try:
-                prompt = f"{tone_prompts[tone]} Message: {message}"
                 response = openai.ChatCompletion.create(
                     model="gpt-4",
-                    messages=[
-                        {"role": "system", "content": "You are a kind and emotionally intelligent assistant."},
-                        {"role": "user", "content": prompt}
-                    ],
+                    messages=TONES.get(tone).messages(message),
                     temperature=0.7,
                     max_tokens=150
                 )
                 rewritten = response['choices'][0]['message']['content']
-                style = tone_styles[tone]
+                style = TONES.get(tone).style
 
                 # Display styled output
                 st.markdown(f"""